@@ -0,0 +1,290 @@
+# file: app/admission.py
+"""
+Admission control in front of the routers: per-user rate limits, concurrency
+caps on expensive routes and load shedding, all decided before a request
+touches the DB pool.
+
+Every HTTP request falls into a route class (ROUTES, first match wins):
+    critical  auth, /health, /metrics, docs - never limited or shed
+    bulk      exports, ingests, report generation / download, replay start
+    heavy     tick / curve / storage reads, analytics, weather, snapshots
+    standard  everything else (/news, lists, CRUD)
+Each class has a token bucket per caller (bearer token's user, else client
+IP) of `rate` requests/s with `burst` capacity -> 429, and a per-process cap
+on requests in flight -> 503. Set ADMISSION_<CLASS>="rate,burst,concurrency"
+to change them (0 = unlimited), ADMISSION_ENABLED=0 to turn it all off.
+
+Shedding: overload is the larger of event loop lag / SHED_LOOP_LAG_SECONDS
+and DB pool wait / SHED_POOL_WAIT_SECONDS (both sampled in the background).
+At >= 1 bulk and heavy requests get an immediate 503; at >= SHED_HARD_FACTOR
+standard ones too. Rejections carry Retry-After and are counted in
+oriza_admission_rejected_total{class,reason}.
+
+Limits are per process; with several workers, divide them accordingly.
+"""
+import asyncio
+import json
+import math
+import os
+import re
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from app import metrics
+from app.db import engine
+from app.deps import _token_store
+from app.tasks import background_task
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1").lower() not in ("0", "false", "no", "off")
+SHED_LOOP_LAG_SECONDS = float(os.getenv("SHED_LOOP_LAG_SECONDS", "0.25"))
+SHED_POOL_WAIT_SECONDS = float(os.getenv("SHED_POOL_WAIT_SECONDS", "0.5"))
+SHED_HARD_FACTOR = float(os.getenv("SHED_HARD_FACTOR", "4"))
+ADMISSION_MAX_KEYS = 50_000  # rate-limit buckets kept in memory
+POOL_SAMPLE_INTERVAL_SECONDS = 0.5
+
+
+@dataclass
+class RouteClass:
+    name: str
+    rate: float  # requests/s per caller, 0 = unlimited
+    burst: int
+    concurrency: int  # in flight per process, 0 = unlimited
+    shed_level: int  # overload level at which it is shed, 0 = never
+    inflight: int = 0
+
+    @classmethod
+    def configure(cls, name: str, rate: float, burst: int, concurrency: int, shed_level: int) -> "RouteClass":
+        env = os.getenv(f"ADMISSION_{name.upper()}")
+        if env:
+            r, b, c = (env.split(",") + ["", "", ""])[:3]
+            rate = float(r or rate)
+            burst = int(b or burst)
+            concurrency = int(c or concurrency)
+        return cls(name, rate, burst, concurrency, shed_level)
+
+
+CLASSES: Dict[str, RouteClass] = {
+    c.name: c
+    for c in (
+        RouteClass.configure("critical", 0, 0, 0, shed_level=0),
+        RouteClass.configure("bulk", 0.2, 5, 4, shed_level=1),
+        RouteClass.configure("heavy", 10, 50, 64, shed_level=1),
+        RouteClass.configure("standard", 30, 100, 0, shed_level=2),
+    )
+}
+
+# (methods or None for any, path pattern, class)
+ROUTES = [
+    (None, r"^/(health|metrics|docs|redoc|openapi\.json)", "critical"),
+    (None, r"^/auth/", "critical"),
+    (("GET",), r"^/(market|supply)/[^/]+/(ticks|storage)/export$", "bulk"),
+    (("POST",), r"^/(market/curves|supply/storage)/ingest$", "bulk"),
+    (("POST",), r"^/reports/generate$", "bulk"),
+    (("GET",), r"^/reports/download/", "bulk"),
+    (("POST",), r"^/replay/?$", "bulk"),
+    (("GET",), r"^/market/[^/]+/(tick|curve)", "heavy"),
+    (("GET",), r"^/supply/[^/]+/storage(/scenarios)?$", "heavy"),
+    (("GET",), r"^/(analytics|weather)/", "heavy"),
+    (("GET",), r"^/workspaces/[^/]+/snapshot$", "heavy"),
+]
+_ROUTES = [(methods, re.compile(pattern), name) for methods, pattern, name in ROUTES]
+
+
+@lru_cache(maxsize=4096)
+def classify(method: str, path: str) -> RouteClass:
+    for methods, pattern, name in _ROUTES:
+        if (methods is None or method in methods) and pattern.match(path):
+            return CLASSES[name]
+    return CLASSES["standard"]
+
+
+class RateLimiter:
+    """Token buckets keyed by (class, caller); idle buckets are dropped once they would be full again."""
+
+    def __init__(self, max_keys: int = ADMISSION_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: Dict[Tuple[str, str], list] = {}  # key -> [tokens, last update, full at]
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def take(self, key: Tuple[str, str], rate: float, burst: int, now: float) -> float:
+        """Take one token; returns 0.0 if allowed, else seconds until the next one."""
+        b = self._buckets.get(key)
+        if b is None:
+            if len(self._buckets) >= self.max_keys:
+                self._prune(now)
+            b = self._buckets[key] = [float(burst), now, now]
+        else:
+            b[0] = min(float(burst), b[0] + (now - b[1]) * rate)
+            b[1] = now
+        if b[0] >= 1.0:
+            b[0] -= 1.0
+            b[2] = now + (burst - b[0]) / rate
+            return 0.0
+        return (1.0 - b[0]) / rate
+
+    def _prune(self, now: float):
+        for key in [k for k, b in self._buckets.items() if b[2] <= now]:
+            del self._buckets[key]
+        if len(self._buckets) >= self.max_keys:  # all active: forget the least recently used half
+            for key, _ in sorted(self._buckets.items(), key=lambda kv: kv[1][1])[: self.max_keys // 2]:
+                del self._buckets[key]
+
+
+limiter = RateLimiter()
+
+# --- overload signals ---
+pool_wait = metrics.histogram("oriza_db_pool_wait_seconds", "Time to check out a DB connection while the pool is exhausted")
+pool_wait_last = metrics.gauge(
+    "oriza_db_pool_wait_last_seconds", "Longest DB pool wait in the last sample interval, including checkouts still queued")
+
+
+def overload_level() -> int:
+    ratio = max(metrics.loop_lag_last.get() / SHED_LOOP_LAG_SECONDS, pool_wait_last.get() / SHED_POOL_WAIT_SECONDS)
+    if ratio >= SHED_HARD_FACTOR:
+        return 2
+    return 1 if ratio >= 1.0 else 0
+
+
+def _pool_exhausted(pool) -> bool:
+    """True when a checkout would queue for a checkin: no idle connection and no overflow left."""
+    max_overflow = getattr(pool, "_max_overflow", -1)  # QueuePool only; NullPool / StaticPool never wait
+    if max_overflow < 0:
+        return False
+    return pool.checkedin() == 0 and pool.checkedout() >= pool.size() + max_overflow
+
+
+class _PoolWaitTimer:
+    """
+    Times real checkouts that start on an exhausted pool, by wrapping the pool's
+    _do_get - nothing checks out a connection of its own, and connect time on a
+    pool with room to grow is not counted as waiting.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.waiting: Dict[object, float] = {}  # checkout -> perf_counter() it started waiting
+        self.longest = 0.0  # longest finished wait since the last sample()
+        self._do_get = pool._do_get
+
+    def install(self):
+        self.pool._do_get = self._timed_do_get
+
+    def uninstall(self):
+        self.pool.__dict__.pop("_do_get", None)
+
+    def _timed_do_get(self):
+        if not _pool_exhausted(self.pool):
+            return self._do_get()
+        key = object()
+        t = self.waiting[key] = time.perf_counter()
+        try:
+            return self._do_get()
+        finally:
+            del self.waiting[key]
+            wait = time.perf_counter() - t
+            pool_wait.observe(wait)
+            self.longest = max(self.longest, wait)
+
+    def sample(self) -> float:
+        """Longest wait since the last sample, counting checkouts still queued."""
+        now = time.perf_counter()
+        wait = max([self.longest] + [now - t for t in list(self.waiting.values())])
+        self.longest = 0.0
+        return wait
+
+
+@background_task("pool_wait", every_process=True)
+async def _pool_wait_monitor(stop: asyncio.Event):
+    timer = _PoolWaitTimer(engine.sync_engine.pool)
+    timer.install()
+    try:
+        while not stop.is_set():
+            pool_wait_last.set(timer.sample())
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=POOL_SAMPLE_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        timer.uninstall()
+        pool_wait_last.set(0.0)
+
+
+# --- metrics ---
+admitted = metrics.counter("oriza_admission_admitted_total", "Requests admitted by route class", ("class",))
+rejected = metrics.counter(
+    "oriza_admission_rejected_total", "Requests rejected by route class and reason (rate_limited|concurrency|overload)",
+    ("class", "reason"))
+metrics.gauge("oriza_admission_inflight", "Requests in flight by route class", ("class",),
+              fn=lambda: {(c.name,): c.inflight for c in CLASSES.values()})
+metrics.gauge("oriza_admission_overload_level", "0 ok, 1 shedding bulk/heavy, 2 shedding all but critical",
+              fn=lambda: {(): overload_level()})
+metrics.gauge("oriza_admission_buckets", "Rate-limit buckets in memory", fn=lambda: {(): len(limiter)})
+
+
+def _caller(scope) -> str:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            info = _token_store.get(token.strip()) if scheme.lower() == "bearer" else None
+            if info:
+                return f"user:{info['user_id']}"
+            break
+    client = scope.get("client")
+    return f"ip:{client[0] if client else '-'}"
+
+
+def admit(rc: RouteClass, caller: str, now: Optional[float] = None) -> Optional[Tuple[int, str, float]]:
+    """None to admit, else (status, detail, retry after seconds)."""
+    if rc.shed_level and overload_level() >= rc.shed_level:
+        rejected.inc(rc.name, "overload")
+        return 503, "Server is overloaded, retry shortly", 1.0
+    if rc.concurrency and rc.inflight >= rc.concurrency:
+        rejected.inc(rc.name, "concurrency")
+        return 503, f"Too many concurrent {rc.name} requests, retry shortly", 1.0
+    if rc.rate:
+        wait = limiter.take((rc.name, caller), rc.rate, rc.burst, time.monotonic() if now is None else now)
+        if wait:
+            rejected.inc(rc.name, "rate_limited")
+            return 429, f"Rate limit exceeded for {rc.name} requests", wait
+    return None
+
+
+async def _reject(send, status: int, detail: str, retry_after: float):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware; runs before routing, so a rejection costs no DB session."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ADMISSION_ENABLED:
+            return await self.app(scope, receive, send)
+        rc = classify(scope["method"], scope["path"])
+        if rc.shed_level == 0 and not rc.rate and not rc.concurrency:
+            return await self.app(scope, receive, send)
+        verdict = admit(rc, _caller(scope))
+        if verdict is not None:
+            return await _reject(send, *verdict)
+        admitted.inc(rc.name)
+        rc.inflight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            rc.inflight -= 1
@@ -1,10 +1,13 @@
 # file: app/api/alerts.py
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.deps import get_db, get_current_user
 from app.models import AlertRule
+from app.responses import rows_response, select_columns
 from app.schemas.schemas import AlertRule as AlertRuleSchema
+from app.symbols import registry
 import uuid
 
 router = APIRouter()
@@ -12,16 +15,16 @@ router = APIRouter()
 @router.post("/")
 async def create_alert(rule: AlertRuleSchema, db: AsyncSession = Depends(get_db), current=Depends(get_current_user)):
     aid = str(uuid.uuid4())
-    db_obj = AlertRule(id=aid, owner_id=current.id, type=rule.type, symbol=rule.symbol, condition=rule.condition, channels=rule.channels)
+    db_obj = AlertRule(id=aid, owner_id=current.id, type=rule.type, symbol=registry.canonical(rule.symbol) if rule.symbol else None, condition=rule.condition, channels=rule.channels)
     db.add(db_obj)
     await db.commit()
     await db.refresh(db_obj)
     return db_obj
 
-@router.get("/")
+@router.get("/", response_class=ORJSONResponse)
 async def list_alerts(db: AsyncSession = Depends(get_db), current=Depends(get_current_user)):
-    q = await db.execute(select(AlertRule).where(AlertRule.owner_id == current.id))
-    return q.scalars().all()
+    q = await db.execute(select_columns(AlertRule).where(AlertRule.owner_id == current.id))
+    return rows_response(q)
 
 @router.delete("/{aid}")
 async def delete_alert(aid: str, db: AsyncSession = Depends(get_db), current=Depends(get_current_user)):
@@ -0,0 +1,39 @@
+# file: app/api/analytics.py
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from typing import Optional
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.correlation import CORRELATION_MAX_SYMBOLS, correlations, ensure_loaded
+from app.deps import get_db
+from app.symbols import registry
+
+router = APIRouter()
+
+@router.get("/correlation", response_class=ORJSONResponse)
+async def get_correlation(
+    symbols: Optional[str] = Query(None, description="comma-separated; default all known symbols"),
+    window: int = Query(60, description="bars: 20, 60 or 250"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Rolling correlation of daily log returns, served from the incrementally maintained engine."""
+    if window not in correlations.windows:
+        raise HTTPException(status_code=400, detail=f"window must be one of {', '.join(map(str, correlations.windows))}")
+    await ensure_loaded(db)
+    if symbols:
+        syms = list(dict.fromkeys(registry.canonical(s) for s in symbols.split(",") if s.strip()))
+        if len(syms) > CORRELATION_MAX_SYMBOLS:
+            raise HTTPException(status_code=400, detail=f"at most {CORRELATION_MAX_SYMBOLS} symbols per request")
+    else:
+        syms = list(correlations.symbols)
+    unknown = [s for s in syms if s not in correlations.index]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"no price history for {', '.join(unknown)}")
+    m = correlations.matrix(window, syms)
+    return ORJSONResponse({
+        "window": window,
+        "asof": correlations.asof,
+        "observations": correlations.observations(window),
+        "symbols": syms,
+        "matrix": np.where(np.isnan(m), None, np.round(m, 6)).tolist(),
+    })
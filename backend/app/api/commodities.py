@@ -1,22 +1,34 @@
 # file: app/api/commodities.py
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.deps import get_db
-from app.models import Commodity
+from app.symbols import SEARCH_LIMIT, ensure_loaded, registry
 
 router = APIRouter()
 
+# served from the in-memory symbol registry (app/symbols.py); the DB is only read
+# on first use and by the periodic refresh
+
 @router.get("/")
 async def list_commodities(db: AsyncSession = Depends(get_db)):
-    q = await db.execute(select(Commodity))
-    rows = q.scalars().all()
-    return rows
+    await ensure_loaded(db)
+    return Response(content=registry.list_json(), media_type="application/json")
+
+@router.get("/search", response_class=ORJSONResponse)
+async def search_commodities(
+    q: str = Query(..., min_length=1, max_length=64, description="prefix of a symbol, alias, name or hub"),
+    limit: int = Query(SEARCH_LIMIT, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+):
+    """Autocomplete: best match per symbol, exact before prefix, symbol > alias > name > hub."""
+    await ensure_loaded(db)
+    return ORJSONResponse(registry.search(q, limit))
 
 @router.get("/{symbol}")
 async def get_commodity(symbol: str, db: AsyncSession = Depends(get_db)):
-    q = await db.execute(select(Commodity).where(Commodity.symbol == symbol.upper()))
-    c = q.scalar_one_or_none()
+    await ensure_loaded(db)
+    c = registry.get(symbol)
     if not c:
         raise HTTPException(status_code=404, detail="Commodity not found")
-    return c
+    return ORJSONResponse(c.as_dict())
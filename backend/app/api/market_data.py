@@ -1,14 +1,24 @@
 # file: app/api/market_data.py
-from fastapi import APIRouter, Query, Depends
-from datetime import datetime, timedelta
-from typing import List
+from fastapi import APIRouter, Query, Depends, File, HTTPException, Request, UploadFile
+from fastapi.responses import ORJSONResponse
+from datetime import date, datetime, timedelta
+from typing import List, Optional
 from app.schemas.schemas import PriceTick, OHLCSeries, OHLCPoint
+import io
 import random
 
-from sqlalchemy import select, desc
+import numpy as np
+from sqlalchemy import desc
+from sqlalchemy.exc import DataError
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.deps import get_db
+from app.deps import get_db, get_current_user
 from app.models import MarketTick
+from app import curves, metrics
+from app.symbols import registry
+from app.bulk_ingest import FORMATS, detect_format
+from app.curve_ingest import ingest_settlements, parse_contract
+from app.exports import export_response
+from app.responses import rows_response, select_columns
 
 router = APIRouter()
 
@@ -16,6 +26,9 @@ router = APIRouter()
 _tick_store: dict[str, List[PriceTick]] = {}
 _ohlc_cache: dict[str, OHLCSeries] = {}
 
+metrics.gauge("oriza_tick_store_ticks", "Ticks held in the in-memory tick store per symbol", ("symbol",),
+              fn=lambda: {(sym,): len(ticks) for sym, ticks in _tick_store.items()})
+
 def _seed_symbol(symbol: str, base_price: float = 100.0):
     # generate some fake ticks and ohlc for demo
     symbol = symbol.upper()
@@ -37,20 +50,134 @@ def _seed_symbol(symbol: str, base_price: float = 100.0):
         series.append(OHLCPoint(t=now - timedelta(hours=23 - h), open=round(o,4), high=round(hi,4), low=round(lo,4), close=round(c,4)))
     _ohlc_cache[symbol] = OHLCSeries(symbol=symbol, interval="1h", series=series)
 
-# seed demo symbols
-_seed_symbol("NG", base_price=3.5)
-_seed_symbol("WTI", base_price=80.0)
+# demo symbols, seeded when the tick generator starts (not at import)
+DEMO_SYMBOLS = {"NG": 3.5, "WTI": 80.0}
+
+def seed_demo_data():
+    for symbol, base_price in DEMO_SYMBOLS.items():
+        if symbol not in _tick_store:
+            _seed_symbol(symbol, base_price=base_price)
 
 
-@router.get("/{symbol}/tick")
+@router.get("/{symbol}/tick", response_class=ORJSONResponse)
 async def get_ticks(symbol: str, limit: int = Query(100, ge=1, le=1000), db: AsyncSession = Depends(get_db)):
-    q = await db.execute(select(MarketTick).where(MarketTick.symbol == symbol.upper()).order_by(desc(MarketTick.ts)).limit(limit))
-    rows = q.scalars().all()
-    return list(rows)
+    q = await db.execute(select_columns(MarketTick).where(MarketTick.symbol == registry.canonical(symbol)).order_by(desc(MarketTick.ts)).limit(limit))
+    return rows_response(q)
+
+@router.get("/{symbol}/ticks/export")
+async def export_ticks(
+    symbol: str,
+    request: Request,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    format: str = Query("ndjson", description="ndjson or csv"),
+):
+    """
+    Full tick history for [start, end) streamed as NDJSON / CSV (gzip if accepted),
+    oldest first, read through a server-side cursor - no row limit.
+    """
+    return export_response(request, "ticks", {"symbol": symbol, "start": start, "end": end}, format)
+
+MAX_SPREAD_OFFSET = 120  # months
+
+
+def _values(a: np.ndarray) -> list:
+    return np.where(np.isnan(a), None, np.round(a, 6)).tolist()
+
+
+@router.get("/{symbol}/curve", response_class=ORJSONResponse)
+async def get_curve(
+    symbol: str,
+    asof: Optional[date] = Query(None, description="settlement day; default latest (or the last one before it)"),
+    compare: Optional[date] = Query(None, description="curve to diff against; default the previous settlement day"),
+    spreads: str = Query("1", description="comma-separated calendar spread offsets in months, e.g. 1,3,12"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Forward curve snapshot with day-over-day (or curve-to-curve) moves and calendar spreads.
+    Columnar: contracts[i], prices[i], change[i], spreads[k][i] all refer to the same contract;
+    spreads[k][i] = price(contract i) - price(contract i + k months).
+    """
+    sym = registry.canonical(symbol)
+    try:
+        offsets = sorted({int(x) for x in spreads.split(",") if x.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="spreads must be comma-separated integers")
+    if any(not 0 < k <= MAX_SPREAD_OFFSET for k in offsets):
+        raise HTTPException(status_code=400, detail=f"spread offsets must be between 1 and {MAX_SPREAD_OFFSET}")
+
+    day = await curves.curve_date(db, sym, asof)
+    if day is None:
+        raise HTTPException(status_code=404, detail="No forward curve for this symbol / date")
+    curve = await curves.load_curve(db, sym, day)
+    other_day = await curves.curve_date(db, sym, compare) if compare else await curves.curve_date(db, sym, day, before=True)
+    out = {
+        "symbol": sym,
+        "asof": day,
+        "compare_asof": other_day,
+        "contracts": curve.labels(),
+        "prices": _values(curve.prices),
+        "change": None,
+        "change_pct": None,
+        "spreads": {str(k): _values(v) for k, v in curves.calendar_spreads(curve, offsets).items()},
+    }
+    if other_day is not None:
+        diff = curves.curve_diff(curve, await curves.load_curve(db, sym, other_day))
+        out["change"] = _values(diff["change"])
+        out["change_pct"] = _values(diff["change_pct"])
+    return ORJSONResponse(out)
+
+
+@router.get("/{symbol}/curve/{contract}", response_class=ORJSONResponse)
+async def get_contract_history(
+    symbol: str,
+    contract: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Settlement history of one contract month (2027-01, 202701, NGF27, ...), columnar, oldest first."""
+    try:
+        month = parse_contract(contract)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    sym = registry.canonical(symbol)
+    days, prices = await curves.contract_history(db, sym, month, start, end)
+    if not days:
+        raise HTTPException(status_code=404, detail="No settlements for this contract")
+    return ORJSONResponse({
+        "symbol": sym,
+        "contract": month.strftime("%Y-%m"),
+        "asof": days,
+        "prices": _values(prices),
+        "change": [None] + _values(np.diff(prices)),
+    })
+
+
+@router.post("/curves/ingest")
+async def ingest_curve_file(
+    file: UploadFile = File(...),
+    symbol: str = "NG",
+    format: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current=Depends(get_current_user),
+):
+    """Upsert an end-of-day settlement file (CSV / NDJSON / JSON) into forward_curves."""
+    fmt = format or detect_format(file.filename)
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
+    fh = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return await ingest_settlements(db, fh, fmt, symbol)
+    except (ValueError, DataError) as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=f"bad row: {getattr(e, 'orig', None) or e}")
+    finally:
+        fh.detach()
 
 # helper to append simulated tick to DB (you might run this from a background worker)
 async def add_simulated_tick(symbol: str, price: float, db: AsyncSession):
-    tick = MarketTick(symbol=symbol.upper(), price=price, ts=datetime.utcnow())
+    tick = MarketTick(symbol=registry.canonical(symbol), price=price, ts=datetime.utcnow())
     db.add(tick)
     await db.commit()
     await db.refresh(tick)
@@ -59,7 +186,7 @@ async def add_simulated_tick(symbol: str, price: float, db: AsyncSession):
 # quick endpoint to generate a tick (demo only)
 @router.post("/{symbol}/tick")
 async def push_tick(symbol: str, price: float, db: AsyncSession = Depends(get_db)):
-    tick = MarketTick(symbol=symbol.upper(), price=price)
+    tick = MarketTick(symbol=registry.canonical(symbol), price=price)
     db.add(tick)
     await db.commit()
     await db.refresh(tick)
@@ -2,21 +2,29 @@
 import asyncio
 import hashlib
 import json
+import os
+import time
 from collections import deque
 from dataclasses import asdict, dataclass, field
 from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 
-import aiohttp
-import feedparser
-from bs4 import BeautifulSoup
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import Response
+
+from app import metrics, summarize
+from app.symbols import registry
+from app.tasks import background_task
+
+# aiohttp / feedparser / bs4 are only needed by the poller and are imported there,
+# which keeps importing the API (every worker, every test) fast
+if TYPE_CHECKING:
+    import aiohttp
 
 router = APIRouter()
 
 # --- CONFIG ---
-FETCH_INTERVAL_SECONDS = 25  # how often to poll RSS / sites
+FETCH_INTERVAL_SECONDS = float(os.getenv("NEWS_FETCH_INTERVAL_SECONDS", "25"))  # how often to poll RSS / sites
 MAX_ITEMS = 200
 RSS_SOURCES = [
     # RSS feeds useful for commodity/energy news (expand as needed)
@@ -31,6 +39,11 @@ DIRECT_SITES: List[str] = [
     # "https://some-site.com/latest-news"
     "https://www.livemint.com/market/commodities"
 ]
+# comma-separated overrides, e.g. to point the poller at benchmarks/fake_feeds.py
+if os.getenv("NEWS_RSS_SOURCES") is not None:
+    RSS_SOURCES = [u for u in os.getenv("NEWS_RSS_SOURCES").split(",") if u]
+if os.getenv("NEWS_DIRECT_SITES") is not None:
+    DIRECT_SITES = [u for u in os.getenv("NEWS_DIRECT_SITES").split(",") if u]
 
 # --- Helpers & state ---
 @dataclass
@@ -48,26 +61,141 @@ class NewsItem:
 # In-memory rolling buffer
 _items: deque = deque(maxlen=MAX_ITEMS)
 _seen_ids: set = set()
+# article text of items found by the current poll, handed to the summarizer (see app/summarize.py)
+_article_text: Dict[str, str] = {}
+
+# serialized forms, rebuilt only when _items changes (see _items_changed)
+_item_json: Dict[str, str] = {}  # item id -> json
+_items_version = 0
+_items_json_cache: Optional[tuple] = None  # (version, "[...]")
+# _items as of the last _items_changed(): what subscribers have been sent. The poll loop fills
+# _items before it publishes (with awaits in between), so init frames are built from this
+# snapshot, never from the live deque - a client connecting meanwhile would get those items twice.
+_published: List[NewsItem] = []
+
+
+def _serialize(item: NewsItem) -> str:
+    js = _item_json.get(item.id)
+    if js is None:
+        js = _item_json[item.id] = json.dumps(asdict(item), default=str)
+    return js
+
+
+def _items_changed():
+    global _items_version, _published
+    _items_version += 1
+    _published = list(_items)
+
+
+def _items_json() -> str:
+    """The whole buffer as a JSON array, serialized once per change to _items."""
+    global _items_json_cache
+    if _items_json_cache is None or _items_json_cache[0] != _items_version:
+        snapshot = _published
+        live = {i.id for i in snapshot}
+        for stale in [k for k in _item_json if k not in live]:
+            del _item_json[stale]
+        _items_json_cache = (_items_version, "[" + ",".join(_serialize(i) for i in snapshot) + "]")
+    return _items_json_cache[1]
+
+
+def _frame(msg_type: str, items_json: str) -> str:
+    return f'{{"type":"{msg_type}","items":{items_json}}}'
+
+
+def _csv_set(value) -> frozenset:
+    if not value:
+        return frozenset()
+    parts = value.split(",") if isinstance(value, str) else value
+    return frozenset(p.strip().lower() for p in parts if p and p.strip())
+
+
+@dataclass(frozen=True)
+class NewsFilter:
+    """Server-side subscription filter; empty dimensions match everything."""
+    tickers: frozenset = frozenset()  # canonical symbols (app/symbols.py)
+    sources: frozenset = frozenset()  # lower-case
+    sentiments: frozenset = frozenset()
+
+    @classmethod
+    def parse(cls, tickers=None, sources=None, sentiment=None) -> "NewsFilter":
+        return cls(frozenset(registry.canonical(t) for t in _csv_set(tickers)), _csv_set(sources), _csv_set(sentiment))
+
+    @property
+    def empty(self) -> bool:
+        return not (self.tickers or self.sources or self.sentiments)
+
+    def matches(self, item: NewsItem) -> bool:
+        if self.tickers and not any(t.upper() in self.tickers for t in item.tickers):
+            return False
+        if self.sources and (item.source or "").lower() not in self.sources:
+            return False
+        if self.sentiments and (item.sentiment or "") not in self.sentiments:
+            return False
+        return True
+
 
 # WebSocket connection manager for /ws/news
 class ConnectionManager:
+    """
+    Sockets are indexed by their filter so a batch is only routed to matching clients:
+    unfiltered sockets share one pre-built frame, ticker-filtered ones are looked up per
+    item ticker, and only sockets filtering on source/sentiment alone are scanned.
+    """
+
     def __init__(self):
         self.active: List[WebSocket] = []
+        self._filters: Dict[WebSocket, NewsFilter] = {}
+        self._unfiltered: set = set()
+        self._by_ticker: Dict[str, set] = {}
+        self._scan: set = set()
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket, flt: Optional[NewsFilter] = None):
         await websocket.accept()
         self.active.append(websocket)
+        self.set_filter(websocket, flt or NewsFilter())
+
+    def set_filter(self, websocket: WebSocket, flt: NewsFilter):
+        self._unindex(websocket)
+        self._filters[websocket] = flt
+        if flt.empty:
+            self._unfiltered.add(websocket)
+        elif flt.tickers:
+            for t in flt.tickers:
+                self._by_ticker.setdefault(t, set()).add(websocket)
+        else:
+            self._scan.add(websocket)
+
+    def _unindex(self, websocket: WebSocket):
+        old = self._filters.pop(websocket, None)
+        if old is None:
+            return
+        self._unfiltered.discard(websocket)
+        self._scan.discard(websocket)
+        for t in old.tickers:
+            conns = self._by_ticker.get(t)
+            if conns is not None:
+                conns.discard(websocket)
+                if not conns:
+                    del self._by_ticker[t]
 
     def disconnect(self, websocket: WebSocket):
+        self._unindex(websocket)
         try:
             self.active.remove(websocket)
         except ValueError:
             pass
 
-    async def broadcast(self, message: Dict):
+    def init_frame(self, websocket: WebSocket) -> str:
+        flt = self._filters.get(websocket)
+        if flt is None or flt.empty:
+            return _frame("init", _items_json())
+        _items_json()  # make sure per-item json is current
+        return _frame("init", "[" + ",".join(_serialize(i) for i in _published if flt.matches(i)) + "]")
+
+    async def _send(self, sends: List[tuple]):
         dead: List[WebSocket] = []
-        data = json.dumps(message, default=str)
-        for ws in list(self.active):
+        for ws, data in sends:
             try:
                 await ws.send_text(data)
             except Exception:
@@ -76,14 +204,82 @@ class ConnectionManager:
         for d in dead:
             self.disconnect(d)
 
+    async def publish(self, items: List[NewsItem], msg_type: str = "batch"):
+        """Send `items` to every socket whose filter matches; each item is serialized once."""
+        if not items or not self.active:
+            return
+        parts = [_serialize(i) for i in items]
+        sends: List[tuple] = []
+        if self._unfiltered:
+            shared = _frame(msg_type, "[" + ",".join(parts) + "]")
+            sends.extend((ws, shared) for ws in self._unfiltered)
+
+        matched: Dict[WebSocket, List[int]] = {}
+        for idx, item in enumerate(items):
+            cands = set(self._scan)
+            for t in item.tickers:
+                cands |= self._by_ticker.get(t.upper(), set())
+            for ws in cands:
+                if self._filters[ws].matches(item):
+                    matched.setdefault(ws, []).append(idx)
+        built: Dict[tuple, str] = {}
+        for ws, idxs in matched.items():
+            key = tuple(idxs)
+            if key not in built:
+                built[key] = _frame(msg_type, "[" + ",".join(parts[i] for i in idxs) + "]")
+            sends.append((ws, built[key]))
+        await self._send(sends)
+
+    async def broadcast(self, message: Dict):
+        data = json.dumps(message, default=str)
+        await self._send([(ws, data) for ws in list(self.active)])
+
 news_ws_manager = ConnectionManager()
 
+news_poll_seconds = metrics.histogram(
+    "oriza_news_poll_seconds", "Fetch + parse time per news source", ("source",), buckets=metrics.SLOW_BUCKETS)
+news_new_items = metrics.counter("oriza_news_new_items_total", "New (unseen) items per news source", ("source",))
+metrics.gauge("oriza_news_items", "Items in the rolling news buffer", fn=lambda: {(): len(_items)})
+metrics.gauge("oriza_news_seen_ids", "Item ids remembered for dedupe", fn=lambda: {(): len(_seen_ids)})
+metrics.gauge("oriza_ws_news_connections", "Open /ws/news connections", fn=lambda: {(): len(news_ws_manager.active)})
+
+
+# --- Summaries (off the ingest path, see app/summarize.py) ---
+async def _apply_summaries(results: summarize.Results):
+    """Put finished summaries on the items still in the buffer and push them as an 'update'."""
+    by_id = {item_id: summary for ids, summary in results for item_id in ids}
+    updated = []
+    for item in _items:
+        summary = by_id.get(item.id)
+        if summary is not None and summary != item.summary:
+            item.summary = summary
+            _item_json.pop(item.id, None)
+            updated.append(item)
+    if updated:
+        _items_changed()
+        await news_ws_manager.publish(updated, msg_type="update")
+
+
+_summarizer = summarize.Summarizer(on_ready=_apply_summaries)
+metrics.gauge("oriza_summary_queue", "Articles waiting for a summary batch", fn=lambda: {(): _summarizer.queued})
+
+
+@background_task("summaries")
+async def _summarize_loop(stop: asyncio.Event):
+    await _summarizer.run(stop)
+
+
+def _summarize_new(item: NewsItem):
+    text = _article_text.pop(item.id, None)
+    if text:
+        cached = _summarizer.submit(item.id, text)
+        if cached is not None:
+            item.summary = cached
+
 # --- Simple utilities ---
 POS_WORDS = {"gain", "rise", "surge", "higher", "up", "beat", "outperform", "strong", "tighten"}
 NEG_WORDS = {"fall", "drop", "decline", "slip", "lower", "down", "miss", "weaker", "loose", "draw"}
 
-TICKER_CANDIDATES = ["NG", "WTI", "Brent", "JKM", "TTF", "Gold", "Silver", "Copper"]
-
 
 def _mk_id(url: Optional[str], title: str) -> str:
     base = (url or "") + "|" + (title or "")
@@ -107,28 +303,29 @@ def _heuristic_sentiment(text: str) -> str:
     return "neutral"
 
 
+def _clip(text: str, max_chars: int = 300) -> str:
+    return (text[:max_chars] + "...") if len(text) > max_chars else text
+
+
 def _extract_summary_from_html(html: str, max_chars: int = 300) -> str:
     if not html:
         return ""
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html, "lxml")
     # take the first few <p> elements that have text
     paragraphs = [p.get_text(" ", strip=True) for p in soup.find_all("p") if p.get_text(strip=True)]
     if not paragraphs:
-        text = soup.get_text(" ", strip=True)
-        return (text[:max_chars] + "...") if len(text) > max_chars else text
-    text = " ".join(paragraphs[:3])
-    return (text[:max_chars] + "...") if len(text) > max_chars else text
+        return _clip(soup.get_text(" ", strip=True), max_chars)
+    return _clip(" ".join(paragraphs[:3]), max_chars)
 
 
 def _extract_tickers(title: str) -> List[str]:
-    found = []
-    for cand in TICKER_CANDIDATES:
-        if cand.lower() in (title or "").lower():
-            found.append(cand)
-    return found
+    # symbols, aliases, names and hubs from the symbol registry ("natural gas" -> NG)
+    return registry.tickers_in(title)
 
 
-async def _fetch_html(session: aiohttp.ClientSession, url: str, timeout: int = 12) -> Optional[str]:
+async def _fetch_html(session: "aiohttp.ClientSession", url: str, timeout: int = 12) -> Optional[str]:
     try:
         async with session.get(url, timeout=timeout, headers={"User-Agent": "Oriza-NewsBot/1.0"}) as resp:
             if resp.status != 200:
@@ -138,7 +335,7 @@ async def _fetch_html(session: aiohttp.ClientSession, url: str, timeout: int = 1
         return None
 
 
-async def _process_rss_feed(session: aiohttp.ClientSession, feed_url: str) -> List[NewsItem]:
+async def _process_rss_feed(session: "aiohttp.ClientSession", feed_url: str) -> List[NewsItem]:
     results: List[NewsItem] = []
     try:
         # feedparser supports passing data string; fetch raw text first to avoid blocking sync download
@@ -149,6 +346,8 @@ async def _process_rss_feed(session: aiohttp.ClientSession, feed_url: str) -> Li
     except Exception:
         return []
 
+    import feedparser
+
     parsed = feedparser.parse(raw)
     for entry in parsed.entries[:40]:
         title = entry.get("title", "") or ""
@@ -160,15 +359,17 @@ async def _process_rss_feed(session: aiohttp.ClientSession, feed_url: str) -> Li
             dt = datetime.now(timezone.utc)
         # summary field may contain HTML; if it's short use it
         summary_html = entry.get("summary", "") or entry.get("description", "") or ""
-        summary = _extract_summary_from_html(summary_html)
         nid = _mk_id(link, title)
         if nid in _seen_ids:
             continue
+        text = _extract_summary_from_html(summary_html, summarize.MAX_INPUT_CHARS)
         # if no summary, attempt to fetch article HTML and extract summary
-        if not summary and link:
+        if not text and link:
             html = await _fetch_html(session, link)
             if html:
-                summary = _extract_summary_from_html(html)
+                text = _extract_summary_from_html(html, summarize.MAX_INPUT_CHARS)
+        summary = _clip(text)
+        _article_text[nid] = text
         item = NewsItem(
             id=nid,
             headline=title,
@@ -188,7 +389,7 @@ async def _process_rss_feed(session: aiohttp.ClientSession, feed_url: str) -> Li
 
 from urllib.parse import urljoin
 
-async def _process_direct_site(session: aiohttp.ClientSession, url: str) -> List[NewsItem]:
+async def _process_direct_site(session: "aiohttp.ClientSession", url: str) -> List[NewsItem]:
     """
     Async site-specific scraper for DIRECT_SITES.
     - attempts to find <h2 class="headline"> elements (LiveMint style) and extract title + link
@@ -199,6 +400,8 @@ async def _process_direct_site(session: aiohttp.ClientSession, url: str) -> List
         html = await _fetch_html(session, url)
         if not html:
             return []
+        from bs4 import BeautifulSoup
+
         soup = BeautifulSoup(html, "lxml")
     except Exception:
         return []
@@ -242,7 +445,9 @@ async def _process_direct_site(session: aiohttp.ClientSession, url: str) -> List
 
             # try to fetch article page for summary (best-effort)
             article_html = await _fetch_html(session, link)
-            summary = _extract_summary_from_html(article_html or "")
+            text = _extract_summary_from_html(article_html or "", summarize.MAX_INPUT_CHARS)
+            summary = _clip(text)
+            _article_text[nid] = text
 
             # fallback short summary from the headline itself
             if not summary:
@@ -270,47 +475,60 @@ async def _process_direct_site(session: aiohttp.ClientSession, url: str) -> List
 
 
 
-# --- Core periodic job ---
+# --- Core periodic job (started by the task supervisor, see app/tasks.py) ---
+@background_task("news")
 async def _fetch_and_publish_loop(shutdown_event: asyncio.Event):
     """
     Periodically poll feeds and direct sites. New items are prepended to _items deque.
     Broadcasts a {type: 'batch', items: [...] } message to websocket clients when new items are found.
     """
+    import aiohttp
+
     async with aiohttp.ClientSession() as session:
         while not shutdown_event.is_set():
             new_items: List[NewsItem] = []
             # fetch RSS feeds
             for feed in RSS_SOURCES:
+                t0 = time.perf_counter()
                 try:
                     entries = await _process_rss_feed(session, feed)
+                    news_poll_seconds.observe(time.perf_counter() - t0, feed)
                     for e in entries:
                         if e.id in _seen_ids:
                             continue
                         _seen_ids.add(e.id)
+                        _summarize_new(e)
                         _items.appendleft(e)
                         new_items.append(e)
+                        news_new_items.inc(feed)
                 except Exception:
                     # per-feed errors should not break the loop
                     continue
 
             # direct sites (optional)
             for site in DIRECT_SITES:
+                t0 = time.perf_counter()
                 try:
                     entries = await _process_direct_site(session, site)
+                    news_poll_seconds.observe(time.perf_counter() - t0, site)
                     for e in entries:
                         if e.id in _seen_ids:
                             continue
                         _seen_ids.add(e.id)
+                        _summarize_new(e)
                         _items.appendleft(e)
                         new_items.append(e)
+                        news_new_items.inc(site)
                 except Exception:
                     continue
 
-            # If we have new items, broadcast them
+            _article_text.clear()  # duplicates within this poll
+
+            # If we have new items, route them to the matching subscribers
             if new_items:
                 # trim to MAX_ITEMS (deque handles it)
-                payload = {"type": "batch", "items": [asdict(i) for i in new_items]}
-                await news_ws_manager.broadcast(payload)
+                _items_changed()
+                await news_ws_manager.publish(new_items)
 
             # sleep but wake earlier if shutdown requested
             try:
@@ -319,63 +537,51 @@ async def _fetch_and_publish_loop(shutdown_event: asyncio.Event):
                 continue
 
 
-# Background task handle
-_fetch_task: Optional[asyncio.Task] = None
-_shutdown_event: Optional[asyncio.Event] = None
-
-
-# --- FastAPI lifecycle hooks to start/stop the periodic fetcher ---
-@router.on_event("startup")
-async def startup_news_loop():
-    global _fetch_task, _shutdown_event
-    if _fetch_task is not None and not _fetch_task.done():
-        return
-    _shutdown_event = asyncio.Event()
-    _fetch_task = asyncio.create_task(_fetch_and_publish_loop(_shutdown_event))
-
-
-@router.on_event("shutdown")
-async def shutdown_news_loop():
-    global _fetch_task, _shutdown_event
-    if _shutdown_event:
-        _shutdown_event.set()
-    if _fetch_task:
-        try:
-            await _fetch_task
-        except asyncio.CancelledError:
-            pass
-        _fetch_task = None
-        _shutdown_event = None
-
-
 # --- HTTP & WS endpoints ---
 @router.get("/news")
 async def get_news():
     """
     Returns the current rolling buffer of news items.
     """
-    return JSONResponse([asdict(i) for i in list(_items)])
+    return Response(content=_items_json(), media_type="application/json")
 
 
 @router.websocket("/ws/news")
-async def ws_news(websocket: WebSocket):
+async def ws_news(
+    websocket: WebSocket,
+    tickers: Optional[str] = Query(None, description="comma-separated, e.g. NG,WTI"),
+    sources: Optional[str] = Query(None, description="comma-separated source names"),
+    sentiment: Optional[str] = Query(None, description="comma-separated: positive,neutral,negative"),
+):
     """
     WebSocket endpoint for NewsPanel.
-    - On connect: sends {"type":"init","items":[...]}
-    - Afterwards: server sends {"type":"batch","items":[...]} for new items
+    - On connect: sends {"type":"init","items":[...]} (only items matching the filter, if any)
+    - Afterwards: server sends {"type":"batch","items":[...]} for new matching items,
+      and {"type":"update","items":[...]} when their summaries are ready
+    - Client may send {"type":"subscribe","tickers":[...],"sources":[...],"sentiment":[...]}
+      to change its filter; a fresh init follows.
     """
-    await news_ws_manager.connect(websocket)
+    await news_ws_manager.connect(websocket, NewsFilter.parse(tickers, sources, sentiment))
     try:
-        # send init snapshot
-        snapshot = list(_items)
-        await websocket.send_text(json.dumps({"type": "init", "items": [asdict(i) for i in snapshot]}, default=str))
-        # keep the socket open; clients do not need to send messages
+        # send init snapshot (shared, pre-serialized string for unfiltered clients)
+        await websocket.send_text(news_ws_manager.init_frame(websocket))
+        # keep the socket open; clients only send pings / subscription changes
         while True:
             try:
                 msg = await websocket.receive_text()
                 # support simple ping/pong from client
                 if msg.lower() in ("ping", "keepalive"):
                     await websocket.send_text(json.dumps({"type": "pong"}))
+                    continue
+                cmd = json.loads(msg)
+                if not isinstance(cmd, dict):
+                    continue
+                if cmd.get("type") == "ping":
+                    await websocket.send_text(json.dumps({"type": "pong"}))
+                elif cmd.get("type") == "subscribe":
+                    flt = NewsFilter.parse(cmd.get("tickers"), cmd.get("sources"), cmd.get("sentiment"))
+                    news_ws_manager.set_filter(websocket, flt)
+                    await websocket.send_text(news_ws_manager.init_frame(websocket))
             except WebSocketDisconnect:
                 break
             except Exception:
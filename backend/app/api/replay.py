@@ -0,0 +1,41 @@
+# file: app/api/replay.py
+from fastapi import APIRouter, Depends, HTTPException
+from app.deps import get_current_user
+from app.schemas.schemas import ReplayRequest
+from app import replay
+
+router = APIRouter()
+
+@router.post("/")
+async def start_replay(cmd: ReplayRequest, current=Depends(get_current_user)):
+    """
+    Replay stored ticks for `symbols` in [start, end) through the live /ws/market stream.
+    speed: 1-1000x real time, 0 = as fast as possible (load test).
+    """
+    try:
+        r = replay.start_replay(cmd.symbols, cmd.start, cmd.end, cmd.speed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return r.as_dict()
+
+@router.get("/")
+async def list_replays(current=Depends(get_current_user)):
+    return [r.as_dict() for r in replay.list_replays()]
+
+@router.get("/{rid}")
+async def get_replay(rid: str, current=Depends(get_current_user)):
+    """Progress and achieved throughput (ticks/s, lag behind schedule, reader stalls)."""
+    r = replay.get_replay(rid)
+    if r is None:
+        raise HTTPException(status_code=404, detail="Replay not found")
+    return r.as_dict()
+
+@router.delete("/{rid}")
+async def stop_replay(rid: str, current=Depends(get_current_user)):
+    r = replay.get_replay(rid)
+    if r is None:
+        raise HTTPException(status_code=404, detail="Replay not found")
+    r.stop()
+    return {"ok": True}
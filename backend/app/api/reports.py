@@ -1,33 +1,42 @@
 # file: app/api/reports.py
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.deps import get_db, get_current_user
+from app.jobs import enqueue
+from app.object_store import is_local, path_from_url
+from app.report_engine import TEMPLATES, WRITERS
 from app.models import Report
-from app.schemas.schemas import ReportRequest
-import uuid, asyncio
+from app.schemas.schemas import ReportRequest, ReportResponse
+import uuid
 
 router = APIRouter()
 
-@router.post("/generate")
-async def generate_report(req: ReportRequest, background: BackgroundTasks, db: AsyncSession = Depends(get_db), current=Depends(get_current_user)):
+@router.post("/generate", response_model=ReportResponse)
+async def generate_report(req: ReportRequest, db: AsyncSession = Depends(get_db), current=Depends(get_current_user)):
+    if req.template not in TEMPLATES:
+        raise HTTPException(status_code=400, detail=f"unknown template, expected one of {', '.join(TEMPLATES)}")
+    if req.format not in WRITERS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(WRITERS)} for {req.template}")
+    try:
+        TEMPLATES[req.template](req.params or {})  # builds the query only: bad params fail here, not in the worker
+    except (AttributeError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"invalid params: {e}")
     rid = str(uuid.uuid4())
-    rep = Report(id=rid, owner_id=current.id, template=req.template, workspace_id=req.workspace_id, format=req.format, status="pending")
+    rep = Report(id=rid, owner_id=current.id, template=req.template, workspace_id=req.workspace_id, format=req.format, params=req.params, status="pending")
     db.add(rep)
+    # rendered by app.worker (see app/report_engine.py); committed together with the report row
+    enqueue(db, "report.generate", {"report_id": rid})
     await db.commit()
-    await db.refresh(rep)
-
-    # enqueue background task: we'll simulate saving S3 URL after some async work
-    async def _generate_and_mark(report_id: str):
-        await asyncio.sleep(2)  # simulate long work / call to report engine
-        # mark report ready
-        r = await db.get(Report, report_id)
-        if r:
-            r.status = "ready"
-            r.s3_url = f"https://example-bucket.s3.local/{report_id}.{r.format}"
-            await db.commit()
-    background.add_task(asyncio.create_task, _generate_and_mark(rid))
     return {"report_id": rid, "status": "pending"}
 
+@router.get("/{report_id}", response_model=ReportResponse)
+async def get_report_status(report_id: str, db: AsyncSession = Depends(get_db), current=Depends(get_current_user)):
+    r = await db.get(Report, report_id)
+    if not r or r.owner_id != current.id:
+        raise HTTPException(status_code=404, detail="report not found")
+    return {"report_id": r.id, "status": r.status}
+
 @router.get("/download/{report_id}")
 async def download_report(report_id: str, db: AsyncSession = Depends(get_db), current=Depends(get_current_user)):
     r = await db.get(Report, report_id)
@@ -35,4 +44,15 @@ async def download_report(report_id: str, db: AsyncSession = Depends(get_db), cu
         raise HTTPException(status_code=404, detail="report not found")
     if r.status != "ready":
         raise HTTPException(status_code=400, detail="not ready")
-    return {"s3_url": r.s3_url}
+    if not r.s3_url:
+        raise HTTPException(status_code=410, detail="report file is no longer available")
+    if not is_local(r.s3_url):
+        # remote object: hand out the url
+        return {"s3_url": r.s3_url}
+    path = path_from_url(r.s3_url)
+    if path is None:
+        raise HTTPException(status_code=410, detail="report file is no longer available")
+    # streamed from disk; FileResponse honours Range requests for resumable downloads
+    writer = WRITERS.get(r.format)
+    media_type = writer.media_type if writer else "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=f"{r.template}-{r.id}.{r.format}")
@@ -1,40 +1,100 @@
 # file: app/api/supply.py
-from fastapi import APIRouter, Depends
-from datetime import datetime, timedelta
-from app.schemas.schemas import StorageLevel
-import random
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
+from fastapi.responses import ORJSONResponse
+from typing import Optional
+import io
+from datetime import date, datetime
 # file: app/api/supply.py
-from sqlalchemy import select, desc
+from sqlalchemy import desc
+from sqlalchemy.exc import DataError
 from sqlalchemy.ext.asyncio import AsyncSession
+from app import scenarios
+from app.api.weather import MAX_HORIZON
 from app.models import StorageLevel
-from app.deps import get_db
+from app.deps import get_db, get_current_user
+from app.exports import export_response
+from app.responses import rows_response, select_columns
+from app.bulk_ingest import FORMATS, detect_format
+from app.storage_ingest import ingest_storage
+from app.symbols import registry
 
 
 router = APIRouter()
 
-# demo storage dataset (weekly)
-_storage_demo = {}
-def _seed_storage(symbol="NG", region="US"):
-    now = datetime.utcnow()
-    rows = []
-    base = 3000.0
-    for w in range(0, 52):
-        ts = now - timedelta(weeks=52-w)
-        level = base * (1 + random.uniform(-0.2, 0.2))
-        rows.append(StorageLevel(symbol=symbol, region=region, ts=ts, level=round(level,2), avg_5y=base))
-    _storage_demo[f"{symbol}-{region}"] = rows
 
-_seed_storage()
-
-
-
-@router.get("/{symbol}/storage")
+@router.get("/{symbol}/storage", response_class=ORJSONResponse)
 async def get_storage(symbol: str, region: str = "US", db: AsyncSession = Depends(get_db)):
     q = await db.execute(
-        select(StorageLevel)
-        .where(StorageLevel.symbol == symbol.upper(), StorageLevel.region == region.upper())
+        select_columns(StorageLevel)
+        .where(StorageLevel.symbol == registry.canonical(symbol), StorageLevel.region == region.upper())
         .order_by(desc(StorageLevel.ts))
         .limit(500)
     )
-    rows = q.scalars().all()
-    return list(rows)
+    return rows_response(q)
+
+
+@router.get("/{symbol}/storage/scenarios", response_class=ORJSONResponse)
+async def storage_scenarios(
+    symbol: str,
+    region: str = "US",
+    n: int = Query(10_000, ge=100, le=scenarios.SCENARIO_MAX),
+    end: Optional[date] = Query(None, description="defaults to the end of the current injection / withdrawal season"),
+    temp_sd: float = Query(scenarios.TEMP_SD_C, ge=0, le=10, description="daily temperature anomaly sd, C"),
+    seed: int = 0,
+    forecast_days: int = Query(scenarios.FORECAST_DAYS, ge=0, le=MAX_HORIZON),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Distribution of storage at `end` across `n` weather scenarios, from a regression of
+    weekly storage change on population-weighted HDD / CDD (see app/scenarios.py).
+    """
+    try:
+        result = await scenarios.run_scenarios(
+            db, registry.canonical(symbol), region.upper(), n, end, temp_sd, seed, forecast_days
+        )
+    except scenarios.ScenariosBusy as e:
+        raise HTTPException(status_code=503, detail=str(e),
+                            headers={"Retry-After": str(scenarios.SCENARIO_RETRY_AFTER_SECONDS)})
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ORJSONResponse(result)
+
+
+@router.get("/{symbol}/storage/export")
+async def export_storage(
+    symbol: str,
+    request: Request,
+    region: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    format: str = Query("ndjson", description="ndjson or csv"),
+):
+    """Storage history (all regions unless `region` is given) streamed as NDJSON / CSV."""
+    return export_response(request, "storage", {"symbol": symbol, "region": region, "start": start, "end": end}, format)
+
+
+@router.post("/storage/ingest")
+async def ingest_storage_file(
+    file: UploadFile = File(...),
+    symbol: str = "NG",
+    format: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current=Depends(get_current_user),
+):
+    """
+    Upsert a storage history file (CSV / NDJSON / JSON) into storage_levels.
+    The upload is read in chunks; avg_5y is refreshed for the affected weeks only.
+    """
+    fmt = format or detect_format(file.filename)
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
+    fh = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return await ingest_storage(db, fh, fmt, symbol)
+    except (ValueError, DataError) as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=f"bad row: {getattr(e, 'orig', None) or e}")
+    finally:
+        fh.detach()
@@ -1,22 +1,207 @@
 # file: app/api/weather.py
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query
 from datetime import datetime, timedelta
-from app.schemas.schemas import ForecastResponse, ForecastPoint
-import random
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import re
+import threading
+from app.schemas.schemas import (
+    DegreeDayAggregate,
+    ForecastPoint,
+    ForecastResponse,
+    MultiForecastResponse,
+    RegionForecast,
+)
+import numpy as np
 
 router = APIRouter()
 
+MAX_HORIZON = 30
+MAX_REGIONS = 200
+MODELS = ("demo-model",)
+FORECAST_CACHE_MAX = 2000  # region grids cached per run (LRU); an evicted one is redrawn identically
+RUN_INTERVAL_HOURS = 6  # models publish a new run every 6h (00/06/12/18z)
+BASE_TEMP_C = 18.0
+
+# demo population weights (millions, ~2023 census divisions) for aggregate HDD/CDD;
+# regions not listed weigh DEFAULT_POPULATION
+REGION_POPULATION: Dict[str, float] = {
+    "NEW_ENGLAND": 15.1,
+    "MID_ATLANTIC": 42.5,
+    "EAST_NORTH_CENTRAL": 47.4,
+    "WEST_NORTH_CENTRAL": 21.6,
+    "SOUTH_ATLANTIC": 67.5,
+    "EAST_SOUTH_CENTRAL": 19.6,
+    "WEST_SOUTH_CENTRAL": 42.3,
+    "MOUNTAIN": 25.5,
+    "PACIFIC": 53.9,
+}
+DEFAULT_POPULATION = 1.0
+
+# demo climate normals per region: (annual mean, half the seasonal range) of daily mean
+# temperature in C, coldest around COLDEST_DAY_OF_YEAR; regions not listed use DEFAULT_CLIMATE
+REGION_CLIMATE: Dict[str, Tuple[float, float]] = {
+    "NEW_ENGLAND": (8.5, 12.5),
+    "MID_ATLANTIC": (11.0, 12.0),
+    "EAST_NORTH_CENTRAL": (9.5, 14.0),
+    "WEST_NORTH_CENTRAL": (9.0, 15.0),
+    "SOUTH_ATLANTIC": (17.5, 8.5),
+    "EAST_SOUTH_CENTRAL": (15.5, 10.0),
+    "WEST_SOUTH_CENTRAL": (18.5, 9.5),
+    "MOUNTAIN": (10.5, 12.0),
+    "PACIFIC": (15.0, 5.5),
+}
+DEFAULT_CLIMATE = (12.0, 10.0)
+COLDEST_DAY_OF_YEAR = 20
+
+# (region, model, run) -> array[2, MAX_HORIZON] of (temp_min, temp_max); reused until the next run.
+# Draws are seeded from the key, so a region gets the same forecast for the whole run in every
+# process, cached or not. Sync endpoints call forecast_grid from the threadpool, so every access
+# holds _forecast_lock.
+_forecast_cache: "OrderedDict[Tuple[str, str, datetime], np.ndarray]" = OrderedDict()
+_forecast_lock = threading.Lock()
+_REGION_RE = re.compile(r"^[A-Z0-9_\-]{1,40}$")
+
+
+def _current_run(now: Optional[datetime] = None) -> datetime:
+    now = now or datetime.utcnow()
+    return now.replace(hour=now.hour - now.hour % RUN_INTERVAL_HOURS, minute=0, second=0, microsecond=0)
+
+
+def _evict_stale(run: datetime):
+    # caller holds _forecast_lock
+    for key in [k for k in _forecast_cache if k[2] != run]:
+        del _forecast_cache[key]
+
+
+def _draw(region: str, model: str, run: datetime) -> np.ndarray:
+    # demo synthetic forecast, deterministic per (region, model, run)
+    seed = hashlib.sha256(f"{region}|{model}|{run.isoformat()}".encode()).digest()
+    rng = np.random.default_rng(int.from_bytes(seed[:8], "little"))
+    tmin = rng.uniform(0, 15, size=MAX_HORIZON)
+    return np.stack((tmin, tmin + rng.uniform(5, 20, size=MAX_HORIZON)))
+
+
+def region_codes(regions: str) -> List[str]:
+    """Comma-separated region codes -> unique upper-case codes; ValueError on a malformed one."""
+    names = list(dict.fromkeys(r.strip().upper() for r in regions.split(",") if r.strip()))
+    bad = [n for n in names if not _REGION_RE.match(n)]
+    if bad:
+        raise ValueError(f"invalid region code: {bad[0][:40]}")
+    return names
+
+
+def forecast_grid(regions: List[str], horizon: int, model: str = "demo-model") -> Tuple[datetime, np.ndarray, np.ndarray]:
+    """
+    Temperatures for every region x day of the current model run.
+    Returns (run, temp_min, temp_max) with arrays of shape (len(regions), horizon).
+    Only regions missing from the cache are generated.
+    """
+    if model not in MODELS:
+        raise ValueError(f"unknown model: {model}")
+    run = _current_run()
+    keys = [r.upper() for r in regions]
+    found = {}
+    with _forecast_lock:
+        for k in dict.fromkeys(keys):
+            cached = _forecast_cache.get((k, model, run))
+            if cached is not None:
+                _forecast_cache.move_to_end((k, model, run))
+                found[k] = cached
+    missing = [k for k in dict.fromkeys(keys) if k not in found]
+    if missing:
+        drawn = {k: _draw(k, model, run) for k in missing}
+        with _forecast_lock:
+            _evict_stale(run)
+            for k, grid in drawn.items():
+                _forecast_cache[(k, model, run)] = grid
+                found[k] = grid
+            while len(_forecast_cache) > FORECAST_CACHE_MAX:
+                _forecast_cache.popitem(last=False)
+    grid = np.stack([found[k][:, :horizon] for k in keys])
+    return run, grid[:, 0, :], grid[:, 1, :]
+
+
+def normal_temps(regions: List[str], days: np.ndarray) -> np.ndarray:
+    """Climatological daily mean temperature, shape (len(regions), len(days)) for datetime64[D] `days`."""
+    clim = np.array([REGION_CLIMATE.get(r.upper(), DEFAULT_CLIMATE) for r in regions], dtype=float)
+    doy = (days - days.astype("datetime64[Y]")).astype(np.int64)
+    season = np.cos(2 * np.pi * (doy - COLDEST_DAY_OF_YEAR) / 365.25)
+    return clim[:, :1] - clim[:, 1:] * season
+
+
+def degree_days(tmin: np.ndarray, tmax: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    mean = (tmin + tmax) / 2
+    return np.maximum(0.0, BASE_TEMP_C - mean), np.maximum(0.0, mean - BASE_TEMP_C)
+
+
+def population_weights(regions: List[str]) -> np.ndarray:
+    w = np.array([REGION_POPULATION.get(r.upper(), DEFAULT_POPULATION) for r in regions], dtype=float)
+    return w / w.sum()
+
+
 @router.get("/region/{region}/forecast", response_model=ForecastResponse)
-def get_forecast(region: str, horizon: int = Query(7, ge=1, le=30), model: str = "demo-model"):
-    # demo synthetic forecast
-    now = datetime.utcnow()
-    series = []
-    for d in range(horizon):
-        day = now + timedelta(days=d)
-        tmin = random.uniform(0, 15)
-        tmax = tmin + random.uniform(5, 20)
-        # simple HDD/CDD
-        hdd = max(0, 18 - ((tmin + tmax)/2))
-        cdd = max(0, ((tmin + tmax)/2) - 18)
-        series.append(ForecastPoint(date=day, temp_max=round(tmax,1), temp_min=round(tmin,1), hdd=round(hdd,2), cdd=round(cdd,2)))
+def get_forecast(region: str, horizon: int = Query(7, ge=1, le=MAX_HORIZON), model: str = "demo-model"):
+    if not _REGION_RE.match(region.strip().upper()):
+        raise HTTPException(status_code=400, detail="invalid region code")
+    if model not in MODELS:
+        raise HTTPException(status_code=400, detail=f"unknown model: {model}")
+    run, tmin, tmax = forecast_grid([region.strip()], horizon, model)
+    hdd, cdd = degree_days(tmin, tmax)
+    series = [
+        ForecastPoint(date=run + timedelta(days=d), temp_max=round(tx, 1), temp_min=round(tn, 1), hdd=round(h, 2), cdd=round(c, 2))
+        for d, (tx, tn, h, c) in enumerate(zip(tmax[0].tolist(), tmin[0].tolist(), hdd[0].tolist(), cdd[0].tolist()))
+    ]
     return ForecastResponse(region=region, model=model, horizon_days=horizon, series=series)
+
+
+@router.get("/forecast", response_model=MultiForecastResponse)
+def get_multi_forecast(
+    regions: str = Query(..., description="comma-separated region codes"),
+    horizon: int = Query(7, ge=1, le=MAX_HORIZON),
+    model: str = "demo-model",
+    aggregate: bool = True,
+):
+    """
+    Forecast + HDD/CDD for many regions in one call (columnar per region), plus the
+    population-weighted aggregate degree days across the requested set.
+    """
+    try:
+        names = region_codes(regions)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not names:
+        raise HTTPException(status_code=400, detail="regions is required")
+    if len(names) > MAX_REGIONS:
+        raise HTTPException(status_code=400, detail=f"at most {MAX_REGIONS} regions per request")
+    if model not in MODELS:
+        raise HTTPException(status_code=400, detail=f"unknown model: {model}")
+
+    run, tmin, tmax = forecast_grid(names, horizon, model)
+    hdd, cdd = degree_days(tmin, tmax)
+
+    tmax_r, tmin_r = np.round(tmax, 1).tolist(), np.round(tmin, 1).tolist()
+    hdd_r, cdd_r = np.round(hdd, 2).tolist(), np.round(cdd, 2).tolist()
+    out = [
+        RegionForecast(region=n, temp_max=tmax_r[i], temp_min=tmin_r[i], hdd=hdd_r[i], cdd=cdd_r[i])
+        for i, n in enumerate(names)
+    ]
+
+    agg = None
+    if aggregate:
+        w = population_weights(names)
+        agg = DegreeDayAggregate(
+            regions=names,
+            weights={n: round(float(x), 6) for n, x in zip(names, w)},
+            hdd=np.round(w @ hdd, 2).tolist(),
+            cdd=np.round(w @ cdd, 2).tolist(),
+        )
+    return MultiForecastResponse(
+        model=model,
+        run=run,
+        horizon_days=horizon,
+        dates=[run + timedelta(days=d) for d in range(horizon)],
+        regions=out,
+        aggregate=agg,
+    )
@@ -1,15 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
 from app.schemas.schemas import WorkspaceCreate, WorkspaceResponse
+import asyncio
+import gzip
+import json
+import logging
 import uuid
-from sqlalchemy import insert, select
+from dataclasses import asdict
+from sqlalchemy import desc, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.db import AsyncSessionLocal
 from app.deps import get_db, get_current_user
-from app.models import Workspace
-from app.schemas.schemas import WorkspaceCreate
+from app.models import MarketTick, StorageLevel, Workspace
+from app.responses import rows_response, select_columns
+from app.api import news_sources, weather
+from app.symbols import registry
 
 router = APIRouter()
+log = logging.getLogger("oriza.workspaces")
 
-_workspaces = {}
+# max DB sessions held by all snapshot requests in this process together (process-wide, not
+# per request: the engine pool is shared with everything else)
+SNAPSHOT_DB_SESSIONS_TOTAL = 4
+SNAPSHOT_GZIP_MIN_BYTES = 1024
+
+_snapshot_db_slots = asyncio.Semaphore(SNAPSHOT_DB_SESSIONS_TOTAL)
 
 @router.post("/")
 async def create_workspace(cmd: WorkspaceCreate, db: AsyncSession = Depends(get_db), current=Depends(get_current_user)):
@@ -20,16 +35,161 @@ async def create_workspace(cmd: WorkspaceCreate, db: AsyncSession = Depends(get_
     await db.refresh(ws)
     return ws
 
-@router.get("/")
+@router.get("/", response_class=ORJSONResponse)
 async def list_workspaces(db: AsyncSession = Depends(get_db), current=Depends(get_current_user)):
-    q = await db.execute(select(Workspace).where(Workspace.owner_id == current.id))
-    rows = q.scalars().all()
-    return rows
+    q = await db.execute(select_columns(Workspace).where(Workspace.owner_id == current.id))
+    return rows_response(q)
 
 
-@router.get("/{wid}", response_model=WorkspaceResponse)
-def get_workspace(wid: str, current=Depends(get_current_user)):
-    w = _workspaces.get(current["id"], {}).get(wid)
+async def _load_workspace(wid: str, owner_id: str, db: AsyncSession) -> Workspace:
+    q = await db.execute(select(Workspace).where(Workspace.id == wid, Workspace.owner_id == owner_id))
+    w = q.scalar_one_or_none()
     if not w:
         raise HTTPException(status_code=404, detail="Workspace not found")
     return w
+
+
+@router.get("/{wid}", response_model=WorkspaceResponse)
+async def get_workspace(wid: str, db: AsyncSession = Depends(get_db), current=Depends(get_current_user)):
+    return await _load_workspace(wid, current.id, db)
+
+
+# --- snapshot: resolve every widget's data in one round-trip ---
+# widget spec (entries of Workspace.widgets):
+#   {"type": "ticks",    "symbol": "NG", "limit": 100}
+#   {"type": "storage",  "symbol": "NG", "region": "US", "limit": 52}
+#   {"type": "forecast", "region": "PACIFIC", "horizon": 7, "model": "demo-model"}
+#   {"type": "news",     "tickers": ["NG"], "limit": 50}
+
+def _clamp(w: dict, name: str, default: int, hi: int) -> int:
+    v = w.get(name, default)
+    if isinstance(v, bool) or not isinstance(v, (int, float, str)):
+        raise ValueError(f"{name} must be an integer")
+    try:
+        n = int(v)
+    except (OverflowError, ValueError):
+        raise ValueError(f"{name} must be an integer") from None
+    return max(1, min(n, hi))
+
+
+def _str(w: dict, name: str, default: str = "") -> str:
+    v = w.get(name)
+    if v is None or v == "":
+        return default
+    if not isinstance(v, str):
+        raise ValueError(f"{name} must be a string")
+    return v
+
+
+def _widget_key(w) -> tuple:
+    """
+    Canonical data request for a widget; widgets with equal keys share one fetch.
+    Raises ValueError naming the problem for a malformed spec.
+    """
+    if not isinstance(w, dict):
+        raise ValueError("widget must be an object")
+    t = _str(w, "type").lower()
+    if t == "ticks":
+        return (t, registry.canonical(_str(w, "symbol")), _clamp(w, "limit", 100, 1000))
+    if t == "storage":
+        return (t, registry.canonical(_str(w, "symbol", "NG")), _str(w, "region", "US").upper(), _clamp(w, "limit", 500, 500))
+    if t == "forecast":
+        return (t, _str(w, "region").upper(), _clamp(w, "horizon", 7, weather.MAX_HORIZON), _str(w, "model", "demo-model"))
+    if t == "news":
+        tickers = w.get("tickers") or []
+        if not isinstance(tickers, list) or not all(isinstance(x, str) for x in tickers):
+            raise ValueError("tickers must be a list of symbols")
+        return (t, tuple(sorted({registry.canonical(x) for x in tickers})), _clamp(w, "limit", 50, news_sources.MAX_ITEMS))
+    raise ValueError(f"unsupported widget type: {t or '<missing>'}")
+
+
+def _ref(key: tuple) -> str:
+    return ":".join(",".join(p) if isinstance(p, tuple) else str(p) for p in key)
+
+
+async def _fetch_ticks(symbol: str, limit: int):
+    async with _snapshot_db_slots, AsyncSessionLocal() as db:
+        q = await db.execute(
+            select(MarketTick.symbol, MarketTick.price, MarketTick.ts)
+            .where(MarketTick.symbol == symbol).order_by(desc(MarketTick.ts)).limit(limit)
+        )
+        return [{"symbol": s, "price": p, "ts": ts.isoformat()} for s, p, ts in q.all()]
+
+
+async def _fetch_storage(symbol: str, region: str, limit: int):
+    async with _snapshot_db_slots, AsyncSessionLocal() as db:
+        q = await db.execute(
+            select(StorageLevel.symbol, StorageLevel.region, StorageLevel.ts, StorageLevel.level, StorageLevel.avg_5y)
+            .where(StorageLevel.symbol == symbol, StorageLevel.region == region)
+            .order_by(desc(StorageLevel.ts)).limit(limit)
+        )
+        return [{"symbol": s, "region": r, "ts": ts.isoformat(), "level": lv, "avg_5y": a} for s, r, ts, lv, a in q.all()]
+
+
+async def _resolve(key: tuple):
+    t = key[0]
+    if t == "ticks":
+        return await _fetch_ticks(key[1], key[2])
+    if t == "storage":
+        return await _fetch_storage(*key[1:])
+    if t == "forecast":
+        return weather.get_forecast(key[1], key[2], key[3]).model_dump(mode="json")
+    if t == "news":
+        tickers, limit = set(key[1]), key[2]
+        items = [i for i in list(news_sources._items) if not tickers or tickers & {x.upper() for x in i.tickers}]
+        return [asdict(i) for i in items[:limit]]
+    raise ValueError(f"unsupported widget type: {t or '<missing>'}")
+
+
+def _error(key: tuple, exc: Exception) -> str:
+    # validation problems are the caller's to fix; anything else (DB errors...) stays in the log
+    if isinstance(exc, HTTPException):
+        return str(exc.detail)
+    if isinstance(exc, ValueError):
+        return str(exc)
+    log.warning("snapshot widget %s failed: %r", _ref(key), exc)
+    return "failed to load widget data"
+
+
+def _encode(request: Request, payload: dict) -> Response:
+    body = json.dumps(payload, default=str, separators=(",", ":")).encode("utf-8")
+    headers = {"Vary": "Accept-Encoding"}
+    if len(body) >= SNAPSHOT_GZIP_MIN_BYTES and "gzip" in request.headers.get("accept-encoding", ""):
+        body = gzip.compress(body, compresslevel=5)
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/{wid}/snapshot")
+async def get_workspace_snapshot(wid: str, request: Request, db: AsyncSession = Depends(get_db), current=Depends(get_current_user)):
+    """
+    Workspace plus the data for every widget, fetched concurrently.
+    Identical data requests are fetched once: widgets reference entries of `data` by key.
+    """
+    w = await _load_workspace(wid, current.id, db)
+    widgets = list(w.widgets or [])
+
+    keys, errors = [], {}
+    for i, spec in enumerate(widgets):
+        try:
+            keys.append(_widget_key(spec))
+        except ValueError as e:  # this widget only; the rest of the snapshot still loads
+            keys.append(("invalid", i))
+            errors[_ref(keys[-1])] = str(e)
+    unique = [k for k in dict.fromkeys(keys) if k[0] != "invalid"]
+    results = await asyncio.gather(*(_resolve(k) for k in unique), return_exceptions=True)
+
+    data = {}
+    for k, res in zip(unique, results):
+        ref = _ref(k)
+        if isinstance(res, Exception):
+            errors[ref] = _error(k, res)
+        else:
+            data[ref] = res
+    payload = {
+        "workspace": {"id": w.id, "owner_id": w.owner_id, "name": w.name, "layout": w.layout or {}},
+        "widgets": [{**(spec if isinstance(spec, dict) else {}), "data_key": _ref(k)} for spec, k in zip(widgets, keys)],
+        "data": data,
+        "errors": errors,
+    }
+    return _encode(request, payload)
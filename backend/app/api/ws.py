@@ -1,74 +1,261 @@
 # file: app/api/ws.py
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import Dict, List
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
+from typing import Deque, Dict, List, Optional, Tuple, Union
+from collections import deque
 import asyncio
-from app.api.market_data import _tick_store
+import time
+import uuid
+from app import metrics, wire
+from app.api.market_data import _tick_store, seed_demo_data
+from app.correlation import daily_bars
 from app.schemas    .schemas import PriceTick
+from app.symbols import label_counts, metric_label, registry
+from app.tasks import background_task
 from datetime import datetime
 import random
-import json
 
 router = APIRouter()
 
+RING_SIZE = 1000  # ticks kept per symbol for resume / replay (matches _tick_store)
+SNAPSHOT_SIZE = 50
+STREAM_IDLE_SECONDS = 600  # streams without subscribers or ticks for this long are dropped
+
+
+class SymbolStream:
+    """
+    Per-symbol sequence numbers + ring buffer of ticks.
+    Each tick is encoded once per wire format (lazily, only for formats someone
+    listens with) and shared by broadcasts; snapshots are cached per format and
+    rebuilt at most once per tick. `epoch` changes whenever the process restarts,
+    so clients can tell a fresh sequence from a continued one.
+    """
+
+    def __init__(self, symbol: str, epoch: str):
+        self.symbol = symbol
+        self.epoch = epoch
+        self.seq = 0
+        # (row, json frame); row = (seq, price int, ts us), see app/wire.py
+        self.frames: Deque[Tuple[wire.Row, str]] = deque(maxlen=RING_SIZE)
+        self._latest: Dict[str, Union[str, bytes]] = {}
+        self._snapshots: Dict[str, Union[str, bytes]] = {}
+        self.touched = time.monotonic()
+
+    def append(self, tick: PriceTick) -> str:
+        self.touched = time.monotonic()
+        self.seq += 1
+        frame = wire.json_tick(tick.symbol, self.seq, tick.price, tick.ts)
+        self.frames.append((wire.to_row(self.seq, tick.price, tick.ts), frame))
+        self._latest = {"json": frame}
+        self._snapshots = {}
+        return frame
+
+    def latest(self, fmt: str = "json") -> Union[str, bytes]:
+        """Frame for the newest tick, encoded once per format."""
+        out = self._latest.get(fmt)
+        if out is None:
+            row = self.frames[-1][0]
+            prev = self.frames[-2][0] if len(self.frames) > 1 else None
+            out = self._latest[fmt] = wire.msgpack_tick(row, prev) if fmt == "msgpack" else wire.packed_tick(row, prev)
+        return out
+
+    def _batch(self, kind: str, entries: List[Tuple[wire.Row, str]], fmt: str) -> Union[str, bytes]:
+        if fmt == "json":
+            return wire.json_batch(kind, self.symbol, self.epoch, self.seq, [f for _, f in entries])
+        encode = wire.msgpack_batch if fmt == "msgpack" else wire.packed_batch
+        return encode(kind, self.symbol, self.epoch, self.seq, [r for r, _ in entries])
+
+    def snapshot(self, fmt: str = "json") -> Union[str, bytes]:
+        # rebuilt at most once per tick, however many clients (re)connect in between
+        out = self._snapshots.get(fmt)
+        if out is None:
+            out = self._snapshots[fmt] = self._batch("snapshot", list(self.frames)[-SNAPSHOT_SIZE:], fmt)
+        return out
+
+    def replay(self, after_seq: int, fmt: str = "json") -> Optional[Union[str, bytes]]:
+        """Ticks with seq > after_seq as one message, or None if they already left the ring."""
+        if after_seq > self.seq:
+            return None
+        oldest = self.frames[0][0][0] if self.frames else self.seq + 1
+        if after_seq < oldest - 1:
+            return None
+        return self._batch("replay", [e for e in self.frames if e[0][0] > after_seq], fmt)
+
+
+_epoch = uuid.uuid4().hex[:12]
+_streams: Dict[str, SymbolStream] = {}
+
+
+def get_stream(symbol: str) -> SymbolStream:
+    st = _streams.get(symbol)
+    if st is None:
+        st = _streams[symbol] = SymbolStream(symbol, _epoch)
+        for t in _tick_store.get(symbol, [])[-RING_SIZE:]:
+            st.append(t)
+    return st
+
+
+def evict_idle_streams(idle_seconds: float = STREAM_IDLE_SECONDS) -> int:
+    """
+    Drop streams nobody subscribes to and nothing has ticked for `idle_seconds` - any client can
+    open one for an arbitrary symbol. Generator symbols (_tick_store) are always kept.
+    """
+    cutoff = time.monotonic() - idle_seconds
+    idle = [sym for sym, st in _streams.items()
+            if st.touched < cutoff and sym not in _tick_store and not manager.active.get(sym)]
+    for sym in idle:
+        del _streams[sym]
+    return len(idle)
+
+
 # Simple connection manager
 class ConnectionManager:
     def __init__(self):
         self.active: Dict[str, List[WebSocket]] = {}  # symbol -> websockets
+        self.formats: Dict[WebSocket, str] = {}  # websocket -> wire format
 
     async def connect(self, websocket: WebSocket, symbol: str):
         await websocket.accept()
+        self.subscribe(websocket, symbol)
+
+    def subscribe(self, websocket: WebSocket, symbol: str, fmt: str = "json"):
         self.active.setdefault(symbol, []).append(websocket)
+        self.formats[websocket] = fmt
 
     def disconnect(self, websocket: WebSocket, symbol: str):
         conns = self.active.get(symbol, [])
         if websocket in conns:
             conns.remove(websocket)
+        if not conns:
+            self.active.pop(symbol, None)
+            st = _streams.get(symbol)
+            if st is not None:
+                st.touched = time.monotonic()  # idle from the last disconnect, not the last tick
+        self.formats.pop(websocket, None)
 
-    async def broadcast(self, symbol: str, message: dict):
+    def formats_for(self, symbol: str) -> set:
+        return {self.formats.get(ws, "json") for ws in self.active.get(symbol, [])}
+
+    async def broadcast(self, symbol: str, frames: Dict[str, Union[str, bytes]], enqueued: Optional[float] = None):
+        """
+        Send a tick, already encoded once per wire format (fmt -> frame), to every subscriber.
+        Fan-out latency is measured from `enqueued` (when the tick was published) to the last send.
+        """
+        t0 = time.perf_counter() if enqueued is None else enqueued
         conns = list(self.active.get(symbol, []))
         for ws in conns:
+            frame = frames.get(self.formats.get(ws, "json"))
+            if frame is None:
+                continue  # subscribed after this tick was encoded; its first message covers it
             try:
-                await ws.send_json(message)
+                await _send(ws, frame)
             except Exception:
-                # ignore broken sockets; disconnect will be cleaned elsewhere
-                pass
+                self.disconnect(ws, symbol)
+        fanout_latency.observe(time.perf_counter() - t0, metric_label(symbol))
+
+
+async def _send(websocket: WebSocket, data: Union[str, bytes]):
+    if isinstance(data, bytes):
+        await websocket.send_bytes(data)
+    else:
+        await websocket.send_text(data)
 
 manager = ConnectionManager()
 
-# background tick generator task (runs forever)
-async def _tick_generator():
+fanout_latency = metrics.histogram(
+    "oriza_ws_fanout_seconds", "Tick publish to last subscriber send, per symbol (unknown ones as \"other\")", ("symbol",))
+metrics.gauge("oriza_ws_market_connections", "Open /ws/market connections per symbol (unknown ones as \"other\")", ("symbol",),
+              fn=lambda: label_counts((sym, len(conns)) for sym, conns in manager.active.items()))
+metrics.gauge("oriza_ws_stream_ring_ticks", "Ticks held in each symbol's replay ring (unknown ones summed as \"other\")", ("symbol",),
+              fn=lambda: label_counts((sym, len(st.frames)) for sym, st in list(_streams.items())))
+
+def publish_tick(tick: PriceTick) -> Optional[asyncio.Task]:
+    """
+    Sequence a tick into its symbol's stream and fan it out to subscribers. The single entry
+    point for ticks: the synthetic generator and app/replay.py both go through here.
+    Returns the broadcast task (None if nobody listens) so producers can apply backpressure.
+    """
+    stream = get_stream(tick.symbol)
+    stream.append(tick)
+    if not replaying.get(tick.symbol):
+        daily_bars.on_tick(tick.symbol, tick.ts, tick.price)  # historical replays don't make bars
+    if not manager.active.get(tick.symbol):
+        return None
+    frames = {fmt: stream.latest(fmt) for fmt in manager.formats_for(tick.symbol)}
+    return asyncio.create_task(manager.broadcast(tick.symbol, frames, time.perf_counter()))
+
+
+# symbols currently driven by a historical replay; the generator leaves them alone
+replaying: Dict[str, int] = {}
+
+
+# background tick generator, run by the task supervisor (app/tasks.py) until `stop` is set
+@background_task("ticks")
+async def _tick_generator(stop: asyncio.Event):
     """
     Generates synthetic ticks every second and broadcasts them to connected clients.
-    Uses json.loads(t.json()) to ensure datetime -> ISO strings are serialized.
+    Each tick is serialized once (SymbolStream.append) and the same frame is sent to every socket.
     """
-    while True:
-        await asyncio.sleep(1)  # 1s tick interval
+    seed_demo_data()
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=1)  # 1s tick interval
+            return
+        except asyncio.TimeoutError:
+            pass
         for symbol in list(_tick_store.keys()):
-            last_price = _tick_store[symbol][-1].price
+            if replaying.get(symbol):
+                continue
+            ticks = _tick_store[symbol]
+            last_price = ticks[-1].price
             # simulate small move
             new_price = round(last_price * (1 + random.uniform(-0.0015, 0.0015)), 6)
             new_tick = PriceTick(symbol=symbol, price=new_price, ts=datetime.utcnow())
-            _tick_store[symbol].append(new_tick)
-            # keep last 1000
-            _tick_store[symbol] = _tick_store[symbol][-1000:]
-            # broadcast if listeners exist - ensure the payload is JSON serializable
-            asyncio.create_task(manager.broadcast(symbol, json.loads(new_tick.json())))
+            publish_tick(new_tick)
+            ticks.append(new_tick)
+            # keep last 1000 (trim in place)
+            if len(ticks) > RING_SIZE:
+                del ticks[:-RING_SIZE]
 
 
-# launch generator in background when module imported
-# note: if your environment raises "no running event loop", create_task here may need to be started differently.
-asyncio.get_event_loop().create_task(_tick_generator())
+@background_task("ws_streams", every_process=True)
+async def _evict_streams_loop(stop: asyncio.Event):
+    # streams are per process, like the sockets subscribed to them
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=STREAM_IDLE_SECONDS / 10)
+        except asyncio.TimeoutError:
+            evict_idle_streams()
 
 
 @router.websocket("/ws/market/{symbol}")
-async def ws_market(websocket: WebSocket, symbol: str):
-    sym = symbol.upper()
-    await manager.connect(websocket, sym)
+async def ws_market(
+    websocket: WebSocket,
+    symbol: str,
+    resume_from: Optional[int] = Query(None, description="last seq received; only newer ticks are replayed"),
+    epoch: Optional[str] = Query(None, description="epoch of that seq, from the previous snapshot/replay"),
+    format: Optional[str] = Query(None, description="json (default), msgpack or packed; see app/wire.py"),
+):
+    """
+    On connect sends either
+    - {"type":"replay", ..., "ticks":[...]} with only the ticks after `resume_from`, when the
+      epoch matches and they are still in the ring buffer, or
+    - {"type":"snapshot", ..., "ticks":[last 50]} otherwise.
+    Then {"type":"tick","seq":n,...} frames as they are produced.
+    The format can also be negotiated with Sec-WebSocket-Protocol: oriza.msgpack / oriza.packed.
+    """
+    sym = registry.canonical(symbol)
+    stream = get_stream(sym)
+    fmt, subprotocol = wire.negotiate(format, websocket.scope.get("subprotocols", []))
+    await websocket.accept(subprotocol=subprotocol)
+    first = None
+    if resume_from is not None and (epoch is None or epoch == stream.epoch):
+        first = stream.replay(resume_from, fmt)
+    first = first or stream.snapshot(fmt)
+    # subscribe right after building the first message (no await in between) so no tick is
+    # lost; a tick may still overtake it on the wire, clients order/dedupe by seq
+    manager.subscribe(websocket, sym, fmt)
     try:
-        # send initial snapshot (serialize each tick)
-        ticks = _tick_store.get(sym, [])
-        snapshot_ticks = [json.loads(t.json()) for t in ticks[-50:]]
-        await websocket.send_json({"type": "snapshot", "symbol": sym, "ticks": snapshot_ticks})
+        await _send(websocket, first)
 
         while True:
             # keep connection alive; client may send pings or commands
@@ -77,4 +264,6 @@ async def ws_market(websocket: WebSocket, symbol: str):
             if data.lower() in ("ping", "keepalive"):
                 await websocket.send_text("pong")
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket, sym)
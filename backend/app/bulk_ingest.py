@@ -0,0 +1,189 @@
+# file: app/bulk_ingest.py
+"""
+Shared plumbing for the bulk file loaders (app/storage_ingest.py,
+app/curve_ingest.py): format detection, streaming readers with per-row
+error reporting, per-chunk dedupe, and upserts on a table's natural key -
+COPY into a temp staging table + one INSERT .. SELECT .. ON CONFLICT on
+Postgres + asyncpg, multi-row INSERT .. ON CONFLICT otherwise.
+
+Chunks are parsed in a worker thread (iter_chunks), so an upload never
+blocks the event loop.
+"""
+import argparse
+import asyncio
+import csv
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import gen_id
+
+CHUNK_SIZE = 5000  # <= 6 bound params per row keeps us under asyncpg's 32767 limit
+FORMATS = ("csv", "ndjson", "json")
+
+Normalize = Callable[[dict, str], dict]
+
+
+@dataclass(frozen=True)
+class UpsertTarget:
+    """A table loaded by natural key: rows are dicts with `key` + `values` columns."""
+    model: type
+    key: Tuple[str, ...]
+    values: Tuple[str, ...]  # overwritten on conflict
+    id_prefix: Optional[str] = None  # surrogate primary key generated per row (gen_id)
+
+    @property
+    def table(self) -> str:
+        return self.model.__tablename__
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return (("id",) if self.id_prefix else ()) + self.key + self.values
+
+    def row_key(self, r: dict) -> tuple:
+        return tuple(r[k] for k in self.key)
+
+
+# --- parsing ---
+def detect_format(filename: Optional[str]) -> str:
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if name.endswith(".json"):
+        return "json"
+    return "csv"
+
+
+def _records(fh: TextIO, fmt: str) -> Iterator[dict]:
+    if fmt == "csv":
+        yield from csv.DictReader(fh)
+    elif fmt == "ndjson":
+        for line in fh:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+    elif fmt == "json":
+        doc = json.load(fh)
+        if isinstance(doc, dict):
+            # {"data": [...]} or EIA's {"response": {"data": [...]}}
+            response = doc.get("response")
+            doc = doc.get("data") or (response.get("data", []) if isinstance(response, dict) else [])
+        if not isinstance(doc, list):
+            raise ValueError("expected a JSON array of rows (or {\"data\": [...]})")
+        yield from doc
+    else:
+        raise ValueError(f"unsupported format: {fmt}")
+
+
+def iter_rows(fh: TextIO, fmt: str, normalize: Normalize, symbol: str) -> Iterator[dict]:
+    """
+    Normalized rows from an open text file without loading it whole (except plain
+    .json, which has to be parsed as one document). A bad row raises ValueError naming it.
+    """
+    records = _records(fh, fmt)
+    n = 0
+    while True:
+        n += 1
+        try:
+            raw = next(records)
+        except StopIteration:
+            return
+        except csv.Error as e:  # NUL byte, field over the size limit, ...
+            raise ValueError(f"row {n}: {e}") from e
+        try:
+            yield normalize(raw, symbol)
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"row {n}: {e!r}") from e
+
+
+def chunks(rows: Iterable[dict], target: UpsertTarget, size: int = CHUNK_SIZE) -> Iterator[List[dict]]:
+    # dedupe inside a chunk (last row wins) - ON CONFLICT can't touch a row twice per statement
+    chunk: Dict[tuple, dict] = {}
+    for r in rows:
+        chunk[target.row_key(r)] = r
+        if len(chunk) >= size:
+            yield list(chunk.values())
+            chunk = {}
+    if chunk:
+        yield list(chunk.values())
+
+
+async def iter_chunks(rows: Iterable[dict], target: UpsertTarget, size: int = CHUNK_SIZE) -> AsyncIterator[List[dict]]:
+    """chunks(), with reading and parsing off the event loop, one chunk at a time."""
+    it = chunks(rows, target, size)
+    while (chunk := await asyncio.to_thread(next, it, None)) is not None:
+        yield chunk
+
+
+# --- upsert ---
+async def _copy_upsert(db: AsyncSession, target: UpsertTarget, rows: List[dict]):
+    conn = await db.connection()
+    staging = f"_ingest_{target.table}"
+    cols = ", ".join(target.columns)
+    await conn.execute(text(
+        f"CREATE TEMP TABLE IF NOT EXISTS {staging} (LIKE {target.table} INCLUDING DEFAULTS) ON COMMIT DROP"
+    ))
+    fields = target.key + target.values
+    records = [((gen_id(target.id_prefix),) if target.id_prefix else ()) + tuple(r[c] for c in fields) for r in rows]
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(staging, records=records, columns=list(target.columns))
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in target.values)
+    await conn.execute(text(
+        f"INSERT INTO {target.table} ({cols}) SELECT {cols} FROM {staging} "
+        f"ON CONFLICT ({', '.join(target.key)}) DO UPDATE SET {updates}"
+    ))
+    await conn.execute(text(f"TRUNCATE {staging}"))
+
+
+async def _insert_upsert(db: AsyncSession, target: UpsertTarget, rows: List[dict], dialect: str):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    if target.id_prefix:
+        rows = [{"id": gen_id(target.id_prefix), **r} for r in rows]
+    stmt = insert(target.model).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(target.key),
+        set_={c: stmt.excluded[c] for c in target.values},
+    )
+    await db.execute(stmt)
+
+
+async def upsert_chunk(db: AsyncSession, target: UpsertTarget, rows: List[dict]):
+    conn = await db.connection()
+    if conn.dialect.name == "postgresql" and conn.dialect.driver == "asyncpg":
+        await _copy_upsert(db, target, rows)
+    else:
+        await _insert_upsert(db, target, rows, conn.dialect.name)
+
+
+# --- CLI ---
+Loader = Callable[[AsyncSession, TextIO, str, str], Awaitable[dict]]
+
+
+async def _load_files(paths: List[str], fmt: Optional[str], symbol: str, load: Loader,
+                      describe: Callable[[dict], str]):
+    from app.db import AsyncSessionLocal
+
+    for path in paths:
+        started = datetime.utcnow()
+        with open(path, newline="", encoding="utf-8-sig") as fh:
+            async with AsyncSessionLocal() as db:
+                res = await load(db, fh, fmt or detect_format(path), symbol)
+        took = (datetime.utcnow() - started).total_seconds()
+        print(f"{path}: {describe(res)} in {took:.2f}s")
+
+
+def main(description: str, load: Loader, describe: Callable[[dict], str]):
+    """`python -m app.<loader> files... [--format] [--symbol]` for a loader coroutine."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--format", choices=FORMATS, default=None, help="default: from file extension")
+    parser.add_argument("--symbol", default="NG", help="symbol for rows without one")
+    args = parser.parse_args()
+    asyncio.run(_load_files(args.paths, args.format, args.symbol, load, describe))
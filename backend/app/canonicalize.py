@@ -0,0 +1,82 @@
+# file: app/canonicalize.py
+"""
+One-off rewrite of stored symbols to registry canonical form.
+
+Rows written before every write path went through registry.canonical() can be
+keyed by an alias or a case variant (CL, HG, XAU, "ng"), which the read paths
+never ask for. This renames them to the canonical symbol (WTI, COPPER, GOLD,
+NG) in every table with a symbol column. On the natural-key tables (forward
+curves, storage) an alias row whose canonical twin already exists is dropped:
+the canonical row wins.
+
+CLI:
+    python -m app.canonicalize [--dry-run]
+"""
+import argparse
+import asyncio
+from typing import Dict, Tuple
+
+from sqlalchemy import delete, exists, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models import OHLC, AlertRule, ForwardCurvePoint, MarketTick, StorageLevel
+from app.symbols import registry
+
+# model -> the rest of its natural key besides symbol (empty: no uniqueness to keep)
+TABLES: Tuple[Tuple[type, Tuple[str, ...]], ...] = (
+    (MarketTick, ()),
+    (OHLC, ()),
+    (ForwardCurvePoint, ("asof", "contract")),
+    (StorageLevel, ("region", "ts")),
+    (AlertRule, ()),
+)
+
+
+async def canonicalize(db: AsyncSession, dry_run: bool = False) -> Dict[str, Dict[str, int]]:
+    """Returns {table: {"renamed": n, "dropped": n}}; commits unless dry_run."""
+    await registry.refresh(db)
+    out: Dict[str, Dict[str, int]] = {}
+    for model, key in TABLES:
+        counts = {"renamed": 0, "dropped": 0}
+        stored = (await db.execute(select(model.symbol).distinct())).scalars().all()
+        for alias in stored:
+            if alias is None or registry.canonical(alias) == alias:
+                continue
+            sym = registry.canonical(alias)
+            rows = model.symbol == alias
+            dropped = 0
+            if key:
+                twin = aliased(model)
+                clash = exists().where(twin.symbol == sym, *(getattr(twin, k) == getattr(model, k) for k in key))
+                if dry_run:
+                    dropped = await db.scalar(select(func.count()).select_from(model).where(rows, clash))
+                else:
+                    dropped = (await db.execute(delete(model).where(rows, clash))).rowcount
+            if dry_run:
+                renamed = await db.scalar(select(func.count()).select_from(model).where(rows)) - dropped
+            else:
+                renamed = (await db.execute(update(model).where(rows).values(symbol=sym))).rowcount
+            counts["renamed"] += renamed
+            counts["dropped"] += dropped
+        out[model.__tablename__] = counts
+    if dry_run:
+        await db.rollback()
+    else:
+        await db.commit()
+    return out
+
+
+async def _main(dry_run: bool):
+    from app.db import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        res = await canonicalize(db, dry_run)
+    for table, counts in res.items():
+        print(f"{table}: {counts['renamed']} renamed, {counts['dropped']} dropped{' (dry run)' if dry_run else ''}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rewrite stored symbols to their canonical form")
+    parser.add_argument("--dry-run", action="store_true", help="count only, change nothing")
+    asyncio.run(_main(parser.parse_args().dry_run))
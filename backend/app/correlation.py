@@ -0,0 +1,306 @@
+# file: app/correlation.py
+"""
+Rolling cross-commodity correlation of daily log returns.
+
+For every window (20/60/250 bars) the engine keeps running sums of returns
+(S = sum r) and of their cross products (Q = sum r r^T). A new bar adds the
+newest return and removes the one leaving each window in O(N^2) per window,
+instead of recomputing over the whole window. Correlations for any subset are
+derived from S and Q on request and cached until the next bar (the last
+CORRELATION_CACHE_SIZE symbol sets; at most CORRELATION_MAX_SYMBOLS per
+request). A full
+vectorized recompute (Q = X^T X) runs on load and every RECOMPUTE_EVERY bars
+to bound floating-point drift of the running sums.
+
+Symbols without a close in a bar carry their last close (zero return).
+
+Live ticks (app/api/ws.publish_tick) are aggregated into daily bars by
+DailyBars; the "daily_bars" task closes each day shortly after midnight UTC,
+writes the bars to the ohlc table and feeds them to the engine. Processes
+that don't see the ticks pick new bars up from the table: ensure_loaded
+rechecks it every CORRELATION_REFRESH_SECONDS.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import AsyncSessionLocal
+from app.models import OHLC
+from app.tasks import background_task
+
+log = logging.getLogger("oriza.correlation")
+
+WINDOWS = (20, 60, 250)
+RECOMPUTE_EVERY = 500
+BAR_INTERVAL = "1d"
+BAR_CHECK_SECONDS = 30
+CORRELATION_REFRESH_SECONDS = 300
+CORRELATION_MAX_SYMBOLS = 100  # per matrix request
+CORRELATION_CACHE_SIZE = 32  # matrices kept per engine (LRU)
+
+
+class CorrelationEngine:
+    def __init__(self, windows: Sequence[int] = WINDOWS):
+        self.windows = tuple(sorted(windows))
+        self.cap = self.windows[-1]
+        self.symbols: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.bars = 0  # returns recorded so far
+        self.asof: Optional[datetime] = None
+        self.version = 0
+        self.loaded = False  # True once history (at least one bar) is in
+        self.checked_at = 0.0  # monotonic time of the last look at the ohlc table
+        self._last_close = np.empty(0)
+        self._ring = np.zeros((self.cap, 0))  # returns; row = bar number % cap
+        self._sum = {w: np.zeros(0) for w in self.windows}
+        self._cross = {w: np.zeros((0, 0)) for w in self.windows}
+        self._cache: "OrderedDict[Tuple[int, Tuple[str, ...]], Tuple[int, np.ndarray]]" = OrderedDict()
+        self._pending_t: Optional[datetime] = None
+        self._pending: Dict[str, float] = {}
+
+    # --- symbols ---
+    def _ensure(self, symbols: Iterable[str]):
+        new = [s for s in dict.fromkeys(symbols) if s not in self.index]
+        if not new:
+            return
+        k = len(new)
+        for s in new:
+            self.index[s] = len(self.symbols)
+            self.symbols.append(s)
+        self._last_close = np.concatenate([self._last_close, np.full(k, np.nan)])
+        self._ring = np.pad(self._ring, ((0, 0), (0, k)))
+        for w in self.windows:
+            self._sum[w] = np.pad(self._sum[w], (0, k))
+            self._cross[w] = np.pad(self._cross[w], ((0, k), (0, k)))
+
+    # --- updates ---
+    def on_close(self, symbol: str, t: datetime, close: float):
+        """Feed one candle close; a bar is committed once a later bar starts (or on flush())."""
+        if self._pending_t is not None and t > self._pending_t:
+            self.flush()
+        self._pending_t = t
+        self._pending[symbol.upper()] = close
+
+    def flush(self):
+        if self._pending:
+            self.on_bar(self._pending_t, self._pending)
+        self._pending_t, self._pending = None, {}
+
+    def on_bar(self, t: datetime, closes: Dict[str, float]):
+        """Commit one bar of closes (symbol -> close) and update every window incrementally."""
+        self._ensure(s.upper() for s in closes)
+        prev = self._last_close
+        cur = prev.copy()
+        for s, v in closes.items():
+            cur[self.index[s.upper()]] = v
+        self._last_close = cur
+        self.asof = t
+        self.version += 1
+        self._cache.clear()
+        if np.isnan(prev).all():
+            return  # first bar: nothing to diff against yet
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = np.nan_to_num(np.log(cur / prev), nan=0.0, posinf=0.0, neginf=0.0)
+        for w in self.windows:
+            s, q = self._sum[w], self._cross[w]
+            if self.bars >= w:
+                old = self._ring[(self.bars - w) % self.cap]
+                s -= old
+                q -= np.outer(old, old)
+            s += r
+            q += np.outer(r, r)
+        self._ring[self.bars % self.cap] = r
+        self.bars += 1
+        if self.bars % RECOMPUTE_EVERY == 0:
+            self.recompute()
+
+    def recompute(self):
+        """Rebuild all running sums from the ring buffer (vectorized)."""
+        for w in self.windows:
+            n = min(self.bars, w)
+            rows = np.arange(self.bars - n, self.bars) % self.cap
+            x = self._ring[rows]
+            self._sum[w] = x.sum(axis=0)
+            self._cross[w] = x.T @ x
+        self._cache.clear()
+
+    def load(self, times: Sequence[datetime], symbols: Sequence[str], closes: np.ndarray):
+        """
+        Replace the state with a history matrix closes[T, N] (NaN = no close that bar),
+        forward-filled, then recompute every window in one pass.
+        """
+        syms = [s.upper() for s in symbols]
+        checked_at = self.checked_at
+        self.__init__(self.windows)
+        self.checked_at = checked_at
+        self._ensure(syms)
+        c = np.array(closes, dtype=float)
+        # forward fill along time
+        idx = np.where(~np.isnan(c), np.arange(c.shape[0])[:, None], 0)
+        np.maximum.accumulate(idx, axis=0, out=idx)
+        c = c[idx, np.arange(c.shape[1])]
+        if c.shape[0] >= 2:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                r = np.nan_to_num(np.log(c[1:] / c[:-1]), nan=0.0, posinf=0.0, neginf=0.0)
+            self.bars = r.shape[0]
+            keep = r[-self.cap:]
+            self._ring[np.arange(self.bars - keep.shape[0], self.bars) % self.cap] = keep
+        if c.shape[0]:
+            self._last_close = c[-1]
+            self.asof = times[-1]
+        self.recompute()
+        self.version += 1
+        self.loaded = bool(c.shape[0])
+
+    # --- queries ---
+    def observations(self, window: int) -> int:
+        return min(self.bars, window)
+
+    def matrix(self, window: int, symbols: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Correlation matrix for `symbols` (default: all) over `window`; NaN where undefined."""
+        syms = tuple(dict.fromkeys(s.upper() for s in symbols)) if symbols else tuple(self.symbols)
+        key = (window, syms)
+        hit = self._cache.get(key)
+        if hit is not None and hit[0] == self.version:
+            self._cache.move_to_end(key)
+            return hit[1]
+        n = self.observations(window)
+        k = len(syms)
+        if n < 2 or k == 0:
+            out = np.full((k, k), np.nan)
+        else:
+            idx = [self.index[s] for s in syms]
+            s = self._sum[window][idx]
+            q = self._cross[window][np.ix_(idx, idx)]
+            cov = (q - np.outer(s, s) / n) / (n - 1)
+            sd = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                out = np.clip(cov / np.outer(sd, sd), -1.0, 1.0)
+            out[np.diag_indices(k)] = np.where(sd > 0, 1.0, np.nan)
+        self._cache[key] = (self.version, out)
+        self._cache.move_to_end(key)
+        while len(self._cache) > CORRELATION_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return out
+
+
+correlations = CorrelationEngine()
+
+
+def _bar_day(ts: datetime) -> datetime:
+    return datetime(ts.year, ts.month, ts.day)
+
+
+class DailyBars:
+    """Today's OHLC per symbol, built from ticks; earlier days are closed and queued."""
+
+    def __init__(self):
+        self.day: Optional[datetime] = None
+        self.bars: Dict[str, List[float]] = {}  # symbol -> [open, high, low, close]
+        self.closed: List[Tuple[datetime, Dict[str, List[float]]]] = []
+
+    def roll(self, day: datetime):
+        if self.day is not None and day > self.day:
+            if self.bars:
+                self.closed.append((self.day, self.bars))
+            self.bars = {}
+        if self.day is None or day > self.day:
+            self.day = day
+
+    def on_tick(self, symbol: str, ts: datetime, price: float):
+        day = _bar_day(ts)
+        self.roll(day)
+        if day < self.day:
+            return  # late tick for a day already closed
+        bar = self.bars.get(symbol)
+        if bar is None:
+            self.bars[symbol] = [price, price, price, price]
+        else:
+            bar[1] = max(bar[1], price)
+            bar[2] = min(bar[2], price)
+            bar[3] = price
+
+    def take_closed(self, now: Optional[datetime] = None) -> List[Tuple[datetime, Dict[str, List[float]]]]:
+        self.roll(_bar_day(now or datetime.utcnow()))
+        out, self.closed = self.closed, []
+        return out
+
+
+daily_bars = DailyBars()
+
+
+async def _latest_bar(db: AsyncSession) -> Optional[datetime]:
+    return (await db.execute(select(func.max(OHLC.t)).where(OHLC.interval == BAR_INTERVAL))).scalar()
+
+
+async def ensure_loaded(db: AsyncSession, engine: CorrelationEngine = correlations):
+    """
+    Seed the engine from daily OHLC closes on first use, and reload when the table has
+    newer bars than the engine (checked at most every CORRELATION_REFRESH_SECONDS).
+    """
+    if engine.loaded and time.monotonic() - engine.checked_at < CORRELATION_REFRESH_SECONDS:
+        return
+    engine.checked_at = time.monotonic()
+    if engine.loaded:
+        latest = await _latest_bar(db)
+        if latest is None or (engine.asof is not None and latest <= engine.asof):
+            return
+    since = datetime.utcnow() - timedelta(days=int(engine.cap * 1.5) + 10)  # ~cap trading days
+    q = await db.execute(
+        select(OHLC.t, OHLC.symbol, OHLC.close)
+        .where(OHLC.interval == BAR_INTERVAL, OHLC.t >= since, OHLC.close.is_not(None))
+        .order_by(OHLC.t)
+    )
+    rows = [(t, s.upper(), c) for t, s, c in q.all()]  # unpack: Row.t is the tuple accessor
+    times = sorted({t for t, _, _ in rows})
+    symbols = sorted({s for _, s, _ in rows})
+    t_idx = {t: i for i, t in enumerate(times)}
+    s_idx = {s: i for i, s in enumerate(symbols)}
+    closes = np.full((len(times), len(symbols)), np.nan)
+    for t, s, c in rows:
+        closes[t_idx[t], s_idx[s]] = c
+    engine.load(times, symbols, closes)
+
+
+async def close_bars(now: Optional[datetime] = None, engine: CorrelationEngine = correlations) -> int:
+    """Persist the days DailyBars has closed and feed them to the engine. Returns bars written."""
+    closed = daily_bars.take_closed(now)
+    written = 0
+    for i, (day, bars) in enumerate(closed):
+        try:
+            async with AsyncSessionLocal() as db:
+                db.add_all(OHLC(symbol=sym, interval=BAR_INTERVAL, t=day, open=o, high=h, low=lo, close=c)
+                           for sym, (o, h, lo, c) in bars.items())
+                await db.commit()
+        except Exception:
+            daily_bars.closed[:0] = closed[i:]  # retried on the next pass
+            raise
+        written += len(bars)
+        # an engine not loaded yet will read these rows from the table instead
+        if engine.loaded and (engine.asof is None or day > engine.asof):
+            engine.on_bar(day, {sym: bar[3] for sym, bar in bars.items()})
+    return written
+
+
+@background_task("daily_bars")
+async def _close_bars_loop(stop: asyncio.Event):
+    # runs next to the tick producer (same process as "ticks"), whose ticks fill daily_bars
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=BAR_CHECK_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        try:
+            n = await close_bars()
+            if n:
+                log.info("closed %d daily bars", n)
+        except Exception as e:
+            log.warning("closing daily bars failed: %s", e)
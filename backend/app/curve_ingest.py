@@ -0,0 +1,124 @@
+# file: app/curve_ingest.py
+"""
+Bulk loader for end-of-day settlement files into forward_curves.
+
+Each row is one settlement: (symbol, trade date, contract month, price). Column
+names of the common exchange settlement layouts are accepted (trade_date /
+bizdt, contract_month / maturity, settle / settlement_price, ...), contract
+months as 2027-01, 202701, Jan27 or month codes (F27, NGF27, NGF2027).
+
+Rows are upserted on (symbol, asof, contract) in chunks by the shared bulk
+loader (app/bulk_ingest.py): COPY + merge on Postgres + asyncpg, multi-row
+INSERT .. ON CONFLICT otherwise, parsed in a worker thread. Symbols are
+stored canonical (registry.canonical: CL -> WTI), the form the read paths query.
+
+CLI:
+    python -m app.curve_ingest settlements/*.csv --symbol NG
+"""
+import re
+from datetime import date, datetime
+from typing import Iterator, List, TextIO
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import bulk_ingest
+from app.bulk_ingest import CHUNK_SIZE, UpsertTarget
+from app.models import ForwardCurvePoint
+from app.symbols import registry
+
+TARGET = UpsertTarget(ForwardCurvePoint, key=("symbol", "asof", "contract"), values=("price",))
+
+_ALIASES = {
+    "symbol": ("symbol", "product", "sym", "commodity"),
+    "asof": ("asof", "trade_date", "tradedate", "date", "bizdt", "settlement_date"),
+    "contract": ("contract", "contract_month", "month", "maturity", "delivery", "mmy"),
+    "price": ("price", "settle", "settlement", "settlement_price", "settleprice", "close"),
+}
+MONTH_CODES = "FGHJKMNQUVXZ"
+_MONTH_NAMES = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+_CODE_RE = re.compile(r"^[A-Z]*([FGHJKMNQUVXZ])(\d{2}|\d{4})$")
+_NAME_RE = re.compile(r"^([A-Z]{3})[\s\-]?(\d{2}|\d{4})$")
+
+
+# --- parsing ---
+def _year(y: str) -> int:
+    return int(y) if len(y) == 4 else 2000 + int(y)
+
+
+def parse_contract(value) -> date:
+    """Contract month -> first day of that month."""
+    if isinstance(value, (date, datetime)):
+        return date(value.year, value.month, 1)
+    s = str(value).strip().upper()
+    if re.fullmatch(r"\d{6}", s):  # 202701
+        return date(int(s[:4]), int(s[4:]), 1)
+    if re.fullmatch(r"\d{4}-\d{2}(-\d{2})?", s):  # 2027-01 / 2027-01-01
+        return date(int(s[:4]), int(s[5:7]), 1)
+    m = _NAME_RE.match(s)
+    if m and m.group(1).lower() in _MONTH_NAMES:  # JAN27 / Jan 2027
+        return date(_year(m.group(2)), _MONTH_NAMES.index(m.group(1).lower()) + 1, 1)
+    m = _CODE_RE.match(s)
+    if m:  # F27 / NGF27 / NGF2027
+        return date(_year(m.group(2)), MONTH_CODES.index(m.group(1)) + 1, 1)
+    raise ValueError(f"unrecognized contract month: {value!r}")
+
+
+def parse_day(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    s = str(value).strip()
+    if re.fullmatch(r"\d{8}", s):  # 20270115
+        return date(int(s[:4]), int(s[4:6]), int(s[6:]))
+    return datetime.fromisoformat(s[:10]).date()
+
+
+def _pick(raw: dict, field: str):
+    for name in _ALIASES[field]:
+        v = raw.get(name)
+        if v not in (None, ""):
+            return v
+    return None
+
+
+def _normalize(raw: dict, default_symbol: str) -> dict:
+    raw = {str(k).strip().lower().replace(" ", "_"): v for k, v in raw.items()}
+    contract, price, asof = _pick(raw, "contract"), _pick(raw, "price"), _pick(raw, "asof")
+    if contract is None or price is None or asof is None:
+        raise KeyError("settlement rows need a trade date, contract month and price")
+    return {
+        "symbol": registry.canonical(str(_pick(raw, "symbol") or default_symbol)),
+        "asof": parse_day(asof),
+        "contract": parse_contract(contract),
+        "price": float(price),
+    }
+
+
+def iter_rows(fh: TextIO, fmt: str = "csv", symbol: str = "NG") -> Iterator[dict]:
+    """Yield normalized settlements from an open text file (CSV / NDJSON / JSON)."""
+    return bulk_ingest.iter_rows(fh, fmt, _normalize, symbol)
+
+
+async def upsert_chunk(db: AsyncSession, rows: List[dict]):
+    await bulk_ingest.upsert_chunk(db, TARGET, rows)
+
+
+async def ingest_settlements(db: AsyncSession, fh: TextIO, fmt: str = "csv", symbol: str = "NG",
+                             chunk_size: int = CHUNK_SIZE) -> dict:
+    """Load one settlement file in a single transaction. Returns row / curve counts."""
+    curves = set()
+    total = 0
+    async for chunk in bulk_ingest.iter_chunks(iter_rows(fh, fmt, symbol), TARGET, chunk_size):
+        await upsert_chunk(db, chunk)
+        total += len(chunk)
+        curves.update((r["symbol"], r["asof"]) for r in chunk)
+    await db.commit()
+    return {"rows": total, "curves": len(curves), "symbols": sorted({s for s, _ in curves})}
+
+
+if __name__ == "__main__":
+    bulk_ingest.main(
+        "Bulk load EOD settlements into forward_curves", ingest_settlements,
+        lambda res: f"{res['rows']} settlements, {res['curves']} curves",
+    )
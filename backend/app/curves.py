@@ -0,0 +1,88 @@
+# file: app/curves.py
+"""
+Forward curve queries.
+
+A curve is loaded as two aligned numpy arrays: contract months (int, months
+since 1970-01, so "k months later" is just +k) and prices. Curve-to-curve
+moves and calendar spreads are computed on those arrays with searchsorted,
+never per contract in Python.
+
+Both access paths are single index range scans (see ForwardCurvePoint):
+    whole curve as of a day    -> primary key (symbol, asof, contract)
+    one contract's history     -> ix_forward_curves_contract_asof
+"""
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import ForwardCurvePoint as FC
+
+
+@dataclass
+class Curve:
+    symbol: str
+    asof: date
+    months: np.ndarray  # int64 months since 1970-01, ascending
+    prices: np.ndarray
+
+    def labels(self) -> list:
+        return self.months.astype("datetime64[M]").astype(str).tolist()
+
+    def at(self, months: np.ndarray) -> np.ndarray:
+        """Prices for the given contract months; NaN where this curve has no such contract."""
+        if not len(self.months):
+            return np.full(len(months), np.nan)
+        i = np.clip(np.searchsorted(self.months, months), 0, len(self.months) - 1)
+        return np.where(self.months[i] == months, self.prices[i], np.nan)
+
+
+def month_index(d: date) -> int:
+    return (d.year - 1970) * 12 + d.month - 1
+
+
+async def curve_date(db: AsyncSession, symbol: str, asof: Optional[date] = None, before: bool = False) -> Optional[date]:
+    """Latest settlement day <= asof (< asof with before=True); None if there is none."""
+    stmt = select(func.max(FC.asof)).where(FC.symbol == symbol)
+    if asof is not None:
+        stmt = stmt.where(FC.asof < asof if before else FC.asof <= asof)
+    return (await db.execute(stmt)).scalar()
+
+
+async def load_curve(db: AsyncSession, symbol: str, asof: date) -> Curve:
+    q = await db.execute(
+        select(FC.contract, FC.price).where(FC.symbol == symbol, FC.asof == asof).order_by(FC.contract)
+    )
+    rows = q.all()
+    months = np.fromiter((month_index(c) for c, _ in rows), dtype=np.int64, count=len(rows))
+    prices = np.fromiter((p for _, p in rows), dtype=float, count=len(rows))
+    return Curve(symbol, asof, months, prices)
+
+
+async def contract_history(db: AsyncSession, symbol: str, contract: date,
+                           start: Optional[date] = None, end: Optional[date] = None):
+    """(asof days, prices) of one contract month, oldest first."""
+    stmt = select(FC.asof, FC.price).where(FC.symbol == symbol, FC.contract == contract)
+    if start is not None:
+        stmt = stmt.where(FC.asof >= start)
+    if end is not None:
+        stmt = stmt.where(FC.asof <= end)
+    rows = (await db.execute(stmt.order_by(FC.asof))).all()
+    return [d for d, _ in rows], np.fromiter((p for _, p in rows), dtype=float, count=len(rows))
+
+
+def calendar_spreads(curve: Curve, offsets: Iterable[int]) -> Dict[int, np.ndarray]:
+    """offset k -> price(contract) - price(contract + k months), aligned to curve.months."""
+    return {k: curve.prices - curve.at(curve.months + k) for k in offsets}
+
+
+def curve_diff(curve: Curve, other: Curve) -> Dict[str, np.ndarray]:
+    """Move from `other` to `curve` per contract of `curve` (NaN where `other` lacks it)."""
+    base = other.at(curve.months)
+    change = curve.prices - base
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(base != 0, change / np.abs(base) * 100, np.nan)
+    return {"change": change, "change_pct": pct}
@@ -0,0 +1,148 @@
+# file: app/exports.py
+"""
+Row exports shared by report rendering (app/report_engine.py) and the
+streaming export endpoints: named queries over history tables and a
+server-side-cursor reader that yields rows in chunks of FETCH_SIZE.
+
+A streamed download holds one pooled connection until the client has read
+it all, so at most EXPORT_CONCURRENCY HTTP exports run per process; more
+get 503 + Retry-After instead of draining the pool.
+"""
+import asyncio
+import csv
+import io
+import os
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, List, Sequence, Tuple
+
+import orjson
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select
+
+from app.db import AsyncSessionLocal
+from app.models import MarketTick, StorageLevel
+from app.symbols import registry
+
+FETCH_SIZE = 5000
+EXPORT_CONCURRENCY = int(os.getenv("EXPORT_CONCURRENCY", "4"))
+EXPORT_RETRY_AFTER_SECONDS = 10
+
+_export_slots = asyncio.Semaphore(EXPORT_CONCURRENCY)
+
+
+# --- queries: params -> (header, select) ---
+def _ts(value) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+def _range(params: dict, col, stmt: Select) -> Select:
+    if params.get("start"):
+        stmt = stmt.where(col >= _ts(params["start"]))
+    if params.get("end"):
+        stmt = stmt.where(col < _ts(params["end"]))
+    return stmt
+
+
+def _symbols(params: dict) -> List[str]:
+    syms = params.get("symbols") or ([params["symbol"]] if params.get("symbol") else [])
+    if not syms:
+        raise ValueError("params.symbol or params.symbols is required")
+    return [registry.canonical(s) for s in syms]
+
+
+def ticks_query(params: dict) -> Tuple[List[str], Select]:
+    stmt = select(MarketTick.ts, MarketTick.symbol, MarketTick.price).where(MarketTick.symbol.in_(_symbols(params)))
+    return ["ts", "symbol", "price"], _range(params, MarketTick.ts, stmt).order_by(MarketTick.ts)
+
+
+def storage_query(params: dict) -> Tuple[List[str], Select]:
+    stmt = select(StorageLevel.ts, StorageLevel.symbol, StorageLevel.region, StorageLevel.level, StorageLevel.avg_5y) \
+        .where(StorageLevel.symbol.in_(_symbols(params)))
+    if params.get("region"):
+        stmt = stmt.where(StorageLevel.region == params["region"].upper())
+    return ["ts", "symbol", "region", "level", "avg_5y"], _range(params, StorageLevel.ts, stmt).order_by(StorageLevel.ts)
+
+
+EXPORTS: Dict[str, Callable[[dict], Tuple[List[str], Select]]] = {
+    "ticks": ticks_query,
+    "storage": storage_query,
+}
+
+
+async def stream_chunks(stmt: Select, fetch_size: int = FETCH_SIZE) -> AsyncIterator[Sequence[tuple]]:
+    """Rows of `stmt` in chunks, read through a server-side cursor on a dedicated session."""
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=fetch_size))
+        async for part in result.partitions():
+            yield part
+
+
+async def _limited(chunks: AsyncIterator[Sequence[tuple]]) -> AsyncIterator[Sequence[tuple]]:
+    # the slot (and so the connection) is released when the download ends or the client goes away
+    async with _export_slots:
+        try:
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+
+
+# --- HTTP streaming encoders ---
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+async def encode_stream(fmt: str, header: Sequence[str], chunks: AsyncIterator[Sequence[tuple]],
+                        gzip: bool = False) -> AsyncIterator[bytes]:
+    """
+    NDJSON / CSV bytes for each chunk, optionally gzip'd with a sync flush per
+    chunk so clients can decode as data arrives.
+    """
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+
+    def out(data: bytes) -> bytes:
+        return gz.compress(data) + gz.flush(zlib.Z_SYNC_FLUSH) if gz else data
+
+    keys = list(header)
+    if fmt == "csv":
+        buf = io.StringIO()
+        w = csv.writer(buf)
+        w.writerow(keys)
+        yield out(buf.getvalue().encode("utf-8"))
+    try:
+        async for chunk in chunks:
+            if fmt == "csv":
+                buf.seek(0)
+                buf.truncate()
+                w.writerows(chunk)
+                data = buf.getvalue().encode("utf-8")
+            else:
+                data = b"".join(orjson.dumps(dict(zip(keys, row))) + b"\n" for row in chunk)
+            yield out(data)
+    finally:
+        await chunks.aclose()  # a client that went away releases its connection now, not at GC
+    if gz:
+        yield gz.flush(zlib.Z_FINISH)
+
+
+def export_response(request: Request, name: str, params: dict, fmt: str) -> StreamingResponse:
+    """StreamingResponse for EXPORTS[name]; gzip'd when the client accepts it."""
+    if fmt not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(MEDIA_TYPES)}")
+    header, stmt = EXPORTS[name](params)
+    if _export_slots.locked():
+        raise HTTPException(status_code=503, detail="Too many exports in progress",
+                            headers={"Retry-After": str(EXPORT_RETRY_AFTER_SECONDS)})
+    gzip = "gzip" in request.headers.get("accept-encoding", "")
+    headers = {
+        "Content-Disposition": f'attachment; filename="{name}-{"-".join(_symbols(params))}.{fmt}"',
+        "Vary": "Accept-Encoding",
+    }
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        encode_stream(fmt, header, _limited(stream_chunks(stmt)), gzip=gzip),
+        media_type=MEDIA_TYPES[fmt],
+        headers=headers,
+    )
@@ -0,0 +1,228 @@
+# file: app/jobs.py
+"""
+Persistent job queue on the `jobs` table.
+
+- API code calls enqueue() inside its own transaction, so the job exists iff the
+  caller's rows (e.g. a Report) were committed.
+- Workers (python -m app.worker) claim jobs with SELECT .. FOR UPDATE SKIP LOCKED,
+  so any number of worker processes can share the table.
+- Failed jobs are retried with exponential backoff up to max_attempts; jobs whose
+  worker died are requeued once their lease expires.
+- A running job's lease (locked_at) is renewed every JOB_HEARTBEAT_SECONDS, so
+  long jobs are bounded by JOB_TIMEOUT_SECONDS only. Every status change is
+  conditional on locked_by, so a worker that lost its lease can't overwrite
+  the job after it was reclaimed; its handler is cancelled instead.
+"""
+import asyncio
+import logging
+import os
+import socket
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import AsyncSessionLocal
+from app.models import Job
+
+log = logging.getLogger("oriza.jobs")
+
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1.0"))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "120"))  # without a heartbeat for this long a job is requeued
+JOB_HEARTBEAT_SECONDS = JOB_LEASE_SECONDS / 4
+JOB_TIMEOUT_SECONDS = int(os.getenv("JOB_TIMEOUT_SECONDS", "3600"))  # per attempt
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "5"))
+
+
+Hook = Callable[[dict, str], Awaitable[None]]
+
+
+@dataclass
+class JobHandler:
+    fn: Callable[[dict], Awaitable[None]]
+    on_failure: Optional[Hook] = None
+    on_retry: Optional[Hook] = None
+
+
+_handlers: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str, on_failure: Optional[Hook] = None, on_retry: Optional[Hook] = None):
+    """
+    Register `async def fn(payload)` for jobs of `kind`. on_failure runs after the
+    last attempt, on_retry after a failed attempt that will be retried.
+    """
+    def deco(fn):
+        _handlers[kind] = JobHandler(fn=fn, on_failure=on_failure, on_retry=on_retry)
+        return fn
+    return deco
+
+
+def enqueue(db: AsyncSession, kind: str, payload: dict, max_attempts: int = JOB_MAX_ATTEMPTS,
+            delay_seconds: float = 0) -> Job:
+    """Add a job to the caller's session; it becomes visible to workers on commit."""
+    job = Job(
+        kind=kind,
+        payload=payload,
+        status="queued",
+        attempts=0,
+        max_attempts=max_attempts,
+        run_after=datetime.utcnow() + timedelta(seconds=delay_seconds),
+    )
+    db.add(job)
+    return job
+
+
+async def claim(worker_id: str) -> Optional[Job]:
+    async with AsyncSessionLocal() as db:
+        now = datetime.utcnow()
+        q = await db.execute(
+            select(Job)
+            .where(Job.status == "queued", Job.run_after <= now)
+            .order_by(Job.run_after)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        job = q.scalar_one_or_none()
+        if job is None:
+            return None
+        # conditional update: a second claimer (no SKIP LOCKED support, e.g. sqlite) gets rowcount 0
+        res = await db.execute(
+            update(Job)
+            .where(Job.id == job.id, Job.status == "queued")
+            .values(status="running", attempts=Job.attempts + 1, locked_by=worker_id, locked_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        if res.rowcount != 1:
+            return None
+        await db.refresh(job)
+        return job
+
+
+async def _set(job: Job, **values) -> bool:
+    """Update a job this worker still holds; False if its lease was lost (requeued / reclaimed)."""
+    async with AsyncSessionLocal() as db:
+        res = await db.execute(
+            update(Job)
+            .where(Job.id == job.id, Job.status == "running", Job.locked_by == job.locked_by)
+            .values(**values)
+        )
+        await db.commit()
+        return res.rowcount == 1
+
+
+async def _heartbeat(job: Job, task: asyncio.Task, lost: asyncio.Event):
+    """Renew the lease while `task` runs; set `lost` and cancel it if the lease was lost."""
+    while True:
+        await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+        try:
+            held = await _set(job, locked_at=datetime.utcnow())
+        except Exception:
+            log.exception("heartbeat for job %s failed", job.id)
+            continue
+        if not held:
+            log.warning("job %s (%s) lost its lease, cancelling", job.id, job.kind)
+            lost.set()
+            task.cancel()
+            return
+
+
+async def requeue_expired() -> int:
+    """Return jobs held by dead workers to the queue (or fail them if out of attempts)."""
+    cutoff = datetime.utcnow() - timedelta(seconds=JOB_LEASE_SECONDS)
+    expired = (Job.status == "running", Job.locked_at < cutoff)
+    async with AsyncSessionLocal() as db:
+        requeued = await db.execute(
+            update(Job).where(*expired, Job.attempts < Job.max_attempts)
+            .values(status="queued", locked_by=None, locked_at=None, last_error="lease expired")
+        )
+        await db.execute(
+            update(Job).where(*expired, Job.attempts >= Job.max_attempts)
+            .values(status="failed", last_error="lease expired", finished_at=datetime.utcnow())
+        )
+        await db.commit()
+        return requeued.rowcount or 0
+
+
+async def _hook(hook: Optional[Hook], job: Job, payload: dict, err: str):
+    if hook:
+        try:
+            await hook(payload, err)
+        except Exception:
+            log.exception("%s for job %s raised", hook.__name__, job.id)
+
+
+async def run_job(job: Job):
+    handler = _handlers.get(job.kind)
+    payload = job.payload or {}
+    if handler is None:
+        await _set(job, status="failed", last_error=f"no handler for {job.kind}", finished_at=datetime.utcnow())
+        return
+    task = asyncio.create_task(asyncio.wait_for(handler.fn(payload), timeout=JOB_TIMEOUT_SECONDS))
+    lost = asyncio.Event()
+    beat = asyncio.create_task(_heartbeat(job, task, lost))
+    try:
+        await task
+    except asyncio.CancelledError:
+        # awaiting `task` cancels it too when we are cancelled, so only the flag tells the two apart
+        if not lost.is_set():
+            raise  # we are being cancelled ourselves (shutdown)
+        return  # lease lost: the job belongs to whoever reclaimed it
+    except Exception as e:
+        err = f"{type(e).__name__}: {e}"
+        if job.attempts < job.max_attempts:
+            backoff = JOB_RETRY_BASE_SECONDS * 2 ** (job.attempts - 1)
+            log.warning("job %s (%s) attempt %s failed, retrying in %.0fs: %s", job.id, job.kind, job.attempts, backoff, err)
+            if await _set(job, status="queued", locked_by=None, locked_at=None, last_error=err,
+                          run_after=datetime.utcnow() + timedelta(seconds=backoff)):
+                await _hook(handler.on_retry, job, payload, err)
+            return
+        log.error("job %s (%s) failed permanently: %s", job.id, job.kind, err)
+        if await _set(job, status="failed", last_error=err, finished_at=datetime.utcnow()):
+            await _hook(handler.on_failure, job, payload, err)
+        return
+    finally:
+        beat.cancel()
+    await _set(job, status="done", last_error=None, finished_at=datetime.utcnow())
+
+
+async def _worker_loop(worker_id: str, stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            job = await claim(worker_id)
+        except Exception:
+            log.exception("claim failed")
+            job = None
+        if job is None:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        await run_job(job)
+
+
+async def _reaper_loop(stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            n = await requeue_expired()
+            if n:
+                log.warning("requeued %s expired jobs", n)
+        except Exception:
+            log.exception("requeue_expired failed")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=max(JOB_LEASE_SECONDS / 4, JOB_POLL_SECONDS))
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_pool(concurrency: int, stop: asyncio.Event):
+    """Run `concurrency` job loops in this process until `stop` is set; in-flight jobs finish first."""
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    tasks = [asyncio.create_task(_worker_loop(f"{prefix}:{i}", stop)) for i in range(concurrency)]
+    tasks.append(asyncio.create_task(_reaper_loop(stop)))
+    await asyncio.gather(*tasks)
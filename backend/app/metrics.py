@@ -0,0 +1,239 @@
+# file: app/metrics.py
+"""
+In-process metrics, exposed at /metrics in the Prometheus text format (0.0.4).
+
+Kept cheap enough to leave on in production:
+- recording is a dict lookup + bisect on a fixed bucket list, no locks (one
+  event loop per process) and no per-sample allocation
+- gauges for sizes / connection counts are callbacks evaluated at scrape time,
+  so the hot paths don't maintain them at all
+- HTTP timing is a plain ASGI middleware (no BaseHTTPMiddleware task/queue per
+  request); DB time comes from two SQLAlchemy cursor events accumulated into
+  the request's contextvar
+
+Metrics are per process; with several workers, scrape each one (or run one).
+"""
+import asyncio
+import bisect
+import contextvars
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+from app.tasks import background_task
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 30.0, 60.0)
+LOOP_LAG_INTERVAL_SECONDS = 0.5
+
+Labels = Tuple[str, ...]
+
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(v: float) -> str:
+    v = float(v)
+    return str(int(v)) if v.is_integer() else repr(v)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> Iterable[str]:
+        return ()
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *a, **kw):
+        super().__init__(*a, **kw)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self):
+        for lv, v in self._values.items():
+            yield f"{self.name}{_labels(self.labelnames, lv)} {_num(v)}"
+
+
+class Gauge(Metric):
+    """Set directly, or computed at scrape time by `fn` returning {label values: value}."""
+    kind = "gauge"
+
+    def __init__(self, *a, fn: Optional[Callable[[], Dict[Labels, float]]] = None, **kw):
+        super().__init__(*a, **kw)
+        self._values: Dict[Labels, float] = {}
+        self._fn = fn
+
+    def set(self, value: float, *labels: str):
+        self._values[labels] = value
+
+    def get(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self):
+        values = self._fn() if self._fn is not None else self._values
+        for lv, v in values.items():
+            yield f"{self.name}{_labels(self.labelnames, lv)} {_num(v)}"
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, *a, buckets: Sequence[float] = LATENCY_BUCKETS, **kw):
+        super().__init__(*a, **kw)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        s = self._series.get(labels)
+        if s is None:
+            s = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        s[bisect.bisect_left(self.buckets, value)] += 1
+        s[-1] += value
+
+    def samples(self):
+        les = [f'le="{le}"' for le in self.buckets] + ['le="+Inf"']
+        for lv, s in self._series.items():
+            cumulative = 0
+            for le, n in zip(les, s):
+                cumulative += n
+                yield f"{self.name}_bucket{_labels(self.labelnames, lv, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, lv)} {_num(s[-1])}"
+            yield f"{self.name}_count{_labels(self.labelnames, lv)} {cumulative}"
+
+
+_registry: Dict[str, Metric] = {}
+
+
+def _register(metric: Metric) -> Metric:
+    return _registry.setdefault(metric.name, metric)
+
+
+def counter(name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+    return _register(Counter(name, help, labels))
+
+
+def gauge(name: str, help: str, labels: Sequence[str] = (),
+          fn: Optional[Callable[[], Dict[Labels, float]]] = None) -> Gauge:
+    return _register(Gauge(name, help, labels, fn=fn))
+
+
+def histogram(name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+    return _register(Histogram(name, help, labels, buckets=buckets))
+
+
+def render() -> str:
+    lines: List[str] = []
+    for m in _registry.values():
+        lines.extend(m.header())
+        lines.extend(m.samples())
+    return "\n".join(lines) + "\n"
+
+
+# --- HTTP requests + DB time per route ---
+http_latency = histogram("oriza_http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status"))
+db_time = histogram("oriza_http_db_seconds", "DB time (sum of statement durations) per HTTP request", ("method", "route"))
+db_queries = counter("oriza_http_db_queries_total", "DB statements executed while serving a route", ("method", "route"))
+
+# [seconds, statements] of the current request; None outside requests (jobs, background loops)
+_db_acc: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("oriza_db_acc", default=None)
+
+
+def _before_cursor(conn, cursor, statement, parameters, context, executemany):
+    conn.info["oriza_t0"] = time.perf_counter()
+
+
+def _after_cursor(conn, cursor, statement, parameters, context, executemany):
+    acc = _db_acc.get()
+    if acc is not None:
+        acc[0] += time.perf_counter() - conn.info.get("oriza_t0", time.perf_counter())
+        acc[1] += 1
+
+
+def instrument_engine(engine):
+    """Attach the DB timing events to an (async) engine."""
+    sync = getattr(engine, "sync_engine", engine)
+    event.listen(sync, "before_cursor_execute", _before_cursor)
+    event.listen(sync, "after_cursor_execute", _after_cursor)
+
+
+def _route_template(scope) -> str:
+    # newer FastAPI resolves included routers lazily and leaves the un-prefixed route in
+    # scope["route"]; the effective context carries the full template
+    ctx = (scope.get("fastapi") or {}).get("effective_route_context")
+    path = getattr(ctx, "path", None) or getattr(scope.get("route"), "path", None)
+    return path or "<unmatched>"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: latency by route template (not raw path, to keep cardinality bounded)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = ["500"]
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            await send(message)
+
+        acc = [0.0, 0]
+        token = _db_acc.set(acc)
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            elapsed = time.perf_counter() - t0
+            _db_acc.reset(token)
+            path = _route_template(scope)
+            method = scope["method"]
+            http_latency.observe(elapsed, method, path, status[0])
+            if acc[1]:
+                db_time.observe(acc[0], method, path)
+                db_queries.inc(method, path, amount=acc[1])
+
+
+# --- event loop lag (runs in every process, see app/tasks.py) ---
+loop_lag = histogram("oriza_event_loop_lag_seconds", "How late a periodic wakeup of the event loop fires")
+loop_lag_last = gauge("oriza_event_loop_lag_last_seconds", "Most recent event loop lag sample")
+
+
+@background_task("loop_lag", every_process=True)
+async def _loop_lag_monitor(stop: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        t = loop.time()
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=LOOP_LAG_INTERVAL_SECONDS)
+            return
+        except asyncio.TimeoutError:
+            pass
+        lag = max(0.0, loop.time() - t - LOOP_LAG_INTERVAL_SECONDS)
+        loop_lag.observe(lag)
+        loop_lag_last.set(lag)
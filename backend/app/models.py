@@ -1,5 +1,5 @@
 # file: app/models.py
-from sqlalchemy import Column, String, Integer, Float, DateTime, JSON, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, Float, Date, DateTime, JSON, ForeignKey, Index, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -45,6 +45,20 @@ class OHLC(Base):
     close = Column(Float)
     volume = Column(Float)
 
+class ForwardCurvePoint(Base):
+    # one settlement per (symbol, as-of day, contract month). The natural key is the primary
+    # key (no surrogate id), so "whole curve as of a day" is one contiguous PK range scan;
+    # the second index serves "one contract's history" as an index-only scan.
+    __tablename__ = "forward_curves"
+    symbol = Column(String(32), primary_key=True)
+    asof = Column(Date, primary_key=True)
+    contract = Column(Date, primary_key=True)  # first day of the delivery month
+    price = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index("ix_forward_curves_contract_asof", "symbol", "contract", "asof", postgresql_include=["price"]),
+    )
+
 class StorageLevel(Base):
     __tablename__ = "storage_levels"
     id = Column(String, primary_key=True, default=lambda: gen_id("stg"))
@@ -54,6 +68,9 @@ class StorageLevel(Base):
     level = Column(Float, nullable=False)
     avg_5y = Column(Float, nullable=True)
 
+    # one reading per (symbol, region, week); bulk ingest upserts on this key
+    __table_args__ = (UniqueConstraint("symbol", "region", "ts", name="uq_storage_symbol_region_ts"),)
+
 class Workspace(Base):
     __tablename__ = "workspaces"
     id = Column(String, primary_key=True, default=lambda: gen_id("ws"))
@@ -81,7 +98,24 @@ class Report(Base):
     owner_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
     template = Column(String(255), nullable=False)
     workspace_id = Column(String, nullable=True)
-    format = Column(String(16), default="pdf")
+    format = Column(String(16), default="csv")
+    params = Column(JSON, nullable=True)  # template parameters (symbol, start, end, ...)
     status = Column(String(32), default="pending")
     s3_url = Column(String(1024), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+class Job(Base):
+    # persistent work queue consumed by app.worker (see app/jobs.py)
+    __tablename__ = "jobs"
+    id = Column(String, primary_key=True, default=lambda: gen_id("job"))
+    kind = Column(String(64), nullable=False, index=True)
+    payload = Column(JSON, default={})
+    status = Column(String(32), default="queued", index=True)  # queued|running|done|failed
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    run_after = Column(DateTime, default=datetime.utcnow, index=True)
+    locked_by = Column(String(128), nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
@@ -0,0 +1,46 @@
+# file: app/object_store.py
+"""
+Local filesystem stand-in for S3. Objects live under OBJECT_STORE_DIR and are
+referenced as local://<key> in columns such as Report.s3_url.
+Writers fill <key>.part and publish() renames it into place atomically.
+"""
+import os
+from pathlib import Path
+from typing import Optional
+
+OBJECT_STORE_DIR = Path(os.getenv("OBJECT_STORE_DIR", "./object_store")).resolve()
+SCHEME = "local://"
+
+
+def path_for(key: str) -> Path:
+    p = (OBJECT_STORE_DIR / key).resolve()
+    if OBJECT_STORE_DIR not in p.parents:
+        raise ValueError(f"invalid object key: {key}")
+    return p
+
+
+def staging_path(key: str) -> Path:
+    p = path_for(key + ".part")
+    p.parent.mkdir(parents=True, exist_ok=True)
+    return p
+
+
+def publish(key: str) -> str:
+    os.replace(staging_path(key), path_for(key))
+    return url_for(key)
+
+
+def url_for(key: str) -> str:
+    return SCHEME + key
+
+
+def is_local(url: Optional[str]) -> bool:
+    return bool(url) and url.startswith(SCHEME)
+
+
+def path_from_url(url: Optional[str]) -> Optional[Path]:
+    """Resolve a local:// url to an existing file, or None for remote / missing objects."""
+    if not is_local(url):
+        return None
+    p = path_for(url[len(SCHEME):])
+    return p if p.is_file() else None
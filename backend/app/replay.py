@@ -0,0 +1,190 @@
+# file: app/replay.py
+"""
+Historical tick replay through the live stream path.
+
+A replay reads stored market_ticks for a symbol set and time range (oldest
+first, server-side cursor via app.exports) and publishes them with
+app.api.ws.publish_tick - the same sequencing, ring buffer, encoding and
+fan-out the synthetic generator uses - so dashboards and WebSocket clients
+can't tell a replay from live data. While a symbol is being replayed the
+generator skips it.
+
+Pacing: tick timestamps are replayed at `speed` x real time (1..1000), or as
+fast as possible with speed=0, which makes a replay a load generator for the
+broadcast path. A reader task stays up to REPLAY_READ_AHEAD chunks ahead of
+the player, so DB round-trips never stall playback; broadcasts are awaited
+once per chunk, so slow sockets throttle the replay instead of piling up
+tasks. Achieved throughput, lag behind schedule and reader stalls are kept on
+each Replay (GET /replay/{id}).
+"""
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.api import ws
+from app.exports import stream_chunks, ticks_query
+from app.schemas.schemas import PriceTick
+from app.symbols import registry
+
+log = logging.getLogger("oriza.replay")
+
+REPLAY_READ_AHEAD = int(os.getenv("REPLAY_READ_AHEAD", "4"))  # chunks buffered ahead of playback
+REPLAY_MAX_ACTIVE = int(os.getenv("REPLAY_MAX_ACTIVE", "4"))
+REPLAY_KEEP_FINISHED = 50
+MAX_SPEED = 1000
+_MIN_SLEEP = 0.002  # below this, run late rather than sleep
+
+
+class Replay:
+    def __init__(self, symbols: List[str], start: Optional[datetime], end: Optional[datetime], speed: float):
+        self.id = uuid.uuid4().hex[:12]
+        self.symbols = sorted({registry.canonical(s) for s in symbols})
+        self.start = start
+        self.end = end
+        self.speed = speed  # 0 = as fast as possible
+        self.status = "pending"  # pending|running|done|stopped|failed
+        self.error: Optional[str] = None
+        self.ticks = 0
+        self.chunks = 0
+        self.read_waits = 0  # times playback caught up with the reader
+        self.max_lag = 0.0  # seconds behind schedule (paced replays)
+        self.sim_ts: Optional[datetime] = None
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("pending", "running")
+
+    def start_task(self):
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    async def _reader(self, queue: asyncio.Queue):
+        _, stmt = ticks_query({"symbols": self.symbols, "start": self.start, "end": self.end})
+        try:
+            async for chunk in stream_chunks(stmt):
+                await queue.put(chunk)
+            await queue.put(None)
+        except Exception as e:
+            await queue.put(e)
+
+    async def _play(self, queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        t0, sim0 = loop.time(), None
+        while True:
+            if queue.empty():
+                self.read_waits += 1
+            chunk = await queue.get()
+            if chunk is None:
+                return
+            if isinstance(chunk, Exception):
+                raise chunk
+            self.chunks += 1
+            pending = []
+            for ts, symbol, price in chunk:
+                if self.speed:
+                    if sim0 is None:
+                        sim0 = ts
+                    delay = t0 + (ts - sim0).total_seconds() / self.speed - loop.time()
+                    if delay > _MIN_SLEEP:
+                        await asyncio.sleep(delay)
+                    elif delay < 0:
+                        self.max_lag = max(self.max_lag, -delay)
+                task = ws.publish_tick(PriceTick(symbol=symbol, price=price, ts=ts))
+                if task is not None:
+                    pending.append(task)
+                self.ticks += 1
+                self.sim_ts = ts
+            if pending:
+                await asyncio.gather(*pending)
+            else:
+                await asyncio.sleep(0)  # let the loop breathe between chunks at max speed
+
+    async def _run(self):
+        queue: asyncio.Queue = asyncio.Queue(maxsize=REPLAY_READ_AHEAD)
+        reader = asyncio.create_task(self._reader(queue))
+        for s in self.symbols:
+            ws.replaying[s] = ws.replaying.get(s, 0) + 1
+        self.status, self.started_at = "running", datetime.utcnow()
+        try:
+            await self._play(queue)
+            self.status = "done"
+        except asyncio.CancelledError:
+            self.status = "stopped"
+        except Exception as e:
+            log.exception("replay %s failed", self.id)
+            self.status, self.error = "failed", str(e)
+        finally:
+            reader.cancel()
+            for s in self.symbols:
+                ws.replaying[s] -= 1
+                if not ws.replaying[s]:
+                    del ws.replaying[s]
+            self.finished_at = datetime.utcnow()
+            log.info("replay %s %s: %d ticks in %.1fs (%.0f ticks/s), max lag %.0f ms, %d reader stalls",
+                     self.id, self.status, self.ticks, self.elapsed, self.rate, self.max_lag * 1e3, self.read_waits)
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return ((self.finished_at or datetime.utcnow()) - self.started_at).total_seconds()
+
+    @property
+    def rate(self) -> float:
+        return self.ticks / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "symbols": self.symbols,
+            "start": self.start,
+            "end": self.end,
+            "speed": self.speed or "max",
+            "status": self.status,
+            "error": self.error,
+            "ticks": self.ticks,
+            "chunks": self.chunks,
+            "elapsed_s": round(self.elapsed, 3),
+            "ticks_per_s": round(self.rate, 1),
+            "replay_ts": self.sim_ts,
+            "max_lag_ms": round(self.max_lag * 1e3, 1),
+            "reader_stalls": self.read_waits,
+        }
+
+
+_replays: Dict[str, Replay] = {}
+
+
+def start_replay(symbols: List[str], start: Optional[datetime] = None, end: Optional[datetime] = None,
+                 speed: float = 1.0) -> Replay:
+    """Start a replay in the background (must be called from the event loop)."""
+    if not symbols:
+        raise ValueError("at least one symbol is required")
+    if speed != 0 and not 1 <= speed <= MAX_SPEED:
+        raise ValueError(f"speed must be between 1 and {MAX_SPEED}, or 0 for as fast as possible")
+    if sum(r.active for r in _replays.values()) >= REPLAY_MAX_ACTIVE:
+        raise RuntimeError(f"{REPLAY_MAX_ACTIVE} replays already running")
+    finished = [r for r in _replays.values() if not r.active]
+    for r in finished[:max(0, len(finished) - REPLAY_KEEP_FINISHED + 1)]:
+        del _replays[r.id]
+    r = Replay(symbols, start, end, speed)
+    _replays[r.id] = r
+    r.start_task()
+    return r
+
+
+def get_replay(rid: str) -> Optional[Replay]:
+    return _replays.get(rid)
+
+
+def list_replays() -> List[Replay]:
+    return list(_replays.values())
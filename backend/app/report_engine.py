@@ -0,0 +1,127 @@
+# file: app/report_engine.py
+"""
+Report rendering, run by app.worker as "report.generate" jobs.
+Each step uses its own session - never the request's.
+
+Exports stream rows from a server-side cursor (yield_per) into a streaming
+CSV / XLSX writer, so memory stays flat regardless of row count. The file is
+written to the object store (app/object_store.py) and its url saved on the
+Report row.
+"""
+import asyncio
+import csv
+from typing import AsyncIterator, Sequence
+
+from app import object_store
+from app.db import AsyncSessionLocal
+from app.exports import EXPORTS, stream_chunks
+from app.jobs import job_handler
+from app.models import Report
+
+XLSX_MAX_ROWS = 1_048_576  # per sheet, including the header row
+
+# template name -> (header, query); shared with the /export endpoints
+TEMPLATES = EXPORTS
+
+
+# --- streaming writers ---
+class CsvWriter:
+    media_type = "text/csv"
+
+    def __init__(self, path, header: Sequence[str]):
+        self._f = open(path, "w", newline="", encoding="utf-8")
+        self._w = csv.writer(self._f)
+        self._w.writerow(header)
+
+    def write_rows(self, rows):
+        self._w.writerows(rows)
+
+    def close(self):
+        self._f.close()
+
+
+class XlsxWriter:
+    """xlsxwriter in constant_memory mode: each row is flushed to disk as it is written."""
+    media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+    def __init__(self, path, header: Sequence[str]):
+        import xlsxwriter
+
+        self._wb = xlsxwriter.Workbook(str(path), {"constant_memory": True, "default_date_format": "yyyy-mm-dd hh:mm:ss"})
+        self._header = list(header)
+        self._sheets = 0
+        self._new_sheet()
+
+    def _new_sheet(self):
+        self._sheets += 1
+        self._ws = self._wb.add_worksheet(f"data{self._sheets}" if self._sheets > 1 else "data")
+        self._ws.write_row(0, 0, self._header)
+        self._row = 1
+
+    def write_rows(self, rows):
+        for r in rows:
+            if self._row >= XLSX_MAX_ROWS:
+                self._new_sheet()
+            self._ws.write_row(self._row, 0, r)
+            self._row += 1
+
+    def close(self):
+        self._wb.close()
+
+
+WRITERS = {"csv": CsvWriter, "xlsx": XlsxWriter}
+
+
+async def write_stream(fmt: str, path, header: Sequence[str], chunks: AsyncIterator[Sequence[tuple]]) -> int:
+    """Drain `chunks` into a writer; file writes run in a thread so other jobs keep going."""
+    writer = WRITERS[fmt](path, header)
+    n = 0
+    try:
+        async for chunk in chunks:
+            await asyncio.to_thread(writer.write_rows, chunk)
+            n += len(chunk)
+    finally:
+        await asyncio.to_thread(writer.close)
+    return n
+
+
+async def render(report_id: str, template: str, fmt: str, params: dict) -> str:
+    """Render a report into the object store and return its url."""
+    if template not in TEMPLATES:
+        raise ValueError(f"unknown template: {template}")
+    if fmt not in WRITERS:
+        raise ValueError(f"unsupported format for {template}: {fmt}")
+    header, stmt = TEMPLATES[template](params or {})
+    key = f"reports/{report_id}.{fmt}"
+    await write_stream(fmt, object_store.staging_path(key), header, stream_chunks(stmt))
+    return object_store.publish(key)
+
+
+async def _set_status(report_id: str, status: str, **values):
+    async with AsyncSessionLocal() as db:
+        r = await db.get(Report, report_id)
+        if r is None:
+            return None
+        r.status = status
+        for k, v in values.items():
+            setattr(r, k, v)
+        await db.commit()
+        return r
+
+
+async def _mark_failed(payload: dict, error: str):
+    await _set_status(payload["report_id"], "failed")
+
+
+async def _mark_pending(payload: dict, error: str):
+    await _set_status(payload["report_id"], "pending")
+
+
+@job_handler("report.generate", on_failure=_mark_failed, on_retry=_mark_pending)
+async def generate_report(payload: dict):
+    report_id = payload["report_id"]
+    r = await _set_status(report_id, "running")
+    if r is None:
+        return  # report deleted while queued
+    url = await render(report_id, r.template, r.format, r.params or {})
+    await _set_status(report_id, "ready", s3_url=url)
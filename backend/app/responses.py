@@ -0,0 +1,20 @@
+# file: app/responses.py
+"""
+Fast path for list endpoints: select plain columns instead of ORM entities and
+serialize the rows with orjson, skipping ORM identity-map work and
+jsonable_encoder's per-object introspection. Output matches what FastAPI
+produced for the ORM objects (all columns, table order, ISO datetimes).
+"""
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import Select, select
+from sqlalchemy.engine import Result
+
+
+def select_columns(model) -> Select:
+    """SELECT every column of `model`'s table as plain row tuples."""
+    return select(*model.__table__.columns)
+
+
+def rows_response(result: Result) -> ORJSONResponse:
+    keys = list(result.keys())
+    return ORJSONResponse([dict(zip(keys, row)) for row in result])
@@ -0,0 +1,282 @@
+# file: app/scenarios.py
+"""
+Weather-driven storage scenarios.
+
+Model (per symbol / storage region): the change in storage between two
+readings is regressed on the population-weighted heating and cooling degree
+days of the weather regions behind that storage region, over the same days:
+
+    delta = a * weeks + b * HDD + c * CDD + e
+
+Degree days come from the weather module (app/api/weather.py): climate
+normals for history and for days past the forecast, the current model run
+(forecast_grid) for the first `forecast_days`. Fits are cached until the
+storage history changes (row count / latest reading).
+
+Scenarios perturb daily temperature with an AR(1) anomaly shared by all
+regions plus a per-region offset, turn that into weighted HDD/CDD per week,
+apply the fitted model plus normal residual noise and accumulate from the
+latest reading to the end of the season. Everything is vectorized in NumPy
+over chunks of scenarios sized to SCENARIO_CELLS (scenarios x regions x days)
+per chunk, so peak memory stays ~100 MB whatever `n` and the horizon, and
+runs in a worker thread; at most SCENARIO_CONCURRENCY simulations run per
+process (more raise ScenariosBusy -> 503). Results are cached per (model,
+parameters, forecast run).
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.weather import BASE_TEMP_C, REGION_POPULATION, forecast_grid, normal_temps, population_weights
+from app.models import StorageLevel
+
+# storage region -> weather regions (census divisions); anything else uses all of them
+STORAGE_WEATHER_REGIONS: Dict[str, List[str]] = {
+    "EAST": ["NEW_ENGLAND", "MID_ATLANTIC", "SOUTH_ATLANTIC"],
+    "MIDWEST": ["EAST_NORTH_CENTRAL", "WEST_NORTH_CENTRAL", "EAST_SOUTH_CENTRAL"],
+    "SOUTH_CENTRAL": ["WEST_SOUTH_CENTRAL"],
+    "MOUNTAIN": ["MOUNTAIN"],
+    "PACIFIC": ["PACIFIC"],
+}
+
+MIN_HISTORY = 13  # readings (12 changes) needed to fit
+MAX_WEEKS = 56  # a withdrawal + injection season is ~52 weeks
+SCENARIO_MAX = 50_000
+SCENARIO_CELLS = 4_000_000  # float32 scenario x region x day cells per chunk: 16 MB per temporary, ~90 MB peak
+SCENARIO_CONCURRENCY = int(os.getenv("SCENARIO_CONCURRENCY", "2"))
+SCENARIO_RETRY_AFTER_SECONDS = 5
+SCENARIO_CACHE_SIZE = 64
+TEMP_SD_C = 2.5  # sd of the daily temperature anomaly
+PERSISTENCE = 0.8  # day-to-day autocorrelation of the anomaly
+REGIONAL_SD_C = 1.0  # sd of each region's offset from the shared anomaly
+FORECAST_DAYS = 14
+QUANTILES = (5, 10, 25, 50, 75, 90, 95)
+HISTOGRAM_BINS = 25
+
+
+_slots = asyncio.Semaphore(SCENARIO_CONCURRENCY)
+
+
+class ScenariosBusy(RuntimeError):
+    """SCENARIO_CONCURRENCY simulations are already running in this process."""
+
+
+def weather_regions(storage_region: str) -> List[str]:
+    return STORAGE_WEATHER_REGIONS.get(storage_region.upper(), list(REGION_POPULATION))
+
+
+@dataclass
+class StorageModel:
+    symbol: str
+    region: str
+    weather_regions: List[str]
+    weights: np.ndarray
+    coef: np.ndarray  # (per week, per weighted HDD, per weighted CDD)
+    sigma: float  # residual sd per week
+    r2: float
+    n_obs: int
+    last_day: np.datetime64
+    last_level: float
+    fingerprint: tuple = ()
+
+    def as_dict(self) -> dict:
+        return {
+            "weather_regions": self.weather_regions,
+            "per_week": round(float(self.coef[0]), 4),
+            "per_hdd": round(float(self.coef[1]), 4),
+            "per_cdd": round(float(self.coef[2]), 4),
+            "sigma_week": round(self.sigma, 4),
+            "r2": round(self.r2, 4),
+            "n_obs": self.n_obs,
+        }
+
+
+def _weighted_dd(temps: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """temps (..., regions, days) -> population-weighted (HDD, CDD) of shape (..., days)."""
+    hdd = np.maximum(0.0, BASE_TEMP_C - temps)
+    cdd = np.maximum(0.0, temps - BASE_TEMP_C)
+    return np.einsum("r,...rd->...d", weights, hdd), np.einsum("r,...rd->...d", weights, cdd)
+
+
+def fit(symbol: str, region: str, days: np.ndarray, levels: np.ndarray) -> StorageModel:
+    """Least-squares fit on readings at datetime64[D] `days` (ascending, unique)."""
+    if len(days) < MIN_HISTORY:
+        raise ValueError(f"need at least {MIN_HISTORY} storage readings to fit, have {len(days)}")
+    regions = weather_regions(region)
+    w = population_weights(regions)
+    span = np.arange(days[0] + 1, days[-1] + 1)
+    hdd, cdd = _weighted_dd(normal_temps(regions, span), w)
+    # degree days summed over each interval (days[i-1], days[i]]
+    ch = np.concatenate(([0.0], np.cumsum(hdd)))
+    cc = np.concatenate(([0.0], np.cumsum(cdd)))
+    idx = (days - days[0]).astype(np.int64)
+    gap = np.diff(idx)
+    X = np.column_stack((gap / 7.0, np.diff(ch[idx]), np.diff(cc[idx])))
+    y = np.diff(levels)
+    coef, *_ = np.linalg.lstsq(X, y, rcond=None)
+    resid = y - X @ coef
+    ss_tot = float(((y - y.mean()) ** 2).sum())
+    sigma = float(np.sqrt((resid ** 2).sum() / max(1, len(y) - 3) / np.mean(gap / 7.0)))
+    return StorageModel(
+        symbol=symbol,
+        region=region,
+        weather_regions=regions,
+        weights=w,
+        coef=coef,
+        sigma=sigma,
+        r2=1.0 - float((resid ** 2).sum()) / ss_tot if ss_tot > 0 else 0.0,
+        n_obs=len(y),
+        last_day=days[-1],
+        last_level=float(levels[-1]),
+    )
+
+
+_models: Dict[Tuple[str, str], StorageModel] = {}
+
+
+async def get_model(db: AsyncSession, symbol: str, region: str) -> StorageModel:
+    """Fitted model for (symbol, region); refit only when the stored history changed."""
+    where = (StorageLevel.symbol == symbol, StorageLevel.region == region)
+    fingerprint = tuple((await db.execute(select(func.count(), func.max(StorageLevel.ts)).where(*where))).one())
+    if not fingerprint[0]:
+        raise LookupError("No storage history for this symbol / region")
+    cached = _models.get((symbol, region))
+    if cached is not None and cached.fingerprint == fingerprint:
+        return cached
+    rows = (await db.execute(select(StorageLevel.ts, StorageLevel.level).where(*where).order_by(StorageLevel.ts))).all()
+    days = np.array([r[0] for r in rows], dtype="datetime64[D]")
+    levels = np.array([r[1] for r in rows], dtype=float)
+    days, last = np.unique(days[::-1], return_index=True)  # one reading per day: the latest
+    model = fit(symbol, region, days, levels[::-1][last])
+    model.fingerprint = fingerprint
+    _models[(symbol, region)] = model
+    return model
+
+
+def season_end(start: date) -> date:
+    """End of the current injection (Oct 31) or withdrawal (Mar 31) season."""
+    if 4 <= start.month <= 10:
+        return date(start.year, 10, 31)
+    return date(start.year + (start.month > 10), 3, 31)
+
+
+def simulate(
+    model: StorageModel,
+    end: date,
+    n: int,
+    temp_sd: float = TEMP_SD_C,
+    persistence: float = PERSISTENCE,
+    regional_sd: float = REGIONAL_SD_C,
+    seed: int = 0,
+    forecast: Optional[Tuple[date, np.ndarray]] = None,
+) -> dict:
+    """
+    `n` weather scenarios from the day after the last reading through `end`.
+    `forecast` = (first day, mean temps (regions, days)) replaces the normals where it applies.
+    """
+    t0 = time.perf_counter()
+    start = model.last_day + 1
+    weeks = int(np.ceil(((np.datetime64(end, "D") - start).astype(np.int64) + 1) / 7))
+    if weeks < 1:
+        raise ValueError("end must be after the latest storage reading")
+    if weeks > MAX_WEEKS:
+        raise ValueError(f"at most {MAX_WEEKS} weeks ahead")
+    n_days = weeks * 7
+    days = np.arange(start, start + n_days)
+    base = normal_temps(model.weather_regions, days)
+    if forecast is not None:
+        first, temps = forecast
+        off = int((np.datetime64(first, "D") - start).astype(np.int64))
+        lo, hi = max(0, off), min(n_days, off + temps.shape[1])
+        if lo < hi:
+            base[:, lo:hi] = temps[:, lo - off:hi - off]
+    base = base.astype(np.float32)
+    w = model.weights.astype(np.float32)
+    per_week, per_hdd, per_cdd = (float(c) for c in model.coef)
+    rng = np.random.default_rng(seed)
+    innov = temp_sd * np.sqrt(1.0 - persistence ** 2)
+
+    paths = np.empty((n, weeks))
+    chunk = max(1, SCENARIO_CELLS // (len(w) * n_days))
+    for s in range(0, n, chunk):
+        m = min(chunk, n - s)
+        anom = rng.standard_normal((m, n_days), dtype=np.float32)
+        anom[:, 0] *= temp_sd
+        anom[:, 1:] *= innov
+        for d in range(1, n_days):  # AR(1) across days, vectorized across scenarios
+            anom[:, d] += persistence * anom[:, d - 1]
+        offset = rng.standard_normal((m, len(w), 1), dtype=np.float32) * regional_sd
+        hdd, cdd = _weighted_dd(base[None] + anom[:, None, :] + offset, w)
+        delta = (per_week + per_hdd * hdd.reshape(m, weeks, 7).sum(axis=2)
+                 + per_cdd * cdd.reshape(m, weeks, 7).sum(axis=2)
+                 + model.sigma * rng.standard_normal((m, weeks)))
+        paths[s:s + m] = model.last_level + np.cumsum(delta, axis=1)
+
+    final = paths[:, -1]
+    counts, edges = np.histogram(final, bins=HISTOGRAM_BINS)
+    fan = np.percentile(paths, (10, 50, 90), axis=0)
+    week_ends = days[6::7]
+    return {
+        "start": {"date": str(model.last_day), "level": round(model.last_level, 2)},
+        "end": str(days[-1]),
+        "weeks": weeks,
+        "scenarios": n,
+        "end_level": {
+            "mean": round(float(final.mean()), 2),
+            "std": round(float(final.std()), 2),
+            "min": round(float(final.min()), 2),
+            "max": round(float(final.max()), 2),
+            "quantiles": {f"p{q}": round(float(v), 2) for q, v in zip(QUANTILES, np.percentile(final, QUANTILES))},
+        },
+        "fan": {
+            "dates": [str(d) for d in week_ends],
+            "p10": np.round(fan[0], 2).tolist(),
+            "p50": np.round(fan[1], 2).tolist(),
+            "p90": np.round(fan[2], 2).tolist(),
+        },
+        "histogram": {"edges": np.round(edges, 2).tolist(), "counts": counts.tolist()},
+        "elapsed_ms": round((time.perf_counter() - t0) * 1e3, 1),
+    }
+
+
+_results: "OrderedDict[tuple, dict]" = OrderedDict()
+
+
+async def run_scenarios(
+    db: AsyncSession,
+    symbol: str,
+    region: str,
+    n: int = 10_000,
+    end: Optional[date] = None,
+    temp_sd: float = TEMP_SD_C,
+    seed: int = 0,
+    forecast_days: int = FORECAST_DAYS,
+) -> dict:
+    model = await get_model(db, symbol, region)
+    end = end or season_end((model.last_day + 1).item())
+    forecast, run = None, None
+    if forecast_days:
+        run, tmin, tmax = forecast_grid(model.weather_regions, forecast_days)
+        forecast = (run.date(), (tmin + tmax) / 2)
+    key = (symbol, region, model.fingerprint, n, end, temp_sd, seed, forecast_days, run)
+    hit = _results.get(key)
+    if hit is not None:
+        _results.move_to_end(key)
+        return {**hit, "cached": True}
+    if _slots.locked():
+        raise ScenariosBusy("Too many scenario runs in progress")
+    async with _slots:
+        result = await asyncio.to_thread(simulate, model, end, n, temp_sd, PERSISTENCE, REGIONAL_SD_C, seed, forecast)
+    result = {"symbol": symbol, "region": region, "model": model.as_dict(), "forecast_run": run, **result}
+    _results[key] = result
+    while len(_results) > SCENARIO_CACHE_SIZE:
+        _results.popitem(last=False)
+    return {**result, "cached": False}
@@ -1,5 +1,5 @@
 # file: app/schemas.py
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
@@ -69,6 +69,28 @@ class ForecastResponse(BaseModel):
     horizon_days: int
     series: List[ForecastPoint]
 
+class RegionForecast(BaseModel):
+    # columnar: one value per entry in MultiForecastResponse.dates
+    region: str
+    temp_max: List[float]
+    temp_min: List[float]
+    hdd: List[float]
+    cdd: List[float]
+
+class DegreeDayAggregate(BaseModel):
+    regions: List[str]
+    weights: Dict[str, float]
+    hdd: List[float]
+    cdd: List[float]
+
+class MultiForecastResponse(BaseModel):
+    model: str
+    run: datetime
+    horizon_days: int
+    dates: List[datetime]
+    regions: List[RegionForecast]
+    aggregate: Optional[DegreeDayAggregate] = None
+
 # --- Workspaces ---
 class WorkspaceCreate(BaseModel):
     name: str
@@ -93,11 +115,27 @@ class AlertExecution(BaseModel):
     ts: datetime
     triggered_value: Any
 
+# --- Replay ---
+class ReplayRequest(BaseModel):
+    symbols: List[str] = Field(..., min_length=1)
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    # 1-1000x real time (app.replay.MAX_SPEED), 0 = as fast as possible
+    speed: float = Field(1.0, ge=0, le=1000, description="1-1000x real time, 0 = as fast as possible")
+
+    @field_validator("speed")
+    @classmethod
+    def _speed(cls, v: float) -> float:
+        if 0 < v < 1:
+            raise ValueError("speed must be between 1 and 1000, or 0 for as fast as possible")
+        return v
+
 # --- Reports ---
 class ReportRequest(BaseModel):
     template: str
     workspace_id: Optional[str]
-    format: str = "pdf"  # pdf or xlsx
+    format: str = "csv"  # csv or xlsx
+    params: Dict[str, Any] = {}  # template parameters, e.g. {"symbol": "NG", "start": "2020-01-01"}
 
 class ReportResponse(BaseModel):
     report_id: str
@@ -0,0 +1,137 @@
+# file: app/storage_ingest.py
+"""
+Bulk loader for weekly storage reports (EIA style) into storage_levels.
+
+Rows are read in chunks from CSV / NDJSON / JSON files and upserted on
+(symbol, region, ts) with the shared bulk loader (app/bulk_ingest.py):
+COPY + merge on Postgres + asyncpg, multi-row INSERT .. ON CONFLICT
+otherwise. Parsing runs in a worker thread one chunk at a time; a malformed
+row raises ValueError naming the row. Symbols are stored canonical
+(registry.canonical: CL -> WTI), the form the read paths query.
+
+avg_5y is then recomputed only for the weeks touched by the load (and the
+same weeks in the following five years, whose average depends on them).
+
+CLI:
+    python -m app.storage_ingest history.csv weekly.ndjson --symbol NG
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, TextIO, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import bulk_ingest
+from app.bulk_ingest import CHUNK_SIZE, UpsertTarget
+from app.models import StorageLevel
+from app.symbols import registry
+
+AVG_YEARS = 5
+TARGET = UpsertTarget(StorageLevel, key=("symbol", "region", "ts"), values=("level",), id_prefix="stg")
+
+Key = Tuple[str, str]  # (symbol, region)
+
+
+# --- parsing ---
+def _parse_ts(value) -> datetime:
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        s = str(value).strip()
+        if s.endswith("Z"):
+            s = s[:-1] + "+00:00"
+        dt = datetime.fromisoformat(s)
+    # storage_levels.ts is naive UTC
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def _normalize(raw: dict, default_symbol: str) -> dict:
+    # accepts our own column names as well as EIA API v2 ones (period / value)
+    ts = raw.get("ts") or raw.get("date") or raw.get("period")
+    level = raw.get("level") if raw.get("level") not in (None, "") else raw.get("value")
+    return {
+        "symbol": registry.canonical(str(raw.get("symbol") or default_symbol)),
+        "region": str(raw["region"]).upper(),
+        "ts": _parse_ts(ts),
+        "level": float(level),
+    }
+
+
+def iter_rows(fh: TextIO, fmt: str = "csv", symbol: str = "NG") -> Iterator[dict]:
+    return bulk_ingest.iter_rows(fh, fmt, _normalize, symbol)
+
+
+async def upsert_chunk(db: AsyncSession, rows: List[dict]):
+    await bulk_ingest.upsert_chunk(db, TARGET, rows)
+
+
+# --- 5y average ---
+def _week_key(ts: datetime) -> Tuple[int, int]:
+    iso = ts.isocalendar()
+    return iso[0], iso[1]
+
+
+async def recompute_avg_5y(db: AsyncSession, affected: Dict[Key, List[datetime]]) -> int:
+    """
+    Recompute avg_5y (mean level of the same ISO week in the previous five years)
+    for the affected weeks and the weeks that depend on them. Only the window
+    [min - 5y, max + 5y] of each (symbol, region) is read.
+    """
+    span = timedelta(days=366 * AVG_YEARS + 7)
+    updated = 0
+    for (symbol, region), stamps in affected.items():
+        q = await db.execute(
+            select(StorageLevel.id, StorageLevel.ts, StorageLevel.level, StorageLevel.avg_5y)
+            .where(
+                StorageLevel.symbol == symbol,
+                StorageLevel.region == region,
+                StorageLevel.ts >= min(stamps) - span,
+                StorageLevel.ts <= max(stamps) + span,
+            )
+        )
+        rows = q.all()
+        levels = {_week_key(r.ts): r.level for r in rows}
+
+        targets = set()
+        for ts in stamps:
+            y, w = _week_key(ts)
+            targets.update((y + k, w) for k in range(AVG_YEARS + 1))
+
+        params = []
+        for r in rows:
+            y, w = _week_key(r.ts)
+            if (y, w) not in targets:
+                continue
+            prior = [levels[(y - k, w)] for k in range(1, AVG_YEARS + 1) if (y - k, w) in levels]
+            avg = round(sum(prior) / len(prior), 2) if prior else None
+            if avg != r.avg_5y:
+                params.append({"id": r.id, "avg_5y": avg})
+        if params:
+            # ORM bulk UPDATE by primary key -> executemany
+            await db.execute(update(StorageLevel), params)
+            updated += len(params)
+    return updated
+
+
+async def ingest_storage(db: AsyncSession, fh: TextIO, fmt: str = "csv", symbol: str = "NG",
+                         chunk_size: int = CHUNK_SIZE) -> dict:
+    """Load one file in a single transaction. Returns row / avg_5y update counts."""
+    affected: Dict[Key, List[datetime]] = {}
+    total = 0
+    async for chunk in bulk_ingest.iter_chunks(iter_rows(fh, fmt, symbol), TARGET, chunk_size):
+        await upsert_chunk(db, chunk)
+        total += len(chunk)
+        for r in chunk:
+            affected.setdefault((r["symbol"], r["region"]), []).append(r["ts"])
+    recomputed = await recompute_avg_5y(db, affected) if affected else 0
+    await db.commit()
+    return {"rows": total, "series": len(affected), "avg_5y_updated": recomputed}
+
+
+if __name__ == "__main__":
+    bulk_ingest.main(
+        "Bulk load storage history into storage_levels", ingest_storage,
+        lambda res: f"{res['rows']} rows, {res['series']} series, {res['avg_5y_updated']} avg_5y updated",
+    )
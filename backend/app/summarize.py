@@ -0,0 +1,341 @@
+# file: app/summarize.py
+"""
+Article summarization off the news ingest path.
+
+The poller hands each new article to Summarizer.submit(), which never waits:
+- a summary already cached for the same content (syndicated copies of one
+  story hash the same) is returned right away
+- an article whose content is already queued or in flight is attached to
+  that job instead of being summarized twice
+- otherwise it is queued (the oldest queued job is dropped past
+  SUMMARY_QUEUE_MAX - the item just keeps its extractive summary)
+
+Summarizer.run() (the "summaries" background task) collects the queue into
+micro-batches, closed at SUMMARY_BATCH_SIZE articles / SUMMARY_BATCH_TOKENS
+input tokens or SUMMARY_BATCH_WAIT_SECONDS after the oldest job arrived, and
+sends them to the backend with at most SUMMARY_CONCURRENCY batches in flight
+and SUMMARY_TOKENS_PER_MINUTE (input + max output) spent. Finished batches go
+to the on_ready callback, which updates the items and pushes them to /ws/news.
+
+Backends implement SummaryBackend.summarize(texts, max_tokens). SUMMARY_BACKEND
+picks one: none (default, stage off), stub (lead-sentence extract after
+SUMMARY_STUB_LATENCY_MS, for local runs and benchmarks) or "package.module:attr"
+for a backend class / factory.
+"""
+import abc
+import asyncio
+import hashlib
+import importlib
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from app import metrics
+
+log = logging.getLogger("oriza.summarize")
+
+SUMMARY_BACKEND = os.getenv("SUMMARY_BACKEND", "none")
+SUMMARY_BATCH_SIZE = int(os.getenv("SUMMARY_BATCH_SIZE", "16"))
+SUMMARY_BATCH_TOKENS = int(os.getenv("SUMMARY_BATCH_TOKENS", "8000"))
+SUMMARY_BATCH_WAIT_SECONDS = float(os.getenv("SUMMARY_BATCH_WAIT_SECONDS", "0.5"))
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "2"))
+SUMMARY_TOKENS_PER_MINUTE = int(os.getenv("SUMMARY_TOKENS_PER_MINUTE", "200000"))
+SUMMARY_MAX_INPUT_TOKENS = int(os.getenv("SUMMARY_MAX_INPUT_TOKENS", "1000"))
+SUMMARY_MAX_OUTPUT_TOKENS = int(os.getenv("SUMMARY_MAX_OUTPUT_TOKENS", "80"))
+SUMMARY_QUEUE_MAX = int(os.getenv("SUMMARY_QUEUE_MAX", "1000"))
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "5000"))
+SUMMARY_TIMEOUT_SECONDS = float(os.getenv("SUMMARY_TIMEOUT_SECONDS", "60"))
+SUMMARY_STUB_LATENCY_MS = float(os.getenv("SUMMARY_STUB_LATENCY_MS", "200"))
+SUMMARY_MIN_CHARS = 280  # shorter articles are their own summary
+CHARS_PER_TOKEN = 4  # rough, model-agnostic estimate
+MAX_INPUT_CHARS = SUMMARY_MAX_INPUT_TOKENS * CHARS_PER_TOKEN
+
+requests_total = metrics.counter(
+    "oriza_summary_requests_total", "Articles submitted for summarization by outcome", ("result",))
+batch_seconds = metrics.histogram("oriza_summary_batch_seconds", "Backend time per batch", buckets=metrics.SLOW_BUCKETS)
+batch_size = metrics.histogram("oriza_summary_batch_size", "Articles per batch", buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+tokens_total = metrics.counter("oriza_summary_tokens_total", "Tokens charged to the budget (input + max output)")
+budget_wait = metrics.counter("oriza_summary_budget_wait_seconds_total", "Time batches waited for token budget")
+failures_total = metrics.counter("oriza_summary_failures_total", "Batches that failed or timed out")
+
+# (item ids, summary) per summarized article
+Results = List[Tuple[List[str], str]]
+
+
+def content_key(text: str) -> str:
+    """Hash of the whitespace/case-normalized text, so re-published copies share a cache entry."""
+    return hashlib.sha256(" ".join(text.lower().split()).encode("utf-8")).hexdigest()
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+class SummaryBackend(abc.ABC):
+    """A summarization model. summarize() returns one summary per text, in order."""
+    name = "base"
+
+    @abc.abstractmethod
+    async def summarize(self, texts: List[str], max_tokens: int) -> List[str]:
+        ...
+
+    async def aclose(self):
+        pass
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def _lead(text: str, max_chars: int) -> str:
+    out = ""
+    for sentence in _SENTENCE_END.split(text.strip()):
+        if len(out) + len(sentence) + 1 > max_chars:
+            break
+        out = f"{out} {sentence}" if out else sentence
+    if not out:
+        out = text[:max_chars].rsplit(" ", 1)[0] + "..."
+    return out
+
+
+class StubBackend(SummaryBackend):
+    """Local stand-in for a model: lead sentences, after latency_ms per batch."""
+    name = "stub"
+
+    def __init__(self, latency_ms: float = SUMMARY_STUB_LATENCY_MS):
+        self.latency = latency_ms / 1000
+        self.calls = 0
+        self.texts = 0
+
+    async def summarize(self, texts: List[str], max_tokens: int) -> List[str]:
+        self.calls += 1
+        self.texts += len(texts)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [_lead(t, max_tokens * CHARS_PER_TOKEN) for t in texts]
+
+
+def load_backend(spec: str = SUMMARY_BACKEND) -> Optional[SummaryBackend]:
+    spec = (spec or "").strip()
+    if spec.lower() in ("", "none", "off", "0"):
+        return None
+    if spec.lower() == "stub":
+        return StubBackend()
+    module, _, attr = spec.partition(":")
+    backend = getattr(importlib.import_module(module), attr or "Backend")()
+    if not isinstance(backend, SummaryBackend):
+        raise TypeError(f"SUMMARY_BACKEND={spec} built a {type(backend).__name__}, not a SummaryBackend")
+    return backend
+
+
+class TokenBudget:
+    """Token bucket: `per_minute` tokens, refilled continuously, at most one minute's worth banked."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self._t = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._t) * self.rate)
+        self._t = now
+
+    async def acquire(self, n: int) -> float:
+        """Wait until `n` tokens are available and take them; returns seconds waited."""
+        n = min(float(n), self.capacity)
+        waited = 0.0
+        self._refill()
+        while self.tokens < n:
+            delay = (n - self.tokens) / self.rate
+            await asyncio.sleep(delay)
+            waited += delay
+            self._refill()
+        self.tokens -= n
+        return waited
+
+
+@dataclass
+class _Job:
+    key: str
+    text: str
+    tokens: int
+    ids: List[str]
+    queued_at: float = field(default_factory=time.monotonic)
+
+
+class Summarizer:
+    def __init__(
+        self,
+        on_ready: Callable[[Results], Awaitable[None]],
+        backend: Optional[SummaryBackend] = None,
+        batch_size: int = SUMMARY_BATCH_SIZE,
+        batch_tokens: int = SUMMARY_BATCH_TOKENS,
+        batch_wait: float = SUMMARY_BATCH_WAIT_SECONDS,
+        concurrency: int = SUMMARY_CONCURRENCY,
+        tokens_per_minute: int = SUMMARY_TOKENS_PER_MINUTE,
+        max_output_tokens: int = SUMMARY_MAX_OUTPUT_TOKENS,
+        queue_max: int = SUMMARY_QUEUE_MAX,
+        cache_size: int = SUMMARY_CACHE_SIZE,
+    ):
+        self.on_ready = on_ready
+        self.backend = backend
+        self.batch_size = batch_size
+        self.batch_tokens = batch_tokens
+        self.batch_wait = batch_wait
+        self.concurrency = concurrency
+        self.budget = TokenBudget(tokens_per_minute)
+        self.max_output_tokens = max_output_tokens
+        self.queue_max = queue_max
+        self.cache_size = cache_size
+        self.running = False
+        self._pending: "OrderedDict[str, _Job]" = OrderedDict()  # queue, oldest first; keyed for dedupe
+        self._inflight: dict = {}  # key -> _Job
+        self._cache: "OrderedDict[str, str]" = OrderedDict()  # LRU: key -> summary
+        self._batches: set = set()
+        self._wake = asyncio.Event()
+
+    @property
+    def queued(self) -> int:
+        return len(self._pending)
+
+    @property
+    def idle(self) -> bool:
+        return not (self._pending or self._inflight)
+
+    def submit(self, item_id: str, text: str) -> Optional[str]:
+        """Queue an article; returns its summary right away when the content is already cached."""
+        if not self.running or len(text) < SUMMARY_MIN_CHARS:
+            requests_total.inc("skipped")
+            return None
+        text = text[:MAX_INPUT_CHARS]
+        key = content_key(text)
+        summary = self._cache.get(key)
+        if summary is not None:
+            self._cache.move_to_end(key)
+            requests_total.inc("cached")
+            return summary
+        job = self._pending.get(key) or self._inflight.get(key)
+        if job is not None:
+            job.ids.append(item_id)
+            requests_total.inc("deduped")
+            return None
+        if len(self._pending) >= self.queue_max:
+            self._pending.popitem(last=False)
+            requests_total.inc("dropped")
+        self._pending[key] = _Job(key, text, estimate_tokens(text), [item_id])
+        requests_total.inc("queued")
+        self._wake.set()
+        return None
+
+    def _take_batch(self) -> List[_Job]:
+        batch: List[_Job] = []
+        tokens = 0
+        while self._pending and len(batch) < self.batch_size:
+            job = next(iter(self._pending.values()))
+            if batch and tokens + job.tokens > self.batch_tokens:
+                break
+            del self._pending[job.key]
+            self._inflight[job.key] = job
+            batch.append(job)
+            tokens += job.tokens
+        return batch
+
+    def _batch_ready(self) -> bool:
+        if len(self._pending) >= self.batch_size:
+            return True
+        return sum(j.tokens for j in self._pending.values()) >= self.batch_tokens
+
+    async def _wait(self, stop: asyncio.Event, timeout: Optional[float]):
+        self._wake.clear()
+        waiters = [asyncio.ensure_future(self._wake.wait()), asyncio.ensure_future(stop.wait())]
+        try:
+            await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for w in waiters:
+                w.cancel()
+
+    async def run(self, stop: asyncio.Event):
+        """Batching loop; returns once `stop` is set (in-flight batches are cancelled)."""
+        owned = self.backend is None
+        if owned:
+            self.backend = load_backend()
+        if self.backend is None:
+            await stop.wait()
+            return
+        sem = asyncio.Semaphore(self.concurrency)
+        self.running = True
+        log.info("summarization backend %s (batch %d, concurrency %d)",
+                 self.backend.name, self.batch_size, self.concurrency)
+        try:
+            while not stop.is_set():
+                if not self._pending:
+                    await self._wait(stop, None)
+                    continue
+                # micro-batch: close on size / tokens, or when the oldest job has waited long enough
+                deadline = next(iter(self._pending.values())).queued_at + self.batch_wait
+                while not self._batch_ready() and not stop.is_set():
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        break
+                    await self._wait(stop, left)
+                if stop.is_set():
+                    break
+                await sem.acquire()  # backpressure: jobs keep queueing (and deduping) meanwhile
+                batch = self._take_batch()
+                if not batch:
+                    sem.release()
+                    continue
+                charged = sum(j.tokens for j in batch) + self.max_output_tokens * len(batch)
+                budget_wait.inc(amount=await self.budget.acquire(charged))
+                tokens_total.inc(amount=charged)
+                task = asyncio.create_task(self._run_batch(batch, sem))
+                self._batches.add(task)
+                task.add_done_callback(self._batches.discard)
+        finally:
+            self.running = False
+            for task in list(self._batches):
+                task.cancel()
+            await asyncio.gather(*self._batches, return_exceptions=True)
+            for job in self._inflight.values():  # not finished: retry after a restart
+                self._pending[job.key] = job
+            self._inflight.clear()
+            if owned:  # a restart loads a fresh one
+                await self.backend.aclose()
+                self.backend = None
+
+    async def _run_batch(self, batch: List[_Job], sem: asyncio.Semaphore):
+        t0 = time.perf_counter()
+        try:
+            summaries = await asyncio.wait_for(
+                self.backend.summarize([j.text for j in batch], self.max_output_tokens), SUMMARY_TIMEOUT_SECONDS)
+            if len(summaries) != len(batch):
+                raise ValueError(f"backend returned {len(summaries)} summaries for {len(batch)} texts")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            failures_total.inc()
+            log.warning("summary batch of %d failed: %s", len(batch), e)
+            for job in batch:
+                self._inflight.pop(job.key, None)
+            return
+        finally:
+            sem.release()
+            batch_seconds.observe(time.perf_counter() - t0)
+            batch_size.observe(len(batch))
+
+        results: Results = []
+        for job, summary in zip(batch, summaries):
+            self._inflight.pop(job.key, None)
+            self._cache[job.key] = summary
+            results.append((job.ids, summary))
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        try:
+            await self.on_ready(results)
+        except Exception:
+            log.exception("summary callback failed")
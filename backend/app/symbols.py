@@ -0,0 +1,293 @@
+# file: app/symbols.py
+"""
+In-memory commodity symbol registry: canonical resolution, autocomplete and
+ticker detection without touching the DB on the request path.
+
+Entries are the commodities table merged over BUILTIN (well-known symbols
+and their aliases, so resolution works before the first load and for
+symbols nobody has inserted yet). Only symbols in the table are listed:
+all(), get() and search() - what /commodities serves - skip BUILTIN-only
+entries, which just feed resolution. Every process refreshes it from the DB
+every SYMBOLS_REFRESH_SECONDS ("symbols" background task) and rebuilds the
+indexes only when the rows changed; a rebuild swaps in a new _Index, so
+readers never see a half-built one.
+
+- resolve("nat gas") / canonical("ng") -> "NG": symbol, alias, name or hub
+  (hubs only when unambiguous); canonical() falls back to upper-case so
+  unknown symbols keep working as before
+- search("hen") -> ranked prefix matches over symbols, aliases, names, hubs
+  and every word inside them: a bisect into one sorted key list
+- tickers_in(headline) -> symbols mentioned in free text (news tagging)
+- metric_label(symbol) -> the symbol, or "other" for ones the registry doesn't
+  know, so client-supplied symbols can't blow up metric label cardinality
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import re
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import AsyncSessionLocal
+from app.models import Commodity
+from app.tasks import background_task
+
+log = logging.getLogger("oriza.symbols")
+
+SYMBOLS_REFRESH_SECONDS = float(os.getenv("SYMBOLS_REFRESH_SECONDS", "60"))
+SEARCH_LIMIT = 10
+SEARCH_SCAN = 256  # prefix keys examined per search, bounds very short queries
+SEARCH_CACHE_SIZE = 4096  # results memoized per index version (autocomplete repeats prefixes)
+MIN_PHRASE_CHARS = 3  # shorter aliases only match upper-case tokens in text (NG, CL)
+OTHER_LABEL = "other"
+
+# symbol -> (name, sector, aliases)
+BUILTIN: Dict[str, Tuple[str, str, Tuple[str, ...]]] = {
+    "NG": ("Henry Hub Natural Gas", "energy", ("natural gas", "nat gas", "natgas", "henry hub", "nymex gas")),
+    "WTI": ("WTI Crude Oil", "energy", ("CL", "crude", "crude oil", "west texas intermediate", "us crude")),
+    "BRENT": ("Brent Crude Oil", "energy", ("Brent", "ice brent", "north sea crude")),
+    "JKM": ("Platts JKM LNG", "energy", ("japan korea marker", "asian lng", "asia lng")),
+    "TTF": ("Dutch TTF Natural Gas", "energy", ("dutch ttf", "dutch gas", "european gas")),
+    "GOLD": ("Gold", "metals", ("XAU", "bullion")),
+    "SILVER": ("Silver", "metals", ("XAG",)),
+    "COPPER": ("Copper", "metals", ("HG", "comex copper")),
+}
+
+# search ranks: lower is better
+RANK_SYMBOL, RANK_ALIAS, RANK_NAME, RANK_HUB, RANK_WORD = range(5)
+_KINDS = ("symbol", "alias", "name", "hub", "word")
+_WORD = re.compile(r"[A-Za-z0-9&]+")
+
+
+def _norm(text: str) -> str:
+    return " ".join(_WORD.findall((text or "").lower()))
+
+
+@dataclass(frozen=True)
+class Symbol:
+    symbol: str
+    name: str
+    sector: Optional[str] = None
+    hubs: Tuple[str, ...] = ()
+    aliases: Tuple[str, ...] = ()
+    description: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        # same shape as a commodities row
+        return {"symbol": self.symbol, "name": self.name, "sector": self.sector,
+                "hubs": list(self.hubs), "description": self.description}
+
+
+class _Index:
+    """Everything derived from one set of entries; built once, then read-only."""
+
+    def __init__(self, entries: Iterable[Symbol], version: int, listed: Iterable[str] = ()):
+        self.version = version
+        self.by_symbol: Dict[str, Symbol] = {s.symbol: s for s in entries}
+        self.listed = frozenset(listed) & self.by_symbol.keys()  # symbols in the commodities table
+        self.listed_sorted = sorted(self.listed)
+        self.lookup: Dict[str, str] = {}  # normalized term -> symbol (exact resolution)
+        self.phrases: Dict[str, str] = {}  # normalized term -> symbol (text matching)
+        rows: List[Tuple[str, int, str, str]] = []  # (key, rank, symbol, matched label), listed symbols only
+        ambiguous = set()
+
+        for s in self.by_symbol.values():
+            terms = [(s.symbol, RANK_SYMBOL)] + [(a, RANK_ALIAS) for a in s.aliases] + [(s.name, RANK_NAME)]
+            terms += [(h, RANK_HUB) for h in s.hubs]
+            for label, rank in terms:
+                key = _norm(label)
+                if not key:
+                    continue
+                if s.symbol in self.listed:
+                    rows.append((key, rank, s.symbol, label))
+                    words = key.split(" ")
+                    for i in range(1, len(words)):  # "natural gas" is found by "gas" too
+                        rows.append((" ".join(words[i:]), RANK_WORD, s.symbol, label))
+                owner = self.lookup.get(key)
+                if owner is None:
+                    self.lookup[key] = s.symbol
+                elif owner != s.symbol and rank == RANK_HUB:
+                    ambiguous.add(key)
+                if len(key) >= MIN_PHRASE_CHARS:
+                    self.phrases.setdefault(key, s.symbol)
+        # a symbol always resolves to itself, even if another entry uses it as an alias / hub
+        for sym in self.by_symbol:
+            self.lookup[sym.lower()] = sym
+            ambiguous.discard(sym.lower())
+        for key in ambiguous:
+            self.lookup.pop(key, None)
+            self.phrases.pop(key, None)
+
+        best_rank: Dict[Tuple[str, str], tuple] = {}  # one row per (key, symbol): its best rank
+        for row in rows:
+            k = (row[0], row[2])
+            if k not in best_rank or row[1] < best_rank[k][1]:
+                best_rank[k] = row
+        rows = sorted(best_rank.values())
+        self.keys = [r[0] for r in rows]
+        self.rows = rows
+        self.search_cache: Dict[Tuple[str, int], List[dict]] = {}
+        self.max_words = max((k.count(" ") + 1 for k in self.phrases), default=1)
+        self.list_json = orjson.dumps([self.by_symbol[k].as_dict() for k in self.listed_sorted])
+
+
+def _builtin_entries() -> List[Symbol]:
+    return [Symbol(sym, name, sector, (), aliases) for sym, (name, sector, aliases) in BUILTIN.items()]
+
+
+class SymbolRegistry:
+    def __init__(self):
+        self._index = _Index(_builtin_entries(), 0)
+        self.loaded = False
+        self._fingerprint: Optional[str] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._index.version
+
+    def build(self, rows: Iterable[tuple]):
+        """Swap in a new index from (symbol, name, sector, hubs, description) rows merged over BUILTIN."""
+        entries = {s.symbol: s for s in _builtin_entries()}
+        listed = []
+        for symbol, name, sector, hubs, description in rows:
+            sym = symbol.strip().upper()
+            listed.append(sym)
+            builtin = entries.get(sym)
+            entries[sym] = Symbol(
+                symbol=sym,
+                name=name or (builtin.name if builtin else sym),
+                sector=sector or (builtin.sector if builtin else None),
+                hubs=tuple(h for h in (hubs or []) if isinstance(h, str)),
+                aliases=builtin.aliases if builtin else (),
+                description=description,
+            )
+        self._index = _Index(entries.values(), self._index.version + 1, listed)
+
+    async def refresh(self, db: AsyncSession) -> bool:
+        """Reload from the commodities table; rebuilds only if the rows changed. Returns True if rebuilt."""
+        async with self._lock:
+            q = await db.execute(
+                select(Commodity.symbol, Commodity.name, Commodity.sector, Commodity.hubs, Commodity.description)
+                .order_by(Commodity.symbol)
+            )
+            rows = [tuple(r) for r in q.all()]
+            fingerprint = hashlib.sha1(orjson.dumps(rows, default=str)).hexdigest()
+            changed = fingerprint != self._fingerprint
+            if changed:
+                self.build(rows)
+                self._fingerprint = fingerprint
+            self.loaded = True
+            return changed
+
+    # --- lookups (no I/O) ---
+    def get(self, symbol: str) -> Optional[Symbol]:
+        """The listed entry a symbol / alias / name / hub resolves to."""
+        idx = self._index
+        sym = idx.lookup.get(_norm(symbol))
+        return idx.by_symbol[sym] if sym in idx.listed else None
+
+    def resolve(self, text: str) -> Optional[str]:
+        """Canonical symbol for a symbol / alias / name / unambiguous hub, else None."""
+        return self._index.lookup.get(_norm(text))
+
+    def canonical(self, symbol: str) -> str:
+        """resolve(), falling back to the upper-cased input for symbols the registry doesn't know."""
+        return self._index.lookup.get(_norm(symbol)) or (symbol or "").strip().upper()
+
+    def all(self) -> List[Symbol]:
+        idx = self._index
+        return [idx.by_symbol[k] for k in idx.listed_sorted]
+
+    def list_json(self) -> bytes:
+        return self._index.list_json
+
+    def search(self, q: str, limit: int = SEARCH_LIMIT) -> List[dict]:
+        """Prefix matches, best per symbol: exact before prefix, then symbol < alias < name < hub < inner word."""
+        nq = _norm(q)
+        if not nq:
+            return []
+        idx = self._index
+        cached = idx.search_cache.get((nq, limit))
+        if cached is not None:
+            return cached
+        start = bisect_left(idx.keys, nq)
+        best: Dict[str, tuple] = {}
+        for key, rank, sym, label in idx.rows[start:start + SEARCH_SCAN]:
+            if not key.startswith(nq):
+                break
+            score = (key != nq, rank, len(key))
+            if sym not in best or score < best[sym][0]:
+                best[sym] = (score, rank, label)
+        out = []
+        for sym, (_, rank, label) in sorted(best.items(), key=lambda kv: (kv[1][0], kv[0]))[:limit]:
+            s = idx.by_symbol[sym]
+            out.append({"symbol": sym, "name": s.name, "sector": s.sector, "match": label, "kind": _KINDS[rank]})
+        if len(idx.search_cache) >= SEARCH_CACHE_SIZE:
+            idx.search_cache.clear()
+        idx.search_cache[(nq, limit)] = out
+        return out
+
+    def tickers_in(self, text: str) -> List[str]:
+        """Symbols mentioned in free text: upper-case symbol / short alias tokens, or longer aliases,
+        names and hubs in any case (longest phrase wins)."""
+        idx = self._index
+        tokens = _WORD.findall(text or "")
+        words = [t.lower() for t in tokens]
+        found: List[str] = []
+        i = 0
+        while i < len(words):
+            for n in range(min(idx.max_words, len(words) - i), 0, -1):
+                sym = idx.phrases.get(" ".join(words[i:i + n]))
+                if sym is None and n == 1 and tokens[i].isupper():
+                    sym = idx.lookup.get(words[i])
+                if sym is not None:
+                    if sym not in found:
+                        found.append(sym)
+                    i += n - 1
+                    break
+            i += 1
+        return found
+
+
+registry = SymbolRegistry()
+
+
+def metric_label(symbol: str) -> str:
+    return symbol if registry.resolve(symbol) == symbol else OTHER_LABEL
+
+
+def label_counts(counts: Iterable[Tuple[str, float]]) -> Dict[Tuple[str], float]:
+    """(symbol, value) pairs -> gauge samples keyed by metric_label, unknown symbols summed."""
+    out: Dict[Tuple[str], float] = {}
+    for sym, n in counts:
+        key = (metric_label(sym),)
+        out[key] = out.get(key, 0) + n
+    return out
+
+
+async def ensure_loaded(db: AsyncSession):
+    """Load from the DB on first use (the refresh task normally gets there first)."""
+    if not registry.loaded:
+        await registry.refresh(db)
+
+
+@background_task("symbols", every_process=True)
+async def _refresh_loop(stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            async with AsyncSessionLocal() as db:
+                if await registry.refresh(db):
+                    log.info("symbol registry v%d: %d symbols", registry.version, len(registry.all()))
+        except Exception as e:
+            log.warning("symbol registry refresh failed: %s", e)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=SYMBOLS_REFRESH_SECONDS)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,138 @@
+# file: app/tasks.py
+"""
+Supervisor for the API process's long-running background loops (synthetic
+tick generator, news poller, ...), driven by the app lifespan in main.py.
+Nothing starts at import time.
+
+A loop is registered with @background_task(name) and must have the signature
+`async def loop(stop: asyncio.Event)`, returning once `stop` is set. If it
+raises - or returns while the app is still up - it is restarted with
+exponential backoff (reset after it has run for TASK_HEALTHY_SECONDS).
+
+BACKGROUND_TASKS selects which registered loops run in this process:
+    all (default) | none | comma-separated names, e.g. "ticks,news"
+With several API workers, run them in one (BACKGROUND_TASKS=all) and set
+BACKGROUND_TASKS=none for the others. Loops registered with
+every_process=True (per-process monitoring) run regardless.
+"""
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+
+log = logging.getLogger("oriza.tasks")
+
+BACKGROUND_TASKS = os.getenv("BACKGROUND_TASKS", "all")
+TASK_RESTART_BASE_SECONDS = float(os.getenv("TASK_RESTART_BASE_SECONDS", "1"))
+TASK_RESTART_MAX_SECONDS = float(os.getenv("TASK_RESTART_MAX_SECONDS", "60"))
+TASK_HEALTHY_SECONDS = 60.0
+TASK_STOP_TIMEOUT_SECONDS = 10.0
+
+LoopFn = Callable[[asyncio.Event], Awaitable[None]]
+
+
+@dataclass
+class TaskState:
+    fn: LoopFn
+    task: Optional[asyncio.Task] = None
+    restarts: int = 0
+    last_error: Optional[str] = None
+    started_at: Optional[float] = None
+
+
+class Supervisor:
+    def __init__(self):
+        self._registry: Dict[str, LoopFn] = {}
+        self._every_process: set = set()
+        self._running: Dict[str, TaskState] = {}
+        self._stop: Optional[asyncio.Event] = None
+
+    def register(self, name: str, fn: LoopFn, every_process: bool = False):
+        self._registry[name] = fn
+        if every_process:
+            self._every_process.add(name)
+
+    def enabled(self, setting: Optional[str] = None) -> list:
+        setting = (BACKGROUND_TASKS if setting is None else setting).strip().lower()
+        if setting in ("", "none", "0", "false"):
+            wanted = []
+        elif setting == "all":
+            wanted = list(self._registry)
+        else:
+            wanted = [n.strip() for n in setting.split(",") if n.strip()]
+            unknown = [n for n in wanted if n not in self._registry]
+            if unknown:
+                log.warning("BACKGROUND_TASKS names unknown tasks: %s", ", ".join(unknown))
+        return [n for n in self._registry if n in wanted or n in self._every_process]
+
+    async def start(self, names=None):
+        """Start the selected loops (default: BACKGROUND_TASKS). Call from the running loop."""
+        if self._stop is not None:
+            return
+        self._stop = asyncio.Event()
+        for name in self.enabled() if names is None else names:
+            st = self._running[name] = TaskState(fn=self._registry[name])
+            st.task = asyncio.create_task(self._supervise(name, st), name=f"bg:{name}")
+        if self._running:
+            log.info("background tasks started: %s", ", ".join(self._running))
+
+    async def stop(self, timeout: float = TASK_STOP_TIMEOUT_SECONDS):
+        """Ask every loop to return, then cancel whatever is still running after `timeout`."""
+        if self._stop is None:
+            return
+        self._stop.set()
+        tasks = [st.task for st in self._running.values() if st.task is not None]
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+            for t in pending:
+                t.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._running.clear()
+        self._stop = None
+
+    async def _supervise(self, name: str, st: TaskState):
+        delay = TASK_RESTART_BASE_SECONDS
+        while not self._stop.is_set():
+            st.started_at = time.monotonic()
+            try:
+                await st.fn(self._stop)
+                if self._stop.is_set():
+                    return
+                st.last_error = "exited"
+                log.warning("background task %s returned unexpectedly; restarting", name)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                st.last_error = repr(e)
+                log.exception("background task %s crashed; restarting", name)
+            if time.monotonic() - st.started_at >= TASK_HEALTHY_SECONDS:
+                delay = TASK_RESTART_BASE_SECONDS
+            st.restarts += 1
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, TASK_RESTART_MAX_SECONDS)
+
+    def status(self) -> Dict[str, dict]:
+        return {
+            name: {
+                "running": st.task is not None and not st.task.done(),
+                "restarts": st.restarts,
+                "last_error": st.last_error,
+            }
+            for name, st in self._running.items()
+        }
+
+
+supervisor = Supervisor()
+
+
+def background_task(name: str, every_process: bool = False):
+    """Register `async def loop(stop: asyncio.Event)` to be run (and restarted) by the supervisor."""
+    def deco(fn: LoopFn):
+        supervisor.register(name, fn, every_process)
+        return fn
+    return deco
@@ -0,0 +1,145 @@
+# file: app/wire.py
+"""
+Wire formats for /ws/market tick streams.
+
+Clients pick a format on connect (?format=... or the Sec-WebSocket-Protocol
+"oriza.<format>"); JSON stays the default:
+
+- json     text frames, {"type":"tick","seq":..,"symbol":..,"price":..,"ts":"<iso>"}
+- msgpack  binary, delta-encoded, see below
+- packed   binary, fixed struct layout (little-endian), see below
+
+In the delta formats prices are integers in units of 1/PRICE_SCALE and
+timestamps are int64 microseconds since the unix epoch. A tick normally carries
+the difference to the previous tick of the same symbol (seq - 1); the first
+tick of a stream (and, in packed, a price move too large for i32) is sent with
+absolute values instead. Snapshot/replay batches carry the first row absolute
+and the rest as deltas. A client that sees a seq gap must reconnect with
+resume_from to re-sync its base values.
+
+Every frame a client has to decode, per format:
+
+json:
+    tick        {"type":"tick","seq":n,"symbol":s,"price":p,"ts":"<iso>"}
+    batch       {"type":"snapshot"|"replay","symbol":s,"epoch":e,"seq":last,"ticks":[<tick>, ...]}
+
+msgpack (tell ticks apart by array length, batches are maps):
+    tick        [seq, dprice, dts]                       delta to tick seq - 1
+    tick (abs)  [seq, price, ts, 1]                      absolute values (trailing 1)
+    batch       {"type": "snapshot"|"replay", "symbol": s, "epoch": e, "seq": last seq,
+                 "scale": PRICE_SCALE, "first": [seq, price, ts] or None when empty,
+                 "deltas": [[dprice, dts], ...]}        one per row after the first
+
+packed (first byte is the frame type):
+    tick        <B I i q     type=0x01, seq u32, dprice i32, dts i64          (17 bytes)
+    tick (abs)  <B I q q     type=0x02, seq u32, price i64, ts i64            (21 bytes)
+    batch       <B B         type (0x10 snapshot / 0x11 replay, |0x80 = wide rows), len(symbol)
+                symbol, epoch (12 ascii bytes, NUL-padded)
+                <I I q q     last seq, count, first price i64, first ts i64 (0, 0 when count=0)
+                count-1 x    <i q (or <q q when wide): dprice, dts
+
+In every format the server answers a "ping" / "keepalive" text message with the
+text frame "pong".
+
+permessage-deflate is negotiated by the ASGI server (uvicorn --ws websockets,
+--ws-per-message-deflate, on by default) and applies to every format.
+"""
+import json
+import struct
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence, Tuple
+
+PRICE_SCALE = 1_000_000
+FORMATS = ("json", "msgpack", "packed")
+SUBPROTOCOL_PREFIX = "oriza."
+
+_EPOCH = datetime(1970, 1, 1)
+_US = timedelta(microseconds=1)
+_I32_MIN, _I32_MAX = -(2 ** 31), 2 ** 31 - 1
+
+T_TICK, T_TICK_ABS, T_SNAPSHOT, T_REPLAY, WIDE = 0x01, 0x02, 0x10, 0x11, 0x80
+
+# (seq, price as int, ts as int64 us)
+Row = Tuple[int, int, int]
+
+
+def to_row(seq: int, price: float, ts: datetime) -> Row:
+    return seq, round(price * PRICE_SCALE), (ts - _EPOCH) // _US
+
+
+def negotiate(requested: Optional[str], subprotocols: Sequence[str]) -> Tuple[str, Optional[str]]:
+    """Return (format, subprotocol to echo). Unknown / missing -> json."""
+    for sp in subprotocols or ():
+        if sp.startswith(SUBPROTOCOL_PREFIX) and sp[len(SUBPROTOCOL_PREFIX):] in FORMATS:
+            return sp[len(SUBPROTOCOL_PREFIX):], sp
+    fmt = (requested or "json").lower()
+    return (fmt if fmt in FORMATS else "json"), None
+
+
+def _fits_i32(v: int) -> bool:
+    return _I32_MIN <= v <= _I32_MAX
+
+
+# --- msgpack ---
+def _msgpack():
+    import msgpack  # optional dependency, only needed when a client asks for it
+
+    return msgpack
+
+
+def msgpack_tick(row: Row, prev: Optional[Row]) -> bytes:
+    seq, p, t = row
+    if prev is None:
+        return _msgpack().packb([seq, p, t, 1])  # trailing 1: absolute values
+    return _msgpack().packb([seq, p - prev[1], t - prev[2]])
+
+
+def msgpack_batch(kind: str, symbol: str, epoch: str, seq: int, rows: List[Row]) -> bytes:
+    deltas = [[b[1] - a[1], b[2] - a[2]] for a, b in zip(rows, rows[1:])]
+    return _msgpack().packb({
+        "type": kind, "symbol": symbol, "epoch": epoch, "seq": seq, "scale": PRICE_SCALE,
+        "first": list(rows[0]) if rows else None, "deltas": deltas,
+    })
+
+
+# --- packed ---
+_TICK = struct.Struct("<BIiq")
+_TICK_ABS = struct.Struct("<BIqq")
+_BATCH_HEAD = struct.Struct("<IIqq")
+_ROW = struct.Struct("<iq")
+_ROW_WIDE = struct.Struct("<qq")
+
+
+def packed_tick(row: Row, prev: Optional[Row]) -> bytes:
+    seq, p, t = row
+    if prev is not None and _fits_i32(p - prev[1]):
+        return _TICK.pack(T_TICK, seq & 0xFFFFFFFF, p - prev[1], t - prev[2])
+    # first tick of a stream, or a move too large for i32: absolute values
+    return _TICK_ABS.pack(T_TICK_ABS, seq & 0xFFFFFFFF, p, t)
+
+
+def packed_batch(kind: str, symbol: str, epoch: str, seq: int, rows: List[Row]) -> bytes:
+    deltas = [(b[1] - a[1], b[2] - a[2]) for a, b in zip(rows, rows[1:])]
+    wide = any(not _fits_i32(dp) for dp, _ in deltas)
+    row_fmt = _ROW_WIDE if wide else _ROW
+    t = (T_SNAPSHOT if kind == "snapshot" else T_REPLAY) | (WIDE if wide else 0)
+    sym = symbol.encode("utf-8")
+    first_p, first_t = (rows[0][1], rows[0][2]) if rows else (0, 0)
+    parts = [
+        bytes((t, len(sym))), sym, epoch.encode("ascii")[:12].ljust(12, b"\0"),
+        _BATCH_HEAD.pack(seq & 0xFFFFFFFF, len(rows), first_p, first_t),
+    ]
+    parts.extend(row_fmt.pack(dp, dt) for dp, dt in deltas)
+    return b"".join(parts)
+
+
+# --- json (default) ---
+def json_tick(symbol: str, seq: int, price: float, ts: datetime) -> str:
+    return json.dumps({"type": "tick", "seq": seq, "symbol": symbol, "price": price, "ts": ts.isoformat()})
+
+
+def json_batch(kind: str, symbol: str, epoch: str, seq: int, frames: List[str]) -> str:
+    return (
+        f'{{"type":"{kind}","symbol":{json.dumps(symbol)},"epoch":"{epoch}","seq":{seq},'
+        f'"ticks":[{",".join(frames)}]}}'
+    )
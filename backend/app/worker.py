@@ -0,0 +1,32 @@
+# file: app/worker.py
+"""
+Background job worker. Runs outside the API process:
+
+    python -m app.worker --concurrency 4
+
+Throughput scales by starting more worker processes (any host, same DB).
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+
+from app import jobs
+import app.report_engine  # noqa: F401  (registers report.generate)
+
+
+async def _main(concurrency: int):
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await jobs.run_pool(concurrency, stop)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Oriza job worker")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("WORKER_CONCURRENCY", "4")))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    asyncio.run(_main(args.concurrency))
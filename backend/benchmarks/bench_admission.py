@@ -0,0 +1,106 @@
+# file: benchmarks/bench_admission.py
+"""
+Admission control (app/admission.py): per-request cost of AdmissionMiddleware
+around a trivial ASGI app, and a noisy-neighbour run - one caller in a tight
+refresh loop plus --users well-behaved callers against a "heavy" route whose
+handler holds a slot for --service-ms - showing how many requests each side
+gets through and what the well-behaved callers' latency looks like.
+
+    cd backend && python -m benchmarks.bench_admission
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app import admission
+
+
+async def _overhead(n: int):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    wrapped = admission.AdmissionMiddleware(app)
+    admission.CLASSES["standard"].rate = 0  # measure the checks, not the 429 path
+
+    async def run(target, path):
+        scope = {"type": "http", "method": "GET", "path": path, "headers": [], "client": ("10.0.0.1", 1)}
+        t = time.perf_counter()
+        for _ in range(n):
+            await target(dict(scope), receive, send)
+        return (time.perf_counter() - t) / n * 1e6
+
+    bare = await run(app, "/commodities/")
+    print(f"middleware per request   {await run(wrapped, '/commodities/') - bare:8.2f} us  (standard, unlimited)")
+    admission.CLASSES["standard"].rate = 1e9
+    print(f"                         {await run(wrapped, '/commodities/') - bare:8.2f} us  (standard, rate limited)")
+
+
+async def _noisy_neighbour(duration: float, users: int, service_ms: float, pool: int):
+    service = service_ms / 1000
+    slots = asyncio.Semaphore(pool)  # stands in for the DB pool
+
+    async def app(scope, receive, send):
+        async with slots:
+            await asyncio.sleep(service)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    wrapped = admission.AdmissionMiddleware(app)
+    stats = {"noisy": {"ok": 0, "rejected": 0}, "normal": {"ok": 0, "rejected": 0}}
+    latency = []
+    deadline = time.perf_counter() + duration
+
+    async def caller(ip: str, kind: str, pause: float):
+        while time.perf_counter() < deadline:
+            status = []
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    status.append(message["status"])
+
+            scope = {"type": "http", "method": "GET", "path": "/market/NG/tick", "headers": [], "client": (ip, 1)}
+            t = time.perf_counter()
+            await wrapped(scope, receive, send)
+            stats[kind]["ok" if status[0] == 200 else "rejected"] += 1
+            if kind == "normal" and status[0] == 200:
+                latency.append((time.perf_counter() - t) * 1e3)
+            await asyncio.sleep(pause or 0.001)
+
+    noisy = [caller("10.9.9.9", "noisy", 0) for _ in range(32)]  # one desk, 32 parallel refresh loops
+    normal = [caller(f"10.0.0.{i}", "normal", 0.5) for i in range(users)]
+    await asyncio.gather(*noisy, *normal)
+    print(f"noisy caller             {stats['noisy']['ok']:6d} ok  {stats['noisy']['rejected']:7d} rejected")
+    print(f"{users} normal callers        {stats['normal']['ok']:6d} ok  {stats['normal']['rejected']:7d} rejected  "
+          f"p50 {statistics.median(latency):.1f} ms  max {max(latency):.1f} ms")
+
+
+def main(n: int, duration: float, users: int, service_ms: float, pool: int):
+    asyncio.run(_overhead(n))
+    for enabled in (False, True):
+        admission.ADMISSION_ENABLED = enabled
+        admission.limiter._buckets.clear()
+        print(f"\nadmission {'on' if enabled else 'off'}: heavy route, {service_ms:.0f} ms service time, "
+              f"{pool} connections, {duration:.0f} s")
+        asyncio.run(_noisy_neighbour(duration, users, service_ms, pool))
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("-n", type=int, default=100_000)
+    p.add_argument("--duration", type=float, default=5)
+    p.add_argument("--users", type=int, default=20)
+    p.add_argument("--service-ms", type=float, default=20)
+    p.add_argument("--pool", type=int, default=15, help="DB connections (pool_size 5 + max_overflow 10)")
+    a = p.parse_args()
+    main(a.n, a.duration, a.users, a.service_ms, a.pool)
@@ -0,0 +1,59 @@
+# file: benchmarks/bench_correlation.py
+"""
+Correlation engine cost at scale (default 500 symbols, 1000 daily bars):
+full vectorized load/recompute, incremental per-bar update, and cached /
+uncached matrix queries.
+
+    cd backend && python -m benchmarks.bench_correlation --symbols 500
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.correlation import CorrelationEngine
+
+
+def _timed(fn, repeat=1):
+    t = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t) / repeat
+
+
+def main(n_symbols: int, n_bars: int, updates: int):
+    rng = np.random.default_rng(0)
+    closes = 50 * np.exp(np.cumsum(rng.normal(0, 0.015, (n_bars + updates, n_symbols)), axis=0))
+    times = [datetime(2020, 1, 1) + timedelta(days=i) for i in range(n_bars + updates)]
+    symbols = [f"SYM{i:03d}" for i in range(n_symbols)]
+
+    eng = CorrelationEngine()
+    print(f"{n_symbols} symbols, {n_bars} bars, windows {eng.windows}")
+    print(f"load + full recompute       {_timed(lambda: eng.load(times[:n_bars], symbols, closes[:n_bars])) * 1e3:9.1f} ms")
+    print(f"recompute (all windows)     {_timed(eng.recompute, 5) * 1e3:9.1f} ms")
+
+    bars = [dict(zip(symbols, closes[n_bars + i])) for i in range(updates)]
+    t = time.perf_counter()
+    for i, bar in enumerate(bars):
+        eng.on_bar(times[n_bars + i], bar)
+    print(f"incremental bar update      {(time.perf_counter() - t) / updates * 1e3:9.2f} ms/bar")
+
+    subset = symbols[:: max(1, n_symbols // 50)][:50]
+    for w in eng.windows:
+        eng._cache.clear()
+        cold = _timed(lambda: eng.matrix(w))
+        warm = _timed(lambda: eng.matrix(w), 100)
+        eng._cache.clear()
+        sub = _timed(lambda: eng.matrix(w, subset))
+        print(f"window {w:3d}: full matrix {cold * 1e3:7.2f} ms cold / {warm * 1e6:6.1f} us cached, "
+              f"{len(subset)}-symbol subset {sub * 1e3:6.2f} ms")
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--symbols", type=int, default=500)
+    p.add_argument("--bars", type=int, default=1000)
+    p.add_argument("--updates", type=int, default=50)
+    a = p.parse_args()
+    main(a.symbols, a.bars, a.updates)
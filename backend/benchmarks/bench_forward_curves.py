@@ -0,0 +1,95 @@
+# file: benchmarks/bench_forward_curves.py
+"""
+Forward curve load + query latency with 15 years of daily curves.
+
+Generates a settlement CSV (business days x contract months), loads it with
+app.curve_ingest, then times the two access paths the API uses: whole curve
+as of a day (+ day-over-day diff and spreads) and one contract's history.
+Runs against DATABASE_URL (use a scratch database; forward_curves rows for
+--symbol are replaced).
+
+    cd backend && DATABASE_URL=sqlite+aiosqlite:////tmp/curves.db python -m benchmarks.bench_forward_curves
+"""
+import argparse
+import asyncio
+import io
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import delete
+
+from app import curves
+from app.curve_ingest import ingest_settlements
+from app.db import AsyncSessionLocal, Base, engine
+from app.models import ForwardCurvePoint
+
+
+def _settlement_csv(symbol: str, years: int, contracts: int):
+    days = []
+    d = date(2026, 1, 1) - timedelta(days=365 * years)
+    while d < date(2026, 1, 1):
+        if d.weekday() < 5:
+            days.append(d)
+        d += timedelta(days=1)
+    buf = io.StringIO()
+    buf.write("trade_date,symbol,contract_month,settle\n")
+    level = 3.0
+    for d in days:
+        level = max(0.5, level * (1 + random.gauss(0, 0.02)))
+        for k in range(1, contracts + 1):
+            y, m = divmod(d.month - 1 + k, 12)
+            season = 0.4 if (m + 1) in (12, 1, 2) else 0.0
+            buf.write(f"{d.isoformat()},{symbol},{d.year + y}-{m + 1:02d},{level + season + 0.01 * k:.4f}\n")
+    buf.seek(0)
+    return days, buf
+
+
+async def _timed(fn, repeat: int):
+    out = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        await fn()
+        out.append((time.perf_counter() - t) * 1e3)
+    return statistics.median(out), max(out)
+
+
+async def main(symbol: str, years: int, contracts: int, repeat: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    days, buf = _settlement_csv(symbol, years, contracts)
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(ForwardCurvePoint).where(ForwardCurvePoint.symbol == symbol))
+        await db.commit()
+        t = time.perf_counter()
+        res = await ingest_settlements(db, buf, "csv", symbol)
+        took = time.perf_counter() - t
+    print(f"loaded {res['rows']:,} settlements ({res['curves']} curves x {contracts} contracts) "
+          f"in {took:.1f}s = {res['rows'] / took:,.0f} rows/s")
+
+    async with AsyncSessionLocal() as db:
+        async def snapshot():
+            day = await curves.curve_date(db, symbol, random.choice(days))
+            curve = await curves.load_curve(db, symbol, day)
+            prev = await curves.load_curve(db, symbol, await curves.curve_date(db, symbol, day, before=True))
+            curves.curve_diff(curve, prev)
+            curves.calendar_spreads(curve, (1, 3, 12))
+
+        async def history():
+            d = random.choice(days)
+            await curves.contract_history(db, symbol, date(d.year + 1, d.month, 1))
+
+        for name, fn in (("curve snapshot + diff + spreads", snapshot), ("contract history", history)):
+            med, worst = await _timed(fn, repeat)
+            print(f"{name:32s} median {med:6.2f} ms  max {worst:6.2f} ms")
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--symbol", default="BENCH")
+    p.add_argument("--years", type=int, default=15)
+    p.add_argument("--contracts", type=int, default=120)
+    p.add_argument("--repeat", type=int, default=200)
+    a = p.parse_args()
+    asyncio.run(main(a.symbol, a.years, a.contracts, a.repeat))
@@ -0,0 +1,73 @@
+# file: benchmarks/bench_list_serialization.py
+"""
+Per-request cost of list endpoints: ORM entities + jsonable_encoder (old path)
+vs. column rows + orjson (app/responses.py), for a 1000-row get_ticks response.
+Uses an in-memory sqlite DB so query + serialization are both measured;
+allocations are tracemalloc peak per request.
+
+    cd backend && python -m benchmarks.bench_list_serialization --rows 1000 --iters 200
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import desc, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db import Base
+from app.models import MarketTick
+from app.responses import rows_response, select_columns
+
+
+async def _old(db: AsyncSession, limit: int) -> bytes:
+    q = await db.execute(select(MarketTick).where(MarketTick.symbol == "NG").order_by(desc(MarketTick.ts)).limit(limit))
+    rows = list(q.scalars().all())
+    body = JSONResponse(jsonable_encoder(rows)).body
+    db.expunge_all()  # a request session starts with an empty identity map
+    return body
+
+
+async def _new(db: AsyncSession, limit: int) -> bytes:
+    q = await db.execute(select_columns(MarketTick).where(MarketTick.symbol == "NG").order_by(desc(MarketTick.ts)).limit(limit))
+    return rows_response(q).body
+
+
+async def _measure(fn, db, limit, iters):
+    await fn(db, limit)  # warm up
+    t = time.perf_counter()
+    for _ in range(iters):
+        await fn(db, limit)
+    per_req = (time.perf_counter() - t) / iters
+    tracemalloc.start()
+    await fn(db, limit)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return per_req, peak
+
+
+async def main(rows: int, iters: int):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    t0 = datetime(2025, 1, 1)
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        db.add_all(MarketTick(symbol="NG", price=3.5 + i / 1e4, ts=t0 + timedelta(seconds=i)) for i in range(rows))
+        await db.commit()
+        assert json.loads(await _old(db, rows)) == json.loads(await _new(db, rows)), "payloads differ"
+        for name, fn in (("orm+jsonable_encoder", _old), ("columns+orjson", _new)):
+            per_req, peak = await _measure(fn, db, rows, iters)
+            print(f"{name:22} {per_req * 1e3:7.2f} ms/req   peak alloc {peak / 1024:8.0f} KiB")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--rows", type=int, default=1000)
+    p.add_argument("--iters", type=int, default=200)
+    a = p.parse_args()
+    asyncio.run(main(a.rows, a.iters))
@@ -0,0 +1,66 @@
+# file: benchmarks/bench_metrics.py
+"""
+Cost of the always-on instrumentation (app/metrics.py):
+histogram observe / counter inc, MetricsMiddleware around a trivial ASGI app
+(per-request overhead), and /metrics rendering with many label series.
+
+    cd backend && python -m benchmarks.bench_metrics
+"""
+import argparse
+import asyncio
+import time
+
+from app import metrics
+
+
+def _ns(fn, n: int) -> float:
+    t = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t) / n * 1e9
+
+
+async def _asgi_overhead(n: int):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    wrapped = metrics.MetricsMiddleware(app)
+    scope = {"type": "http", "method": "GET", "path": "/bench"}
+
+    async def run(target):
+        t = time.perf_counter()
+        for _ in range(n):
+            await target(dict(scope), receive, send)
+        return (time.perf_counter() - t) / n * 1e6
+
+    bare, instrumented = await run(app), await run(wrapped)
+    print(f"middleware per request   {instrumented - bare:8.2f} us  (bare {bare:.2f} us, with {instrumented:.2f} us)")
+
+
+def main(n: int, series: int):
+    h = metrics.histogram("bench_seconds", "bench", ("route",))
+    c = metrics.counter("bench_total", "bench", ("route",))
+    print(f"histogram.observe        {_ns(lambda: h.observe(0.0042, '/market/{symbol}/tick'), n):8.0f} ns")
+    print(f"counter.inc              {_ns(lambda: c.inc('/market/{symbol}/tick'), n):8.0f} ns")
+    asyncio.run(_asgi_overhead(n // 10))
+
+    for i in range(series):
+        h.observe(0.01, f"/route/{i}")
+    t = time.perf_counter()
+    body = metrics.render()
+    print(f"render {series} series   {(time.perf_counter() - t) * 1e3:8.2f} ms  ({len(body) / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("-n", type=int, default=200_000)
+    p.add_argument("--series", type=int, default=500)
+    a = p.parse_args()
+    main(a.n, a.series)
@@ -0,0 +1,55 @@
+# file: benchmarks/bench_report_export.py
+"""
+Export throughput / memory for the streaming report writers.
+
+Feeds synthetic tick rows through app.report_engine.write_stream in the same
+chunk size the DB cursor uses, so the numbers reflect writer cost only.
+
+    cd backend && python -m benchmarks.bench_report_export --rows 10000000 --format csv
+"""
+import argparse
+import asyncio
+import os
+import resource
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from app.exports import FETCH_SIZE
+from app.report_engine import write_stream
+
+
+def _rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def _synthetic_chunks(n: int):
+    t0 = datetime(2015, 1, 1)
+    price = 3.5
+    for start in range(0, n, FETCH_SIZE):
+        chunk = []
+        for i in range(start, min(start + FETCH_SIZE, n)):
+            price += 0.0001 if i % 3 else -0.0001
+            chunk.append((t0 + timedelta(seconds=i), "NG", round(price, 4)))
+        yield chunk
+
+
+async def main(rows: int, fmt: str):
+    rss0 = _rss_mb()
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, f"export.{fmt}")
+        t = time.perf_counter()
+        n = await write_stream(fmt, path, ["ts", "symbol", "price"], _synthetic_chunks(rows))
+        took = time.perf_counter() - t
+        size = os.path.getsize(path)
+    print(f"format={fmt} rows={n} time={took:.1f}s rows/s={n / took:,.0f} "
+          f"file={size / 1e6:.0f}MB peak_rss={_rss_mb():.0f}MB (start {rss0:.0f}MB)")
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--rows", type=int, default=10_000_000)
+    p.add_argument("--format", choices=["csv", "xlsx"], default="csv")
+    a = p.parse_args()
+    asyncio.run(main(a.rows, a.format))
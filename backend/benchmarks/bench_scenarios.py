@@ -0,0 +1,78 @@
+# file: benchmarks/bench_scenarios.py
+"""
+Storage scenario engine (app/scenarios.py) on a synthetic history: --years of
+weekly readings generated from known degree-day sensitivities plus noise.
+Reports how well the fit recovers them, then the time and peak NumPy memory
+for --n scenarios through the end of the withdrawal season and over the full
+MAX_WEEKS horizon, per SCENARIO_CELLS chunk budget.
+
+    cd backend && python -m benchmarks.bench_scenarios --n 10000
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+from datetime import date
+
+import numpy as np
+
+from app import scenarios
+from app.api.weather import normal_temps, population_weights
+
+PER_HDD, PER_CDD = -2.0, 0.8  # the per-week term is set so a full year nets out
+
+
+def history(years: int, region: str, asof: date):
+    regions = scenarios.weather_regions(region)
+    end = np.datetime64(asof, "D")
+    days = np.arange(end - years * 364, end + 1, 7)
+    span = np.arange(days[0] + 1, days[-1] + 1)
+    hdd, cdd = scenarios._weighted_dd(normal_temps(regions, span), population_weights(regions))
+    rng = np.random.default_rng(5)
+    weekly_h = hdd.reshape(-1, 7).sum(axis=1)
+    weekly_c = cdd.reshape(-1, 7).sum(axis=1)
+    per_week = -(PER_HDD * weekly_h.mean() + PER_CDD * weekly_c.mean())
+    delta = per_week + PER_HDD * weekly_h + PER_CDD * weekly_c + rng.normal(0, 25, len(weekly_h))
+    levels = 3800 + np.concatenate(([0.0], np.cumsum(delta)))
+    return days, levels, (round(float(per_week), 2), PER_HDD, PER_CDD)
+
+
+def main(n: int, years: int, runs: int, region: str, cells: list):
+    days, levels, true = history(years, region, date(2026, 11, 6))
+    t = time.perf_counter()
+    model = scenarios.fit("NG", region, days, levels)
+    print(f"fit {model.n_obs} weekly changes   {(time.perf_counter() - t) * 1e3:7.2f} ms  "
+          f"coef {np.round(model.coef, 2).tolist()} (true {list(true)})  r2 {model.r2:.3f}")
+
+    season = scenarios.season_end((model.last_day + 1).item())
+    longest = (model.last_day + scenarios.MAX_WEEKS * 7).item()
+    for end in (season, longest):
+        for budget in cells:
+            scenarios.SCENARIO_CELLS = budget
+            times = []
+            for seed in range(runs):
+                t = time.perf_counter()
+                res = scenarios.simulate(model, end, n, seed=seed)
+                times.append(time.perf_counter() - t)
+            tracemalloc.start()
+            scenarios.simulate(model, end, n, seed=0)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{n} scenarios x {res['weeks']:3d} weeks x {len(model.weather_regions)} regions, cells {budget:9d}  "
+                  f"median {statistics.median(times) * 1e3:7.1f} ms  (max {max(times) * 1e3:.1f} ms, {runs} runs)  "
+                  f"peak {peak / 2 ** 20:6.1f} MB")
+        if end == season:
+            season_res = res
+    q = season_res["end_level"]["quantiles"]
+    print(f"end of season ({season_res['end']})   p5 {q['p5']:.0f}  p50 {q['p50']:.0f}  p95 {q['p95']:.0f}  "
+          f"from {season_res['start']['level']:.0f} on {season_res['start']['date']}")
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--n", type=int, default=10_000)
+    p.add_argument("--years", type=int, default=5)
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument("--region", default="US")
+    p.add_argument("--cells", type=int, nargs="+", default=[1_000_000, scenarios.SCENARIO_CELLS, 16_000_000])
+    a = p.parse_args()
+    main(a.n, a.years, a.runs, a.region, a.cells)
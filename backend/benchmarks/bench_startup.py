@@ -0,0 +1,76 @@
+# file: benchmarks/bench_startup.py
+"""
+Import and startup cost of the API process.
+
+Each measurement runs in a fresh interpreter:
+- `import main` wall time (median of --runs), plus the slowest app modules
+  from `python -X importtime`
+- tasks created by the import itself (must be 0: routers are side-effect free)
+- lifespan startup / shutdown time with BACKGROUND_TASKS=none and =all
+
+    cd backend && python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+_IMPORT = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+
+_TASKS_AT_IMPORT = """
+import asyncio
+async def run():
+    import main  # noqa: F401
+    print(len(asyncio.all_tasks()) - 1)
+asyncio.run(run())
+"""
+
+_LIFESPAN = """
+import asyncio, time
+import main
+async def run():
+    cm = main.app.router.lifespan_context(main.app)
+    t = time.perf_counter()
+    await cm.__aenter__()
+    up = time.perf_counter() - t
+    running = sorted(main.supervisor.status())
+    t = time.perf_counter()
+    await cm.__aexit__(None, None, None)
+    print(up, time.perf_counter() - t, ",".join(running) or "-")
+asyncio.run(run())
+"""
+
+
+def _py(code: str, env=None, flags=()) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "-W", "ignore", *flags, "-c", code],
+                          capture_output=True, text=True, env={**os.environ, **(env or {})}, check=True)
+
+
+def main(runs: int, top: int):
+    times = [float(_py(_IMPORT).stdout) for _ in range(runs)]
+    print(f"import main        median {statistics.median(times) * 1e3:7.1f} ms  "
+          f"(min {min(times) * 1e3:.1f}, max {max(times) * 1e3:.1f}, {runs} runs)")
+
+    rows = []
+    for line in _py("import main", flags=("-X", "importtime")).stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip().startswith(("app.", "main")):
+            rows.append((int(parts[1]), parts[2].strip()))
+    for us, name in sorted(rows, reverse=True)[:top]:
+        print(f"  {name:32s} {us / 1e3:7.1f} ms cumulative")
+
+    print(f"tasks created by import: {_py(_TASKS_AT_IMPORT).stdout.strip()}")
+
+    for setting in ("none", "all"):
+        up, down, running = _py(_LIFESPAN, env={"BACKGROUND_TASKS": setting}).stdout.split()
+        print(f"lifespan BACKGROUND_TASKS={setting:4s} startup {float(up) * 1e3:6.1f} ms  "
+              f"shutdown {float(down) * 1e3:6.1f} ms  running: {running}")
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument("--top", type=int, default=8)
+    a = p.parse_args()
+    main(a.runs, a.top)
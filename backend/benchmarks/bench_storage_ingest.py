@@ -0,0 +1,75 @@
+# file: benchmarks/bench_storage_ingest.py
+"""
+Storage history bulk load: --years of weekly reports for every EIA storage
+region (plus the US total), as CSV and NDJSON, through app.storage_ingest -
+parse alone, then the full load (upsert + avg_5y recompute), then the same
+file again (every row an update). Runs against DATABASE_URL (use a scratch
+database; storage_levels rows for --symbol are replaced).
+
+    cd backend && DATABASE_URL=sqlite+aiosqlite:////tmp/storage.db python -m benchmarks.bench_storage_ingest
+"""
+import argparse
+import asyncio
+import io
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete
+
+from app.db import AsyncSessionLocal, Base, engine
+from app.models import StorageLevel
+from app.storage_ingest import iter_rows, ingest_storage
+
+REGIONS = ("US", "EAST", "MIDWEST", "MOUNTAIN", "PACIFIC", "SOUTH_CENTRAL")
+
+
+def _history(symbol: str, years: int):
+    start = datetime(2026, 1, 2) - timedelta(weeks=52 * years)
+    rows = []
+    for region in REGIONS:
+        level = 2000.0
+        for w in range(52 * years):
+            level = max(100.0, level + random.gauss(0, 60) + (80 if 14 <= w % 52 <= 43 else -110))
+            rows.append({"symbol": symbol, "region": region,
+                         "ts": (start + timedelta(weeks=w)).isoformat(), "level": round(level, 1)})
+    return rows
+
+
+def _files(rows):
+    csv_buf = io.StringIO()
+    csv_buf.write("symbol,region,ts,level\n")
+    csv_buf.writelines(f"{r['symbol']},{r['region']},{r['ts']},{r['level']}\n" for r in rows)
+    csv_buf.seek(0)
+    nd_buf = io.StringIO("".join(json.dumps(r) + "\n" for r in rows))
+    return {"csv": csv_buf, "ndjson": nd_buf}
+
+
+async def main(symbol: str, years: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    rows = _history(symbol, years)
+    print(f"{years} years x {len(REGIONS)} regions = {len(rows):,} weekly rows")
+    for fmt, buf in _files(rows).items():
+        t = time.perf_counter()
+        n = sum(1 for _ in iter_rows(buf, fmt, symbol))
+        print(f"{fmt:7s} parse only      {time.perf_counter() - t:6.2f} s  ({n:,} rows)")
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(StorageLevel).where(StorageLevel.symbol == symbol))
+            await db.commit()
+            for label in ("load", "reload"):
+                buf.seek(0)
+                t = time.perf_counter()
+                res = await ingest_storage(db, buf, fmt, symbol)
+                took = time.perf_counter() - t
+                print(f"{fmt:7s} {label:15s} {took:6.2f} s  = {res['rows'] / took:,.0f} rows/s  "
+                      f"({res['avg_5y_updated']:,} avg_5y updated)")
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--symbol", default="BENCH")
+    p.add_argument("--years", type=int, default=20)
+    a = p.parse_args()
+    asyncio.run(main(a.symbol, a.years))
@@ -0,0 +1,91 @@
+# file: benchmarks/bench_summarize.py
+"""
+Summarization stage (app/summarize.py) with the stub backend.
+
+Polls of --poll articles arrive every --interval seconds; --dup of them are
+syndicated copies of earlier stories. Reports the ingest-side cost of
+submit() (what the poller pays), how long until every article has a summary,
+backend calls / texts, and the same work done inline - one backend call per
+article - for comparison.
+
+    cd backend && python -m benchmarks.bench_summarize --articles 2000 --latency-ms 200
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from app import summarize
+from benchmarks.fake_feeds import WORDS
+
+
+def _article(n: int) -> str:
+    rnd = random.Random(n)
+    sentences = [" ".join(rnd.choice(WORDS) for _ in range(14)).capitalize() + "." for _ in range(12)]
+    return f"Story {n}. " + " ".join(sentences)
+
+
+async def run(args):
+    done = {}
+    stories = []
+    for i in range(args.articles):
+        if stories and random.random() < args.dup:
+            stories.append(random.choice(stories[: len(stories) or 1]))
+        else:
+            stories.append(_article(i))
+    total = len(stories)
+
+    async def on_ready(results: summarize.Results):
+        for ids, summary in results:
+            for item_id in ids:
+                done[item_id] = summary
+
+    backend = summarize.StubBackend(args.latency_ms)
+    s = summarize.Summarizer(on_ready, backend=backend, batch_size=args.batch, concurrency=args.concurrency,
+                             tokens_per_minute=args.tokens_per_minute, queue_max=args.queue_max)
+    stop = asyncio.Event()
+    loop_task = asyncio.create_task(s.run(stop))
+    await asyncio.sleep(0)
+
+    submit_s = 0.0
+    t0 = time.perf_counter()
+    for start in range(0, total, args.poll):
+        t = time.perf_counter()
+        for i in range(start, min(total, start + args.poll)):
+            cached = s.submit(str(i), stories[i])
+            if cached is not None:
+                done[str(i)] = cached
+        submit_s += time.perf_counter() - t
+        await asyncio.sleep(args.interval)
+    ingest_s = time.perf_counter() - t0
+    while not s.idle and time.perf_counter() - t0 < args.timeout:
+        await asyncio.sleep(0.01)
+    took = time.perf_counter() - t0
+    stop.set()
+    await loop_task
+
+    unique = len(set(stories))
+    print(f"{total} articles ({unique} unique), polls of {args.poll} every {args.interval}s, "
+          f"stub latency {args.latency_ms:.0f} ms/batch")
+    print(f"submit()                 {submit_s / total * 1e6:8.2f} us per article (ingest path)")
+    print(f"all summarized after     {took:8.2f} s  (ingest ran {ingest_s:.2f} s, {total - len(done)} dropped on overflow)")
+    print(f"backend calls            {backend.calls:8d}    texts {backend.texts} "
+          f"(avg batch {backend.texts / max(1, backend.calls):.1f})")
+    print(f"inline, one call each    {total * args.latency_ms / 1000:8.2f} s of ingest stalls, {total} calls")
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--articles", type=int, default=2000)
+    p.add_argument("--dup", type=float, default=0.3, help="fraction of syndicated copies")
+    p.add_argument("--poll", type=int, default=50, help="articles per poll")
+    p.add_argument("--interval", type=float, default=0.05)
+    p.add_argument("--latency-ms", type=float, default=200)
+    p.add_argument("--batch", type=int, default=summarize.SUMMARY_BATCH_SIZE)
+    p.add_argument("--concurrency", type=int, default=summarize.SUMMARY_CONCURRENCY)
+    p.add_argument("--tokens-per-minute", type=int, default=10_000_000)
+    p.add_argument("--queue-max", type=int, default=summarize.SUMMARY_QUEUE_MAX)
+    p.add_argument("--timeout", type=float, default=120)
+    a = p.parse_args()
+    random.seed(7)
+    asyncio.run(run(a))
@@ -0,0 +1,73 @@
+# file: benchmarks/bench_symbols.py
+"""
+Symbol registry (app/symbols.py) with --symbols synthetic commodities (3 hubs
+each) on top of the built-ins: index build time, autocomplete search latency
+for 1-4 character prefixes, canonical() resolution and news headline tagging.
+
+    cd backend && python -m benchmarks.bench_symbols --symbols 5000
+"""
+import argparse
+import random
+import statistics
+import string
+import time
+
+from app.symbols import registry
+
+WORDS = "gulf coast west east north south permian basin hub power gas crude storage terminal pipeline city".split()
+
+
+def _rows(n: int):
+    rnd = random.Random(11)
+    rows = []
+    for i in range(n):
+        sym = "".join(rnd.choice(string.ascii_uppercase) for _ in range(3)) + str(i)
+        name = " ".join(rnd.choice(WORDS).title() for _ in range(3))
+        hubs = [" ".join(rnd.choice(WORDS).title() for _ in range(2)) for _ in range(3)]
+        rows.append((sym, name, "energy", hubs, None))
+    return rows
+
+
+def _us(fn, args, reps: int = 1) -> list:
+    out = []
+    for a in args:
+        t = time.perf_counter()
+        for _ in range(reps):
+            fn(a)
+        out.append((time.perf_counter() - t) / reps * 1e6)
+    return out
+
+
+def main(n: int, queries: int):
+    rows = _rows(n)
+    t = time.perf_counter()
+    registry.build(rows)
+    print(f"build {len(registry.all())} symbols    {(time.perf_counter() - t) * 1e3:8.1f} ms  "
+          f"({len(registry._index.keys)} search keys)")
+
+    rnd = random.Random(3)
+    keys = registry._index.keys
+    for plen in (1, 2, 4):
+        qs = [rnd.choice(keys)[:plen] for _ in range(queries)]
+        registry._index.search_cache.clear()
+        cold = _us(registry.search, qs)
+        warm = _us(registry.search, qs, reps=10)
+        print(f"search, {plen}-char prefix     p50 {statistics.median(cold):6.1f} us  "
+              f"p99 {sorted(cold)[int(0.99 * len(cold))]:6.1f} us  (cached p50 {statistics.median(warm):.2f} us)")
+
+    names = [r[0].lower() for r in rnd.sample(rows, min(queries, len(rows)))] + ["natural gas", "henry hub", "XYZ"]
+    lat = _us(registry.canonical, names, reps=100)
+    print(f"canonical()               p50 {statistics.median(lat):6.2f} us")
+
+    headlines = [f"{rnd.choice(WORDS)} natural gas futures rise as Brent slips and {rnd.choice(WORDS)} storage draws"
+                 for _ in range(queries)]
+    lat = _us(registry.tickers_in, headlines, reps=10)
+    print(f"tickers_in(headline)      p50 {statistics.median(lat):6.1f} us  -> {registry.tickers_in(headlines[0])}")
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--symbols", type=int, default=5000)
+    p.add_argument("--queries", type=int, default=500)
+    a = p.parse_args()
+    main(a.symbols, a.queries)
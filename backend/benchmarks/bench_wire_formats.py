@@ -0,0 +1,51 @@
+# file: benchmarks/bench_wire_formats.py
+"""
+Bytes per tick and encode cost for each /ws/market wire format (app/wire.py),
+with and without permessage-deflate (simulated with raw deflate + sync flush and
+context takeover, as websockets does by default).
+
+    cd backend && python -m benchmarks.bench_wire_formats --ticks 200000
+"""
+import argparse
+import random
+import time
+import zlib
+from datetime import datetime, timedelta
+
+from app import wire
+from app.api.ws import SymbolStream
+from app.schemas.schemas import PriceTick
+
+
+def _ticks(n: int):
+    t0 = datetime(2025, 1, 1)
+    price = 80.0
+    out = []
+    for i in range(n):
+        price = round(price * (1 + random.uniform(-0.0015, 0.0015)), 6)
+        out.append(PriceTick(symbol="WTI", price=price, ts=t0 + timedelta(milliseconds=250 * i)))
+    return out
+
+
+def main(n: int):
+    ticks = _ticks(n)
+    print(f"{n} ticks")
+    print(f"{'format':8} {'bytes/tick':>10} {'deflate':>8} {'append+encode ns/tick':>22}")
+    for fmt in wire.FORMATS:
+        stream = SymbolStream("WTI", "bench0000000")
+        frames = []
+        t = time.perf_counter_ns()
+        for tick in ticks:
+            stream.append(tick)  # json frame is always built here
+            frames.append(stream.latest(fmt))
+        took = time.perf_counter_ns() - t
+        raw = [f.encode() if isinstance(f, str) else f for f in frames]
+        deflate = zlib.compressobj(wbits=-15)
+        compressed = sum(len(deflate.compress(r) + deflate.flush(zlib.Z_SYNC_FLUSH)) - 4 for r in raw)
+        print(f"{fmt:8} {sum(map(len, raw)) / n:10.1f} {compressed / n:8.1f} {took / n:22.0f}")
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--ticks", type=int, default=200_000)
+    main(p.parse_args().ticks)
@@ -0,0 +1,116 @@
+# file: benchmarks/fake_feeds.py
+"""
+Local stand-in for RSS_SOURCES / DIRECT_SITES, used by benchmarks/e2e.py.
+
+    /rss/{feed}        RSS 2.0 feed: the newest --items stories, --new of them
+                       fresh on every request (like a busy wire feed)
+    /site/{site}       LiveMint-style listing page (<h2 class="headline"><a>)
+    /article/{id}      article page the direct-site scraper fetches for summaries
+
+Every response waits --latency-ms first; summaries / articles are padded to
+--item-bytes. Headlines mention NG (so ticker filters match) and carry the
+wall-clock time the story was created as "[t=<unix seconds>]", which lets
+clients measure end-to-end delivery latency.
+
+Standalone:
+    cd backend && python -m benchmarks.fake_feeds --port 8765
+"""
+import argparse
+import asyncio
+import time
+from email.utils import formatdate
+from typing import Dict, List
+
+from aiohttp import web
+
+WORDS = "natural gas storage draw henry hub futures rally supply tighten weather demand lng exports".split()
+
+
+class FakeFeeds:
+    def __init__(self, latency_ms: float = 50, items: int = 40, new: int = 5, item_bytes: int = 600):
+        self.latency = latency_ms / 1000
+        self.items = items
+        self.new = new
+        self.item_bytes = item_bytes
+        self._stories: Dict[str, List[dict]] = {}
+        self._n = 0
+        self.requests = 0
+
+    def _text(self, n: int) -> str:
+        out, i = [], n
+        while sum(len(w) + 1 for w in out) < self.item_bytes:
+            out.append(WORDS[i % len(WORDS)])
+            i += 7
+        return " ".join(out)
+
+    def _fresh(self, key: str) -> List[dict]:
+        stories = self._stories.setdefault(key, [])
+        now = time.time()
+        for _ in range(self.new):
+            self._n += 1
+            stories.append({"id": f"{key}-{self._n}", "t": now, "n": self._n})
+        del stories[:-self.items]
+        return stories[::-1]
+
+    def _title(self, s: dict) -> str:
+        return f"NG futures {WORDS[s['n'] % len(WORDS)]} story {s['id']} [t={s['t']:.6f}]"
+
+    async def _wait(self):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def rss(self, request: web.Request) -> web.Response:
+        await self._wait()
+        feed = request.match_info["feed"]
+        base = f"{request.scheme}://{request.host}"
+        entries = "".join(
+            f"<item><title>{self._title(s)}</title><link>{base}/article/{s['id']}</link>"
+            f"<guid>{s['id']}</guid><pubDate>{formatdate(s['t'], usegmt=True)}</pubDate>"
+            f"<description>{self._text(s['n'])}</description></item>"
+            for s in self._fresh(f"rss{feed}")
+        )
+        body = (f'<?xml version="1.0"?><rss version="2.0"><channel><title>fake feed {feed}</title>'
+                f"<link>{base}</link><description>benchmark</description>{entries}</channel></rss>")
+        return web.Response(text=body, content_type="application/rss+xml")
+
+    async def site(self, request: web.Request) -> web.Response:
+        await self._wait()
+        site = request.match_info["site"]
+        heads = "".join(
+            f'<h2 class="headline"><a href="/article/{s["id"]}">{self._title(s)}</a></h2>'
+            for s in self._fresh(f"site{site}")
+        )
+        return web.Response(text=f"<html><body>{heads}</body></html>", content_type="text/html")
+
+    async def article(self, request: web.Request) -> web.Response:
+        await self._wait()
+        n = int(request.match_info["id"].rsplit("-", 1)[-1])
+        paras = "".join(f"<p>{self._text(n + k)}</p>" for k in range(3))
+        return web.Response(text=f"<html><body>{paras}</body></html>", content_type="text/html")
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/rss/{feed}", self.rss)
+        app.router.add_get("/site/{site}", self.site)
+        app.router.add_get("/article/{id}", self.article)
+        return app
+
+
+async def start(feeds: FakeFeeds, host: str = "127.0.0.1", port: int = 0) -> web.AppRunner:
+    """Serve on the running loop; returns the runner (its bound port is in .addresses)."""
+    runner = web.AppRunner(feeds.app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--latency-ms", type=float, default=50)
+    p.add_argument("--items", type=int, default=40)
+    p.add_argument("--new", type=int, default=5)
+    p.add_argument("--item-bytes", type=int, default=600)
+    a = p.parse_args()
+    web.run_app(FakeFeeds(a.latency_ms, a.items, a.new, a.item_bytes).app(), host="127.0.0.1", port=a.port)
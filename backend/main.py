@@ -1,10 +1,36 @@
 # file: app/main.py
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+
+from app.api import auth, users, commodities, market_data, supply, weather, ws, workspaces, alerts, reports, news_sources, analytics, replay
+from app import admission, metrics
+from app.db import engine
+from app.tasks import supervisor
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # background loops (tick generator, news poller) run only while the app is up,
+    # and only the ones BACKGROUND_TASKS enables in this process (see app/tasks.py)
+    await supervisor.start()
+    try:
+        yield
+    finally:
+        await supervisor.stop()
 
-from app.api import auth, users, commodities, market_data, supply, weather, ws, workspaces, alerts, reports, news_sources
 
-app = FastAPI(title="oriza Oriza - MVP")
+app = FastAPI(title="oriza Oriza - MVP", lifespan=lifespan)
+
+# per-user rate limits, concurrency caps and load shedding (see app/admission.py);
+# added first so metrics and CORS wrap its 429/503 responses
+app.add_middleware(admission.AdmissionMiddleware)
+
+# request latency / DB time per route, exposed at /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.instrument_engine(engine)
 
 # CORS (adjust origins as needed)
 app.add_middleware(
@@ -26,8 +52,16 @@ app.include_router(workspaces.router, prefix="/workspaces", tags=["workspaces"])
 app.include_router(alerts.router, prefix="/alerts", tags=["alerts"])
 app.include_router(reports.router, prefix="/reports", tags=["reports"])
 app.include_router(news_sources.router, tags=["news"])
+app.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+app.include_router(replay.router, prefix="/replay", tags=["replay"])
 
 
 @app.get("/health", tags=["system"])
 def health():
-    return {"status": "ok"}
+    return {"status": "ok", "tasks": supervisor.status()}
+
+
+@app.get("/metrics", tags=["system"], include_in_schema=False)
+def get_metrics():
+    """Prometheus text exposition of this process's metrics (see app/metrics.py)."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")